@@ -0,0 +1,89 @@
+"""
+JWT authentication without a users-table query per request.
+
+Tokens issued by login, registration and refresh carry the user fields most
+views read (USER_CLAIM), and ClaimsJWTAuthentication builds request.user from
+them as a ClaimsUser: no query unless a view reads a field outside the token,
+in which case the row is loaded once through the per-process cache in
+apps.accounts.cache. Refreshing re-reads the row, so profile changes and
+deactivation reach new access tokens within one access token lifetime. Set
+JWT_STATELESS_AUTH=False to load the user from the database on every request.
+
+Workspace roles are deliberately not put in the token: refresh tokens live for
+days, and membership changes have to take effect immediately.
+"""
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import user_rows
+from .models import ClaimsUser
+
+USER_CLAIM = 'usr'
+CLAIM_FIELDS = ('email', 'username', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+
+
+def user_claims(user):
+    if isinstance(user, dict):
+        return {name: user[name] for name in CLAIM_FIELDS}
+    return {name: getattr(user, name) for name in CLAIM_FIELDS}
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """A refresh token whose access tokens carry the user's fields"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[USER_CLAIM] = user_claims(user)
+        token._claims_fresh = True
+        return token
+
+    @property
+    def access_token(self):
+        if not getattr(self, '_claims_fresh', False):
+            # Refreshing: pick up profile changes made since the token was issued
+            row = user_rows.get(self.payload.get(api_settings.USER_ID_CLAIM))
+            if row is None or not row['is_active']:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+            self[USER_CLAIM] = user_claims(row)
+            self._claims_fresh = True
+        return super().access_token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if not getattr(settings, 'JWT_STATELESS_AUTH', True):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        claims = validated_token.get(USER_CLAIM)
+        if claims is not None:
+            user = ClaimsUser.from_values({'id': user_id, **claims})
+        else:
+            # Issued before tokens carried claims
+            row = user_rows.get(user_id)
+            if row is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user = ClaimsUser.from_values(row)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,57 @@
+"""
+Per-process cache of user rows for token-authenticated requests.
+
+Access tokens carry the user fields most views need (see
+apps.accounts.authentication), so requests normally never read the users
+table. When a view touches any other field, or a token has no user claims,
+the whole row is read once and reused for JWT_USER_CACHE_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class UserRowCache:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'JWT_USER_CACHE_TTL', 60)
+
+    def get(self, user_id):
+        """Field values by attname, or None if there is no such user"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._rows.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._rows.move_to_end(user_id)
+                return dict(entry[1])
+
+        from .models import User
+        row = User.objects.filter(pk=user_id).values(
+            *[field.attname for field in User._meta.concrete_fields]
+        ).first()
+        if row is None:
+            return None
+        with self._lock:
+            self._rows[user_id] = (now + self.ttl, row)
+            self._rows.move_to_end(user_id)
+            while len(self._rows) > self.max_entries:
+                self._rows.popitem(last=False)
+        return dict(row)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._rows.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+user_rows = UserRowCache()
@@ -29,3 +29,39 @@ class User(AbstractUser):
     def __str__(self):
         """String representation of the user."""
         return self.email
+
+
+class ClaimsUser(User):
+    """
+    A User built from access token claims without a query.
+
+    Fields missing from the token are deferred as usual, but the first access
+    to any of them loads the whole row at once (through the short-lived
+    per-process cache) instead of one column per access. Foreign keys,
+    filters and permission checks only need the id and work unchanged.
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_values(cls, values):
+        """An instance with the given attname -> value fields loaded and the rest deferred"""
+        names = [f.attname for f in cls._meta.concrete_fields if f.attname in values]
+        return cls.from_db(None, names, [values[name] for name in names])
+
+    def refresh_from_db(self, using=None, fields=None):
+        if fields is None or not self.get_deferred_fields():
+            return super().refresh_from_db(using=using, fields=fields)
+
+        from .cache import user_rows
+        row = user_rows.get(self.pk)
+        if row is None:
+            raise User.DoesNotExist("User matching the access token no longer exists.")
+        # Overwrite the token fields too, so the instance matches the row it was completed from
+        for name, value in row.items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .cache import user_rows
+        user_rows.invalidate(self.pk)
@@ -1,6 +1,67 @@
 """
 Tests for accounts app.
 """
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import USER_CLAIM
+from .cache import user_rows
+
+User = get_user_model()
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        user_rows.clear()
+        self.addCleanup(user_rows.clear)
+        self.user = User.objects.create_user(
+            username='claims', email='claims@example.com', password='password', first_name='Ada'
+        )
+        self.client = APIClient()
+        response = self.client.post('/api/auth/login/', {'email': 'claims@example.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.tokens = response.data
+
+    def authenticate(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_requests_do_not_query_the_users_table(self):
+        claims = AccessToken(self.tokens['access'])[USER_CLAIM]
+        self.assertEqual(claims['email'], 'claims@example.com')
+        self.assertTrue(claims['is_active'])
+
+        self.authenticate(self.tokens['access'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/activity/my-activity/?compact=1')
+        self.assertEqual(response.status_code, 200)
+        users_table = User._meta.db_table
+        self.assertFalse([q['sql'] for q in queries if f'FROM "{users_table}"' in q['sql']])
+
+    def test_other_fields_load_the_row_once(self):
+        from .authentication import ClaimsJWTAuthentication
+        user = ClaimsJWTAuthentication().get_user(AccessToken(self.tokens['access']))
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(user.date_joined)
+            self.assertTrue(user.check_password('password'))
+        again = ClaimsJWTAuthentication().get_user(AccessToken(self.tokens['access']))
+        with self.assertNumQueries(0):
+            self.assertEqual(again.password, user.password)
+
+    def test_refresh_picks_up_profile_changes(self):
+        self.authenticate(self.tokens['access'])
+        response = self.client.patch('/api/auth/profile/', {'first_name': 'Grace'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])[USER_CLAIM]['first_name'], 'Grace')
+
+    def test_deactivated_users_cannot_refresh(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        user_rows.invalidate(self.user.pk)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
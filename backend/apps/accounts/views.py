@@ -8,6 +8,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import ClaimsRefreshToken
+from .models import ClaimsUser
 from .serializers import UserSerializer, RegisterSerializer, ChangePasswordSerializer
 
 User = get_user_model()
@@ -31,7 +33,7 @@ class RegisterView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         
         # Serialize user data
         user_data = UserSerializer(user).data
@@ -54,9 +56,10 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         """
-        Return the current authenticated user.
+        Return the current authenticated user, read from the database rather
+        than the token claims so updates start from the stored values.
         """
-        return self.request.user
+        return ClaimsUser.objects.get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(APIView):
@@ -73,7 +76,7 @@ class ChangePasswordView(APIView):
         serializer = ChangePasswordSerializer(data=request.data)
         
         if serializer.is_valid():
-            user = request.user
+            user = ClaimsUser.objects.get(pk=request.user.pk)
             
             # Check old password
             if not user.check_password(serializer.validated_data['old_password']):
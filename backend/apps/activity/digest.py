@@ -0,0 +1,109 @@
+"""
+"What changed in my workspaces" digests.
+
+One grouped query over ActivityLog covers every workspace the user belongs
+to: rows are counted per (workspace, target, action, actor) in SQL, and only
+those groups are folded into the response here. The result is cached per user
+and window length for ACTIVITY_DIGEST_CACHE_TIMEOUT seconds, so repeated
+requests in that interval don't scan the log again.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from apps.workspaces.models import WorkspaceMember
+from .models import ActivityLog
+
+
+def digest_cache_key(user_id, hours, include_own, now):
+    """Same key for every request in one ACTIVITY_DIGEST_CACHE_TIMEOUT interval"""
+    interval = int(now.timestamp()) // max(settings.ACTIVITY_DIGEST_CACHE_TIMEOUT, 1)
+    return f"activity-digest:{user_id}:{hours}:{int(include_own)}:{interval}"
+
+
+def _actor_name(row):
+    if row['actor_id'] is None:
+        return 'Unknown User'
+    return f"{row['actor__first_name']} {row['actor__last_name']}".strip() or row['actor__email']
+
+
+def build_digest(user, since, until, include_own=False):
+    groups = ActivityLog.objects.filter(
+        workspace_id__in=WorkspaceMember.objects.filter(user=user).values('workspace_id'),
+        created_at__gte=since,
+        created_at__lt=until,
+    )
+    if not include_own:
+        groups = groups.exclude(actor=user)
+    # The target's most recent title, so a renamed notebook shows its current name
+    latest_title = ActivityLog.objects.filter(
+        target_type=OuterRef('target_type'), target_id=OuterRef('target_id'), workspace_id=OuterRef('workspace_id'),
+    ).order_by('-created_at').values('target_title')[:1]
+    groups = groups.values(
+        'workspace_id', 'workspace__name', 'target_type', 'target_id', 'action_type',
+        'actor_id', 'actor__email', 'actor__first_name', 'actor__last_name',
+    ).annotate(
+        changes=Count('id'), last_at=Max('created_at'), title=Subquery(latest_title),
+    ).order_by()
+
+    workspaces = {}
+    for row in groups:
+        workspace = workspaces.get(row['workspace_id'])
+        if workspace is None:
+            workspace = workspaces[row['workspace_id']] = {
+                'workspace_id': row['workspace_id'],
+                'name': row['workspace__name'],
+                'total': 0,
+                'actions': defaultdict(int),
+                'notebooks': {},
+                'actors': {},
+            }
+        workspace['total'] += row['changes']
+        workspace['actions'][row['action_type']] += row['changes']
+
+        actor = workspace['actors'].setdefault(row['actor_id'], {
+            'actor_id': row['actor_id'], 'name': _actor_name(row), 'changes': 0,
+        })
+        actor['changes'] += row['changes']
+
+        if row['target_type'] == 'Notebook':
+            notebook = workspace['notebooks'].setdefault(row['target_id'], {
+                'notebook_id': row['target_id'], 'title': row['title'], 'changes': 0,
+                'last_changed_at': row['last_at'], 'actor_ids': set(),
+            })
+            notebook['changes'] += row['changes']
+            notebook['actor_ids'].add(row['actor_id'])
+            if row['last_at'] > notebook['last_changed_at']:
+                notebook['last_changed_at'] = row['last_at']
+                notebook['title'] = row['title']
+
+    result = []
+    for workspace in sorted(workspaces.values(), key=lambda w: -w['total']):
+        notebooks = sorted(workspace['notebooks'].values(), key=lambda n: n['last_changed_at'], reverse=True)
+        for notebook in notebooks:
+            notebook['actor_ids'] = sorted(a for a in notebook['actor_ids'] if a is not None)
+        workspace['actions'] = dict(workspace['actions'])
+        workspace['notebooks'] = notebooks
+        workspace['actors'] = sorted(workspace['actors'].values(), key=lambda a: -a['changes'])
+        result.append(workspace)
+
+    return {
+        'since': since,
+        'until': until,
+        'total': sum(w['total'] for w in result),
+        'workspaces': result,
+    }
+
+
+def get_digest(user, hours=24, include_own=False, now=None):
+    now = now or timezone.now()
+    key = digest_cache_key(user.id, hours, include_own, now)
+    digest = cache.get(key)
+    if digest is None:
+        digest = build_digest(user, now - timedelta(hours=hours), now, include_own)
+        cache.set(key, digest, settings.ACTIVITY_DIGEST_CACHE_TIMEOUT)
+    return digest
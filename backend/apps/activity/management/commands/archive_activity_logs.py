@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.activity.partitions import archivable_months, archive_expired, partition_name
+
+
+class Command(BaseCommand):
+    help = "Export activity older than ACTIVITY_RETENTION_DAYS to compressed JSON Lines and remove it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None)
+        parser.add_argument('--output-dir', default=None, help="Defaults to ACTIVITY_ARCHIVE_DIR")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            months = archivable_months(options['retention_days'])
+            self.stdout.write(f"{len(months)} months would be archived: "
+                              f"{', '.join(partition_name(m) for m in months) or 'none'}")
+            return
+
+        archived = archive_expired(
+            options['retention_days'], options['output_dir'], batch_size=options['batch_size']
+        )
+        for start, path, count in archived:
+            self.stdout.write(f"{partition_name(start)}: {count} rows -> {path or 'nothing to export'}")
+        if not archived:
+            self.stdout.write("Nothing to archive")
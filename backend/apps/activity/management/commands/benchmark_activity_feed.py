@@ -0,0 +1,159 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.activity.models import ActivityLog
+from apps.workspaces.models import Workspace
+
+User = get_user_model()
+BENCHMARK_PREFIX = 'activity-benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill activity_logs with synthetic rows (10M by default) and time per-notebook feed "
+        "lookups. Run it against a scratch database; generated rows are removed afterwards "
+        "unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--workspaces', type=int, default=1000)
+        parser.add_argument('--notebooks-per-workspace', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--keep', action='store_true', help="Keep the generated rows for later runs")
+        parser.add_argument('--reuse', action='store_true', help="Benchmark rows kept by an earlier --keep run")
+
+    def handle(self, *args, **options):
+        workspace_ids = self.benchmark_workspaces(options)
+        if not options['reuse']:
+            start = time.perf_counter()
+            self.generate(workspace_ids, options)
+            self.stdout.write(f"Inserted {options['rows']} rows in {time.perf_counter() - start:.1f}s")
+
+        try:
+            self.measure(workspace_ids, options)
+        finally:
+            if not options['keep']:
+                ActivityLog.objects.filter(workspace_id__in=workspace_ids).delete()
+                Workspace.objects.filter(id__in=workspace_ids).delete()
+                User.objects.filter(username=BENCHMARK_PREFIX).delete()
+
+    def benchmark_workspaces(self, options):
+        owner, _ = User.objects.get_or_create(
+            username=BENCHMARK_PREFIX, defaults={'email': f'{BENCHMARK_PREFIX}@example.com'}
+        )
+        existing = list(
+            Workspace.objects.filter(name__startswith=BENCHMARK_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+        for i in range(len(existing), options['workspaces']):
+            existing.append(Workspace.objects.create(name=f'{BENCHMARK_PREFIX}-{i}', owner=owner).id)
+        self.owner = owner
+        return existing[:options['workspaces']]
+
+    def notebook_id(self, workspace_index, n, options):
+        # Synthetic ids: target_id is not a foreign key, so no notebook rows are needed
+        return 1_000_000_000 + workspace_index * options['notebooks_per_workspace'] + n
+
+    def generate(self, workspace_ids, options):
+        if connection.vendor == 'postgresql':
+            return self.generate_postgresql(workspace_ids, options)
+
+        rng = random.Random(0)
+        now = timezone.now()
+        batch = []
+        for i in range(options['rows']):
+            workspace_index = rng.randrange(len(workspace_ids))
+            is_notebook = i % 5
+            batch.append(ActivityLog(
+                workspace_id=workspace_ids[workspace_index],
+                actor_id=self.owner.id,
+                action_type=ActivityLog.NOTEBOOK_UPDATED if is_notebook else ActivityLog.WORKSPACE_UPDATED,
+                target_type='Notebook' if is_notebook else 'Workspace',
+                target_id=(self.notebook_id(workspace_index, rng.randrange(options['notebooks_per_workspace']), options)
+                           if is_notebook else workspace_ids[workspace_index]),
+                target_title='Benchmark',
+                action_display='benchmark',
+                created_at=now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            ))
+            if len(batch) >= options['batch_size']:
+                self.insert(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(ActivityLog._meta.db_table)}")
+
+    def insert(self, batch):
+        # auto_now_add overwrites created_at on insert; put the spread back
+        created = [activity.created_at for activity in batch]
+        ActivityLog.objects.bulk_create(batch)
+        for activity, created_at in zip(batch, created):
+            activity.created_at = created_at
+        ActivityLog.objects.bulk_update(batch, ['created_at'])
+
+    def generate_postgresql(self, workspace_ids, options):
+        """One INSERT ... SELECT per batch, generated on the server"""
+        notebooks = options['notebooks_per_workspace']
+        with connection.cursor() as cursor:
+            for offset in range(0, options['rows'], options['batch_size']):
+                count = min(options['batch_size'], options['rows'] - offset)
+                cursor.execute(
+                    f"""
+                    INSERT INTO {connection.ops.quote_name(ActivityLog._meta.db_table)}
+                        (workspace_id, actor_id, action_type, target_type, target_id,
+                         target_title, metadata, action_display, created_at)
+                    SELECT ws.ids[1 + s.w], %s,
+                           CASE WHEN s.g %% 5 = 0 THEN %s ELSE %s END,
+                           CASE WHEN s.g %% 5 = 0 THEN 'Workspace' ELSE 'Notebook' END,
+                           CASE WHEN s.g %% 5 = 0 THEN ws.ids[1 + s.w]
+                                ELSE 1000000000 + s.w * %s + (s.g / %s) %% %s END,
+                           'Benchmark', '{{}}', 'benchmark',
+                           now() - random() * interval '365 days'
+                    FROM (SELECT g, (g::bigint * 2654435761 %% %s)::int AS w
+                          FROM generate_series(%s, %s) g) s,
+                         (SELECT %s::int[] AS ids) ws
+                    """,
+                    [self.owner.id, ActivityLog.WORKSPACE_UPDATED, ActivityLog.NOTEBOOK_UPDATED,
+                     notebooks, len(workspace_ids), notebooks, len(workspace_ids),
+                     offset, offset + count - 1, workspace_ids]
+                )
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(ActivityLog._meta.db_table)}")
+
+    def measure(self, workspace_ids, options):
+        rng = random.Random(1)
+        total = ActivityLog.objects.count()
+
+        def feed_query():
+            workspace_index = rng.randrange(len(workspace_ids))
+            notebook_id = self.notebook_id(
+                workspace_index, rng.randrange(options['notebooks_per_workspace']), options
+            )
+            # Same filters as NotebookActivityView
+            return ActivityLog.objects.filter(
+                workspace_id=workspace_ids[workspace_index], target_type='Notebook', target_id=notebook_id
+            ).order_by('-created_at')[:20]
+
+        list(feed_query())  # warm up
+        timings = []
+        for _ in range(options['queries']):
+            queryset = feed_query()
+            start = time.perf_counter()
+            list(queryset)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        self.stdout.write(f"{total} activity rows, {options['queries']} notebook feed queries (page of 20)")
+        self.stdout.write(
+            f"p50 {statistics.median(timings):.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, max {timings[-1]:.2f} ms"
+        )
+        self.stdout.write("Plan:")
+        self.stdout.write(feed_query().explain())
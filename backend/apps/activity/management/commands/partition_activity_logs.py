@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.activity.partitions import PartitioningError, convert_to_partitioned, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly partitions of activity_logs (PostgreSQL), or convert the table with --convert"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help="One-off: rebuild activity_logs as a partitioned table, copying all rows")
+        parser.add_argument('--months-ahead', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            if options['convert']:
+                convert_to_partitioned(options['months_ahead'])
+                self.stdout.write("activity_logs is now partitioned by month")
+                return
+            created = ensure_partitions(options['months_ahead'])
+        except PartitioningError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Created {len(created)} partitions")
+        for name, moved in created:
+            self.stdout.write(f"  {name}" + (f" ({moved} rows moved from the default partition)" if moved else ""))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='action_type',
+            field=models.CharField(choices=[('Created workspace', 'Created workspace'), ('Updated workspace', 'Updated workspace'), ('Added member', 'Added member'), ('Removed member', 'Removed member'), ('Changed member role', 'Changed member role'), ('Created notebook', 'Created notebook'), ('Updated notebook', 'Updated notebook'), ('Deleted notebook', 'Deleted notebook'), ('Restored notebook', 'Restored notebook'), ('Restored notebook version', 'Restored notebook version'), ('Created label', 'Created label'), ('Added label to notebook', 'Added label to notebook'), ('Removed label from notebook', 'Removed label from notebook'), ('Created share link', 'Created share link'), ('Revoked share link', 'Revoked share link')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+def fill_action_display(apps, schema_editor):
+    ActivityLog = apps.get_model('activity', 'ActivityLog')
+    verbs = dict(ActivityLog._meta.get_field('action_type').choices)
+    pending = ActivityLog.objects.filter(action_display='').select_related('actor').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:2000])
+        if not batch:
+            break
+        for activity in batch:
+            actor = activity.actor
+            name = 'Unknown User'
+            if actor is not None:
+                name = f"{actor.first_name} {actor.last_name}".strip() or actor.email
+            verb = verbs.get(activity.action_type, activity.action_type).lower()
+            activity.action_display = f"{name} {verb} '{activity.target_title}'"[:400]
+        ActivityLog.objects.bulk_update(batch, ['action_display'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0002_version_restored_action'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='action_display',
+            field=models.CharField(blank=True, max_length=400),
+        ),
+        migrations.RunPython(fill_action_display, migrations.RunPython.noop),
+    ]
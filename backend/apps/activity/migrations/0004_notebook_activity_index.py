@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0003_stored_action_display'),
+        ('workspaces', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['target_type', 'target_id', '-created_at'], name='activity_lo_target__0c1621_idx'),
+        ),
+    ]
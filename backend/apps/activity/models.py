@@ -12,6 +12,7 @@ class ActivityLog(models.Model):
     NOTEBOOK_UPDATED = 'Updated notebook'
     NOTEBOOK_DELETED = 'Deleted notebook'
     NOTEBOOK_RESTORED = 'Restored notebook'
+    NOTEBOOK_VERSION_RESTORED = 'Restored notebook version'
     LABEL_CREATED = 'Created label'
     LABEL_ADDED = 'Added label to notebook'
     LABEL_REMOVED = 'Removed label from notebook'
@@ -28,6 +29,7 @@ class ActivityLog(models.Model):
         (NOTEBOOK_UPDATED, 'Updated notebook'),
         (NOTEBOOK_DELETED, 'Deleted notebook'),
         (NOTEBOOK_RESTORED, 'Restored notebook'),
+        (NOTEBOOK_VERSION_RESTORED, 'Restored notebook version'),
         (LABEL_CREATED, 'Created label'),
         (LABEL_ADDED, 'Added label to notebook'),
         (LABEL_REMOVED, 'Removed label from notebook'),
@@ -42,6 +44,8 @@ class ActivityLog(models.Model):
     target_id = models.IntegerField(null=True)
     target_title = models.CharField(max_length=300)
     metadata = models.JSONField(default=dict)
+    # "<actor> <action> '<target>'", rendered once when the entry is written
+    action_display = models.CharField(max_length=400, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -50,8 +54,28 @@ class ActivityLog(models.Model):
         indexes = [
             models.Index(fields=['workspace', '-created_at']),
             models.Index(fields=['actor', '-created_at']),
+            models.Index(fields=['target_type', 'target_id', '-created_at']),
         ]
 
+    # Shown for edits made through an EDIT share link, which have no user
+    GUEST_ACTOR_NAME = 'Guest via share link'
+
+    @staticmethod
+    def actor_name(actor):
+        if actor is None:
+            return 'Unknown User'
+        return f"{actor.first_name} {actor.last_name}".strip() or actor.email
+
+    @classmethod
+    def describe(cls, actor_name, action_type, target_title):
+        verb = dict(cls.ACTION_CHOICES).get(action_type, action_type).lower()
+        return f"{actor_name} {verb} '{target_title}'"[:400]
+
+    def save(self, *args, **kwargs):
+        if not self.action_display:
+            self.action_display = self.describe(self.actor_name(self.actor), self.action_type, self.target_title)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         actor_email = self.actor.email if self.actor else 'Unknown'
         return f"{actor_email} {self.action_type} in {self.workspace.name}"
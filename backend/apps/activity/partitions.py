@@ -0,0 +1,303 @@
+"""
+Monthly partitioning and archival of the activity log.
+
+On PostgreSQL `manage.py partition_activity_logs --convert` turns
+activity_logs into a table partitioned by RANGE (created_at) with one
+partition per month (activity_logs_y2024m03, ...) plus a default partition
+for rows outside every range. It copies the existing rows in one transaction,
+so run it in a maintenance window. Afterwards run the command without
+--convert from cron to keep ACTIVITY_PARTITION_MONTHS_AHEAD months of empty
+partitions ready; rows that reached the default partition because a month
+had no partition yet are moved into it when it is created. Feed queries always
+filter on created_at, so PostgreSQL only touches the partitions for the
+requested window.
+
+`manage.py archive_activity_logs` applies the retention policy on any
+database: every month older than ACTIVITY_RETENTION_DAYS is written to
+ACTIVITY_ARCHIVE_DIR as gzip-compressed JSON Lines and then removed, by
+dropping its partition when there is one and by batched deletes otherwise.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ActivityLog
+
+TABLE = ActivityLog._meta.db_table
+LEGACY_TABLE = f'{TABLE}_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+ARCHIVE_FIELDS = [
+    'id', 'workspace_id', 'actor_id', 'action_type', 'target_type',
+    'target_id', 'target_title', 'metadata', 'action_display', 'created_at',
+]
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(start):
+    return f'{TABLE}_y{start.year}m{start.month:02d}'
+
+
+def _require_postgresql():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Activity log partitioning needs PostgreSQL")
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """{month start: partition name} for the monthly partitions that exist"""
+    if not is_partitioned():
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return months
+
+
+def _create_partition(cursor, start):
+    """
+    Create the partition for one month. PostgreSQL refuses a partition whose
+    range covers rows already in the default partition (written while no
+    partition for the month existed, e.g. when the cron job missed a month
+    boundary), so those rows are moved into the new partition first, with the
+    default partition detached meanwhile.
+    """
+    qn = connection.ops.quote_name
+    table, default, name = qn(TABLE), qn(DEFAULT_PARTITION), qn(partition_name(start))
+    end = next_month(start)
+    create = (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+    cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(
+            f"SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s LIMIT 1", [start, end]
+        )
+        has_rows = cursor.fetchone() is not None
+    else:
+        has_rows = False
+    if not has_rows:
+        cursor.execute(create)
+        return 0
+
+    with transaction.atomic():
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+        cursor.execute(create)
+        cursor.execute(
+            f"INSERT INTO {name} SELECT * FROM {default} WHERE created_at >= %s AND created_at < %s", [start, end]
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"DELETE FROM {default} WHERE created_at >= %s AND created_at < %s", [start, end])
+        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+    return moved
+
+
+def ensure_partitions(months_ahead=None, now=None):
+    """
+    Create the partitions for this month and the next few; returns
+    [(name, rows moved out of the default partition)] for those created
+    """
+    _require_postgresql()
+    if not is_partitioned():
+        raise PartitioningError(f"{TABLE} is not partitioned yet, run with --convert first")
+    if months_ahead is None:
+        months_ahead = settings.ACTIVITY_PARTITION_MONTHS_AHEAD
+
+    existing = partitions()
+    created = []
+    start = month_start(now or timezone.now())
+    with connection.cursor() as cursor:
+        for _ in range(months_ahead + 1):
+            if start not in existing:
+                moved = _create_partition(cursor, start)
+                created.append((partition_name(start), moved))
+            start = next_month(start)
+    return created
+
+
+@transaction.atomic
+def convert_to_partitioned(months_ahead=None, now=None):
+    """
+    Rebuild activity_logs as a partitioned table holding the same rows, indexes
+    and foreign keys. PostgreSQL needs the partition key in the primary key, so
+    it becomes (id, created_at); ids keep counting up from the old maximum.
+    """
+    _require_postgresql()
+    if is_partitioned():
+        raise PartitioningError(f"{TABLE} is already partitioned")
+    if months_ahead is None:
+        months_ahead = settings.ACTIVITY_PARTITION_MONTHS_AHEAD
+
+    qn = connection.ops.quote_name
+    table, legacy = qn(TABLE), qn(LEGACY_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+            [LEGACY_TABLE, LEGACY_TABLE]
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [LEGACY_TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f"CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT")
+
+        cursor.execute(f"SELECT min(created_at) FROM {legacy}")
+        oldest = cursor.fetchone()[0]
+        start = month_start(oldest or timezone.now())
+        last = month_start(now or timezone.now())
+        for _ in range(months_ahead):
+            last = next_month(last)
+        while start <= last:
+            _create_partition(cursor, start)
+            start = next_month(start)
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+
+        # Identity columns get a fresh sequence from LIKE; serial columns keep
+        # using the legacy sequence, which must not be dropped with that table
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id'), pg_get_serial_sequence(%s, 'id')",
+                       [TABLE, LEGACY_TABLE])
+        sequence, legacy_sequence = cursor.fetchone()
+        if sequence:
+            cursor.execute(f"SELECT setval(%s, coalesce(max(id), 0) + 1, false) FROM {table}", [sequence])
+        elif legacy_sequence:
+            cursor.execute(f"ALTER SEQUENCE {legacy_sequence} OWNED BY {table}.id")
+
+        cursor.execute(f"DROP TABLE {legacy}")
+        # Added once the legacy table and its constraint names are gone; the
+        # other indexes keep their original names, which Django's migration state refers to
+        cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)")
+        legacy_reference = re.compile(rf'ON (ONLY )?(\S+\.)?"?{LEGACY_TABLE}"? ')
+        for definition in index_definitions:
+            cursor.execute(legacy_reference.sub(f'ON {table} ', definition, count=1))
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {qn(name)} {definition}")
+
+
+def archivable_months(retention_days=None, now=None):
+    """Start of every month that lies entirely before the retention cutoff and still has rows"""
+    if retention_days is None:
+        retention_days = settings.ACTIVITY_RETENTION_DAYS
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    oldest = ActivityLog.objects.aggregate(oldest=Min('created_at'))['oldest']
+    if oldest is None:
+        return []
+
+    months = []
+    start = month_start(oldest)
+    while next_month(start) <= cutoff:
+        months.append(start)
+        start = next_month(start)
+    return months
+
+
+def archive_path(output_dir, start):
+    """A file name for the month that does not overwrite an earlier archive"""
+    output_dir = Path(output_dir)
+    base = f'{partition_name(start)}.jsonl.gz'
+    path, n = output_dir / base, 1
+    while path.exists():
+        path = output_dir / base.replace('.jsonl.gz', f'.{n}.jsonl.gz')
+        n += 1
+    return path
+
+
+def export_month(start, output_dir, chunk_size=5000):
+    """Write one month of activity to compressed JSON Lines; returns (path, rows)"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_path(output_dir, start)
+    partial = path.with_name(path.name + '.partial')
+
+    rows = ActivityLog.objects.filter(
+        created_at__gte=start, created_at__lt=next_month(start)
+    ).order_by().values(*ARCHIVE_FIELDS).iterator(chunk_size=chunk_size)
+    count = 0
+    with gzip.open(partial, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, cls=DjangoJSONEncoder))
+            f.write('\n')
+            count += 1
+    if not count:
+        partial.unlink()
+        return None, 0
+    os.replace(partial, path)
+    return path, count
+
+
+def drop_month(start, batch_size=5000):
+    """Remove one month of activity; returns rows deleted outside a dropped partition"""
+    name = partitions().get(start)
+    if name is not None:
+        qn = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+
+    # Rows in the default partition, or the whole month on an unpartitioned table
+    expired = ActivityLog.objects.filter(created_at__gte=start, created_at__lt=next_month(start)).order_by()
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ActivityLog.objects.filter(pk__in=ids).delete()[0]
+
+
+def archive_expired(retention_days=None, output_dir=None, now=None, batch_size=5000):
+    """Export then remove every month past retention; returns [(month, path, rows)]"""
+    output_dir = output_dir or settings.ACTIVITY_ARCHIVE_DIR
+    archived = []
+    for start in archivable_months(retention_days, now):
+        path, count = export_month(start, output_dir, chunk_size=batch_size)
+        drop_month(start, batch_size=batch_size)
+        archived.append((start, path, count))
+    return archived
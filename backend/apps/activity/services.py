@@ -2,20 +2,34 @@ from .models import ActivityLog
 
 class ActivityService:
     @staticmethod
-    def log_activity(workspace, actor, action_type, target_type=None, target_id=None, target_title=None, metadata=None):
-        if metadata is None:
-            metadata = {}
-            
-        return ActivityLog.objects.create(
+    def build_activity(workspace, actor, action_type, target_type=None, target_id=None, target_title=None,
+                       metadata=None, actor_name=None):
+        """An unsaved ActivityLog, for callers that write entries in batches"""
+        target_title = target_title or 'Unknown'
+        actor_name = actor_name or ActivityLog.actor_name(actor)
+        return ActivityLog(
             workspace=workspace,
             actor=actor,
             action_type=action_type,
             target_type=target_type,
             target_id=target_id,
-            target_title=target_title or 'Unknown',
-            metadata=metadata
+            target_title=target_title,
+            metadata=metadata if metadata is not None else {},
+            action_display=ActivityLog.describe(actor_name, action_type, target_title)
         )
 
+    @staticmethod
+    def log_activity(workspace, actor, action_type, target_type=None, target_id=None, target_title=None, metadata=None):
+        activity = ActivityService.build_activity(
+            workspace, actor, action_type, target_type, target_id, target_title, metadata
+        )
+        activity.save()
+        return activity
+
+    @staticmethod
+    def log_many(activities):
+        return ActivityLog.objects.bulk_create(activities)
+
     @staticmethod
     def log_workspace_created(workspace, actor):
         ActivityService.log_activity(
@@ -54,6 +68,38 @@ class ActivityService:
             metadata=meta
         )
 
+    @staticmethod
+    def log_guest_edit(notebook, share_link_id, old_version=None, new_version=None):
+        """Edits through an EDIT share link have no actor; the entry names the link instead"""
+        meta = {'share_link_id': share_link_id}
+        if old_version: meta['old_version'] = old_version
+        if new_version: meta['new_version'] = new_version
+
+        activity = ActivityService.build_activity(
+            workspace=notebook.workspace,
+            actor=None,
+            action_type=ActivityLog.NOTEBOOK_UPDATED,
+            target_type='Notebook',
+            target_id=notebook.id,
+            target_title=notebook.title,
+            metadata=meta,
+            actor_name=ActivityLog.GUEST_ACTOR_NAME
+        )
+        activity.save()
+        return activity
+
+    @staticmethod
+    def log_version_restored(notebook, actor, restored_version, new_version):
+        ActivityService.log_activity(
+            workspace=notebook.workspace,
+            actor=actor,
+            action_type=ActivityLog.NOTEBOOK_VERSION_RESTORED,
+            target_type='Notebook',
+            target_id=notebook.id,
+            target_title=notebook.title,
+            metadata={'restored_version': restored_version, 'new_version': new_version}
+        )
+
     @staticmethod
     def log_member_added(workspace, actor, added_user, role):
         ActivityService.log_activity(
@@ -7,16 +7,16 @@ from .services import ActivityService
 @receiver(pre_save, sender=Notebook)
 def capture_old_notebook_state(sender, instance, **kwargs):
     if instance.pk:
-        try:
-            old_instance = Notebook.objects.get(pk=instance.pk)
-            instance._old_version = old_instance.version
-        except Notebook.DoesNotExist:
-            instance._old_version = None
+        # Only the version is needed; don't pull the whole content again
+        instance._old_version = Notebook.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
     else:
         instance._old_version = None
 
 @receiver(post_save, sender=Notebook)
 def log_notebook_activity(sender, instance, created, **kwargs):
+    if getattr(instance, '_skip_activity_log', False):
+        # The caller logs a more specific entry itself (e.g. version restore)
+        return
     if created:
         # For created, we use created_by
         ActivityService.log_notebook_created(instance, instance.created_by)
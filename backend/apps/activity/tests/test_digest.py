@@ -0,0 +1,73 @@
+from datetime import datetime, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.activity.digest import get_digest
+from apps.activity.models import ActivityLog
+from apps.activity.services import ActivityService
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.notebooks.models import Notebook
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class ActivityDigestTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        cache.clear()
+
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='password')
+        self.colleague = User.objects.create_user(
+            username='colleague', email='colleague@example.com', password='password', first_name='Grace'
+        )
+        self.workspace = Workspace.objects.create(name='Team', owner=self.user)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.colleague, role='EDITOR')
+        self.private = Workspace.objects.create(name='Not mine', owner=self.colleague)
+        ActivityLog.objects.all().delete()
+
+        notebook = Notebook.objects.create(title='Roadmap', workspace=self.workspace, created_by=self.user)
+        for _ in range(3):
+            ActivityService.log_notebook_updated(notebook, self.colleague)
+        ActivityService.log_notebook_updated(notebook, self.user)
+        ActivityService.log_activity(self.private, self.colleague, ActivityLog.WORKSPACE_UPDATED,
+                                     'Workspace', self.private.id, 'Not mine')
+        self.notebook = notebook
+
+    def test_digest_groups_activity_in_member_workspaces(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/activity/digest/', {'hours': 24})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(response.data['total'], 3)
+        [workspace] = response.data['workspaces']
+        self.assertEqual(workspace['name'], 'Team')
+        self.assertEqual(workspace['actions'], {ActivityLog.NOTEBOOK_UPDATED: 3})
+        self.assertEqual(workspace['actors'], [{'actor_id': self.colleague.id, 'name': 'Grace', 'changes': 3}])
+        self.assertEqual(workspace['notebooks'][0]['notebook_id'], self.notebook.id)
+        self.assertEqual(workspace['notebooks'][0]['actor_ids'], [self.colleague.id])
+
+        response = client.get('/api/activity/digest/', {'hours': 24, 'include_own': '1'})
+        self.assertEqual(response.data['total'], 4)
+
+    def test_digest_is_cached_for_the_window(self):
+        now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        get_digest(self.user, now=now)
+        with self.assertNumQueries(0):
+            digest = get_digest(self.user, now=now)
+        self.assertEqual((digest['until'] - digest['since']).total_seconds(), 24 * 3600)
+
+    def test_digest_shows_the_latest_title(self):
+        # Alphabetically before the old title, so the most recent row has to win
+        self.notebook.title = 'Plan'
+        entry = ActivityService.log_activity(self.workspace, self.colleague, ActivityLog.NOTEBOOK_UPDATED,
+                                             'Notebook', self.notebook.id, 'Plan')
+        ActivityLog.objects.filter(pk=entry.pk).update(created_at=datetime.now(dt_timezone.utc))
+        digest = get_digest(self.user)
+        self.assertEqual(digest['workspaces'][0]['notebooks'][0]['title'], 'Plan')
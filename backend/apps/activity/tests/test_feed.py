@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.activity.models import ActivityLog
+from apps.activity.services import ActivityService
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.notebooks.models import Notebook
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class ActivityFeedTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.user = User.objects.create_user(
+            username='feed', email='feed@example.com', password='password', first_name='Ada', last_name='Lovelace'
+        )
+        self.workspace = Workspace.objects.create(name='Feed WS', owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_display_string_is_stored_when_written(self):
+        single = ActivityService.log_activity(
+            self.workspace, self.user, ActivityLog.NOTEBOOK_CREATED, 'Notebook', 1, 'Plans'
+        )
+        batched = ActivityService.log_many([ActivityService.build_activity(
+            self.workspace, None, ActivityLog.LABEL_CREATED, 'Label', 2, 'Urgent'
+        )])[0]
+        self.assertEqual(single.action_display, "Ada Lovelace created notebook 'Plans'")
+        self.assertEqual(ActivityLog.objects.get(pk=batched.pk).action_display, "Unknown User created label 'Urgent'")
+
+    def test_compact_feed_is_one_query(self):
+        ActivityService.log_many([
+            ActivityService.build_activity(self.workspace, self.user, ActivityLog.NOTEBOOK_UPDATED,
+                                           'Notebook', i, f'Notebook {i}')
+            for i in range(120)
+        ])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/activity/my-activity/', {'compact': '1', 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(response.data['results'][0]['actor_id'], self.user.id)
+        self.assertIsNotNone(response.data['next'])
+
+        # The full format joins the actor instead of loading it per row
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/activity/my-activity/', {'page_size': 100})
+        self.assertEqual(response.data['results'][0]['actor']['email'], 'feed@example.com')
+
+    def test_notebook_feed_is_limited_to_the_notebooks_workspace(self):
+        notebook = Notebook.objects.create(title='Plans', workspace=self.workspace, created_by=self.user)
+        ActivityService.log_notebook_created(notebook, self.user)
+        # A stray entry from another workspace pointing at the same id
+        other = User.objects.create_user(username='other', email='other@example.com', password='password')
+        other_workspace = Workspace.objects.create(name='Other WS', owner=other)
+        ActivityService.log_activity(other_workspace, other, ActivityLog.NOTEBOOK_UPDATED, 'Notebook', notebook.id, 'X')
+
+        response = self.client.get(f'/api/activity/notebooks/{notebook.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['target_title'] for a in response.data['results']], ['Plans'])
+
+        outsider = APIClient()
+        outsider.force_authenticate(other)
+        self.assertEqual(outsider.get(f'/api/activity/notebooks/{notebook.id}/').status_code, 403)
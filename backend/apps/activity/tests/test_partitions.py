@@ -0,0 +1,75 @@
+import gzip
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from apps.activity.models import ActivityLog
+from apps.activity.partitions import (
+    archivable_months, archive_expired, convert_to_partitioned, ensure_partitions, next_month, partition_name,
+)
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.notebooks.models import Notebook
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class ActivityArchiveTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.user = User.objects.create_user(username='archivist', email='archivist@example.com', password='password')
+        self.workspace = Workspace.objects.create(name='Archive WS', owner=self.user)
+        ActivityLog.objects.all().delete()
+
+    def log_at(self, when, title):
+        entry = ActivityLog.objects.create(
+            workspace=self.workspace, actor=self.user, action_type=ActivityLog.NOTEBOOK_CREATED,
+            target_type='Notebook', target_id=1, target_title=title
+        )
+        ActivityLog.objects.filter(pk=entry.pk).update(created_at=when)
+
+    def test_months_past_retention_are_exported_and_removed(self):
+        self.log_at(datetime(2023, 1, 10, tzinfo=dt_timezone.utc), 'January')
+        self.log_at(datetime(2023, 1, 31, 23, 59, tzinfo=dt_timezone.utc), 'January, late')
+        self.log_at(datetime(2023, 2, 15, tzinfo=dt_timezone.utc), 'February')
+        self.log_at(datetime(2023, 3, 20, tzinfo=dt_timezone.utc), 'March')
+        now = datetime(2023, 4, 10, tzinfo=dt_timezone.utc)
+
+        # March is only partly past the 30 day cutoff, so it stays
+        self.assertEqual(archivable_months(30, now), [
+            datetime(2023, 1, 1, tzinfo=dt_timezone.utc), datetime(2023, 2, 1, tzinfo=dt_timezone.utc),
+        ])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            archived = archive_expired(30, output_dir, now=now)
+            self.assertEqual([count for _, _, count in archived], [2, 1])
+            with gzip.open(archived[0][1], 'rt') as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(sorted(r['target_title'] for r in rows), ['January', 'January, late'])
+        self.assertEqual(rows[0]['workspace_id'], self.workspace.id)
+        self.assertEqual(list(ActivityLog.objects.values_list('target_title', flat=True)), ['March'])
+
+    def test_next_month_rolls_over_the_year(self):
+        self.assertEqual(
+            next_month(datetime(2023, 12, 1, tzinfo=dt_timezone.utc)),
+            datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', "Partitioning needs PostgreSQL")
+    def test_new_partition_takes_rows_from_the_default_partition(self):
+        self.log_at(datetime(2023, 1, 10, tzinfo=dt_timezone.utc), 'January')
+        convert_to_partitioned(months_ahead=0, now=datetime(2023, 1, 15, tzinfo=dt_timezone.utc))
+        # Written while March had no partition, so it sits in the default one
+        self.log_at(datetime(2023, 3, 5, tzinfo=dt_timezone.utc), 'March')
+
+        created = ensure_partitions(months_ahead=0, now=datetime(2023, 3, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(created, [(partition_name(datetime(2023, 3, 1, tzinfo=dt_timezone.utc)), 1)])
+        self.assertEqual(ActivityLog.objects.filter(target_title='March').count(), 1)
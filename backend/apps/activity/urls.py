@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import WorkspaceActivityView, UserActivityView, NotebookActivityView
+from .views import WorkspaceActivityView, UserActivityView, NotebookActivityView, ActivityDigestView
 
 urlpatterns = [
     path('workspaces/<int:workspace_id>/', WorkspaceActivityView.as_view(), name='workspace-activity'),
     path('my-activity/', UserActivityView.as_view(), name='user-activity'),
     path('notebooks/<int:notebook_id>/', NotebookActivityView.as_view(), name='notebook-activity'),
+    path('digest/', ActivityDigestView.as_view(), name='activity-digest'),
 ]
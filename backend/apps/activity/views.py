@@ -1,11 +1,17 @@
 from rest_framework import generics
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from django.conf import settings
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import timedelta
 
+from apps.notebooks.models import Notebook
 from apps.workspaces.permissions import IsWorkspaceMember
 from apps.notebooks.permissions import CanAccessNotebook
+from .digest import get_digest
 from .models import ActivityLog
 from .serializers import ActivityLogSerializer
 
@@ -14,14 +20,40 @@ class ActivityPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class WorkspaceActivityView(generics.ListAPIView):
+class CompactActivityPagination(CursorPagination):
+    """No COUNT query: a compact page is a single SELECT"""
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+COMPACT_FIELDS = (
+    'id', 'actor_id', 'action_type', 'action_display',
+    'target_type', 'target_id', 'target_title', 'metadata', 'created_at',
+)
+
+class ActivityFeedMixin:
+    """
+    `?compact=1` returns plain rows (actor as an id, the stored action_display,
+    no relative time) with cursor pagination, skipping the serializer entirely.
+    """
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('compact') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).values(*COMPACT_FIELDS)
+        paginator = CompactActivityPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(page)
+
+class WorkspaceActivityView(ActivityFeedMixin, generics.ListAPIView):
     serializer_class = ActivityLogSerializer
     permission_classes = [IsAuthenticated, IsWorkspaceMember]
     pagination_class = ActivityPagination
 
     def get_queryset(self):
         workspace_id = self.kwargs.get('workspace_id')
-        queryset = ActivityLog.objects.filter(workspace_id=workspace_id)
+        queryset = ActivityLog.objects.filter(workspace_id=workspace_id).select_related('actor')
 
         # Filters
         action_type = self.request.query_params.get('action_type')
@@ -36,36 +68,60 @@ class WorkspaceActivityView(generics.ListAPIView):
         if target_type:
             queryset = queryset.filter(target_type=target_type)
 
-        days = self.request.query_params.get('days', 30)
+        # Always bounded by created_at so only the matching monthly partitions are scanned
         try:
-            days = int(days)
-            start_date = timezone.now() - timedelta(days=days)
-            queryset = queryset.filter(created_at__gte=start_date)
+            days = int(self.request.query_params.get('days', 30))
         except ValueError:
-            pass
+            days = 30
+        days = min(max(days, 1), settings.ACTIVITY_RETENTION_DAYS)
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
 
         return queryset.order_by('-created_at')
 
-class UserActivityView(generics.ListAPIView):
+class UserActivityView(ActivityFeedMixin, generics.ListAPIView):
     serializer_class = ActivityLogSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = ActivityPagination
 
     def get_queryset(self):
-        return ActivityLog.objects.filter(actor=self.request.user).order_by('-created_at')
+        return ActivityLog.objects.filter(actor=self.request.user).select_related('actor').order_by('-created_at')
 
-class NotebookActivityView(generics.ListAPIView):
+class NotebookActivityView(ActivityFeedMixin, generics.ListAPIView):
     serializer_class = ActivityLogSerializer
     permission_classes = [IsAuthenticated, CanAccessNotebook]
     pagination_class = ActivityPagination
 
+    def get_notebook(self):
+        notebook = get_object_or_404(
+            Notebook.objects.only('id', 'workspace_id'), id=self.kwargs.get('notebook_id')
+        )
+        # List views don't run object permissions on their own
+        self.check_object_permissions(self.request, notebook)
+        return notebook
+
     def get_queryset(self):
-        notebook_id = self.kwargs.get('notebook_id')
-        # Assuming notebook_id is passed in URL and handled by permission class for access check
-        # We filter by target_id and target_type='Notebook'
-        # Also ensure the notebook belongs to a workspace the user can access (handled by CanAccessNotebook usually)
-        
+        notebook = self.get_notebook()
+        # Served by the (target_type, target_id, -created_at) index; the
+        # workspace filter keeps ids from other workspaces out of the result
         return ActivityLog.objects.filter(
+            workspace_id=notebook.workspace_id,
             target_type='Notebook',
-            target_id=notebook_id
-        ).order_by('-created_at')
+            target_id=notebook.id
+        ).select_related('actor').order_by('-created_at')
+
+class ActivityDigestView(APIView):
+    """
+    Everything that happened in the user's workspaces over the last `hours`
+    (default 24), grouped by workspace, notebook and actor. The user's own
+    actions are left out unless include_own=1.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except ValueError:
+            hours = 24
+        hours = min(max(hours, 1), settings.ACTIVITY_DIGEST_MAX_HOURS)
+        include_own = request.query_params.get('include_own') in ('1', 'true')
+        return Response(get_digest(request.user, hours=hours, include_own=include_own))
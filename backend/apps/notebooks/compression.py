@@ -0,0 +1,183 @@
+"""
+Codecs used by CompressedTextField.
+
+Stored payload layout:
+
+    MAGIC (3 bytes) | codec id (1 byte) | dictionary id (4 bytes, 0 = none) | body
+
+Anything that does not start with MAGIC is a legacy row written before the
+column was compressed and is decoded as plain UTF-8.
+
+New rows are always compressed with the configured dictionary, but rows are
+decoded with whichever dictionary their header names, so dictionaries that were
+replaced stay readable as long as they are listed in
+COMPRESSED_TEXT_DICTIONARIES.
+"""
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+MAGIC = b'\x00CT'
+HEADER = struct.Struct('>3sBI')
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_IDS = {'raw': CODEC_RAW, 'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+
+# Below this size the header and codec overhead outweigh any savings
+MIN_COMPRESS_SIZE = 64
+# zlib only looks back 32KB, so a larger preset dictionary is wasted
+ZLIB_MAX_DICTIONARY_SIZE = 32 * 1024
+
+
+def dictionary_id(dictionary):
+    """Stable non-zero id stored in the header of dictionary-compressed rows."""
+    return zlib.crc32(dictionary) or 1
+
+
+class TextCodec:
+    def __init__(self, codec='zlib', level=6, dictionary=None, previous_dictionaries=()):
+        if codec not in CODEC_IDS:
+            raise ImproperlyConfigured(f"Unknown compressed text codec '{codec}'")
+        if codec == 'zstd' and zstandard is None:
+            raise ImproperlyConfigured("The 'zstd' codec requires the zstandard package")
+
+        self.codec = codec
+        self.codec_id = CODEC_IDS[codec]
+        self.level = level
+        self.dictionary = dictionary or None
+        self.dictionary_id = dictionary_id(dictionary) if dictionary else 0
+        # Every dictionary this codec can read, by the id stored in payload headers
+        self.dictionaries = {dictionary_id(d): d for d in previous_dictionaries if d}
+        if self.dictionary:
+            self.dictionaries[self.dictionary_id] = self.dictionary
+
+    def encode(self, text):
+        """Compress text into a self-describing payload"""
+        raw = text.encode('utf-8')
+        if self.codec_id == CODEC_RAW or len(raw) < MIN_COMPRESS_SIZE:
+            return HEADER.pack(MAGIC, CODEC_RAW, 0) + raw
+
+        if self.codec_id == CODEC_ZSTD:
+            body = self._zstd_compressor().compress(raw)
+        elif self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+            body = compressor.compress(raw) + compressor.flush()
+        else:
+            body = zlib.compress(raw, self.level)
+
+        # Incompressible input is stored raw rather than grown
+        if len(body) >= len(raw):
+            return HEADER.pack(MAGIC, CODEC_RAW, 0) + raw
+        return HEADER.pack(MAGIC, self.codec_id, self.dictionary_id) + body
+
+    def decode(self, payload):
+        """Decode a payload written by encode(), or a legacy plain-text value"""
+        if isinstance(payload, str):
+            return payload
+        payload = bytes(payload)
+        if not payload.startswith(MAGIC):
+            return payload.decode('utf-8')
+
+        _, codec_id, dict_id = HEADER.unpack_from(payload)
+        body = payload[HEADER.size:]
+        dictionary = None
+        if dict_id:
+            dictionary = self.dictionaries.get(dict_id)
+            if dictionary is None:
+                raise ValueError(
+                    f"Payload was compressed with dictionary {dict_id:#010x}, which is not "
+                    f"configured; add it to COMPRESSED_TEXT_DICTIONARIES"
+                )
+
+        if codec_id == CODEC_RAW:
+            raw = body
+        elif codec_id == CODEC_ZLIB:
+            if dict_id:
+                decompressor = zlib.decompressobj(zdict=dictionary)
+                raw = decompressor.decompress(body) + decompressor.flush()
+            else:
+                raw = zlib.decompress(body)
+        elif codec_id == CODEC_ZSTD:
+            if zstandard is None:
+                raise ImproperlyConfigured("Reading zstd payloads requires the zstandard package")
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dict_id else None
+            raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(body)
+        else:
+            raise ValueError(f"Unknown compressed text codec id {codec_id}")
+        return raw.decode('utf-8')
+
+    def _zstd_compressor(self):
+        dict_data = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+        return zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+
+
+def train_dictionary(samples, codec='zlib', size=ZLIB_MAX_DICTIONARY_SIZE):
+    """
+    Build a compression dictionary from sample documents.
+
+    zstd uses its own trainer. zlib has no trainer, so the dictionary is made of
+    the most frequent lines in the corpus, most common last since zlib finds
+    matches closest to the end of the dictionary more cheaply.
+    """
+    encoded = [s.encode('utf-8') for s in samples if s]
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured("The 'zstd' codec requires the zstandard package")
+        return zstandard.train_dictionary(size, encoded).as_bytes()
+
+    size = min(size, ZLIB_MAX_DICTIONARY_SIZE)
+    counts = Counter()
+    for sample in encoded:
+        counts.update(line for line in sample.splitlines(keepends=True) if len(line.strip()) > 2)
+
+    chunks, total = [], 0
+    for line, count in counts.most_common():
+        if count < 2 or total + len(line) > size:
+            continue
+        chunks.append(line)
+        total += len(line)
+    return b''.join(reversed(chunks))
+
+
+_codec = None
+
+
+def get_codec():
+    """Return the process-wide codec configured by the COMPRESSED_TEXT_* settings"""
+    global _codec
+    if _codec is None:
+        dictionary = None
+        path = getattr(settings, 'COMPRESSED_TEXT_DICTIONARY', '')
+        if path:
+            dictionary = Path(path).read_bytes()
+        previous = [
+            Path(p.strip()).read_bytes()
+            for p in getattr(settings, 'COMPRESSED_TEXT_DICTIONARIES', []) if p.strip()
+        ]
+        _codec = TextCodec(
+            codec=getattr(settings, 'COMPRESSED_TEXT_CODEC', 'zlib'),
+            level=getattr(settings, 'COMPRESSED_TEXT_LEVEL', 6),
+            dictionary=dictionary,
+            previous_dictionaries=previous,
+        )
+    return _codec
+
+
+@receiver(setting_changed)
+def reset_codec(setting, **kwargs):
+    global _codec
+    if setting.startswith('COMPRESSED_TEXT_'):
+        _codec = None
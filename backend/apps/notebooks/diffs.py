@@ -0,0 +1,129 @@
+"""
+Server-side diffs between two stored notebook versions.
+
+Every NotebookVersion row holds the full (compressed) text, so a diff needs
+exactly the two rows involved and no replay. Versions never change once
+written, which makes a computed diff valid forever: results are kept in the
+default cache under (notebook, from, to) for NOTEBOOK_DIFF_CACHE_TIMEOUT
+seconds, unless they are larger than NOTEBOOK_DIFF_CACHE_MAX_BYTES.
+"""
+import difflib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import NotebookVersion
+
+
+class VersionNotFound(Exception):
+    pass
+
+
+def diff_cache_key(notebook_id, from_version, to_version):
+    return f'notebook-diff:{notebook_id}:{from_version}:{to_version}'
+
+
+def load_versions(notebook_id, from_version, to_version):
+    """(from_content, to_content) for two version numbers of a notebook"""
+    contents = dict(
+        NotebookVersion.objects
+        .filter(notebook_id=notebook_id, version_number__in=[from_version, to_version])
+        .values_list('version_number', 'content')
+    )
+    missing = [v for v in (from_version, to_version) if v not in contents]
+    if missing:
+        raise VersionNotFound(f"Version {missing[0]} does not exist")
+    return contents[from_version], contents[to_version]
+
+
+def iter_unified_diff(from_content, to_content, from_version, to_version):
+    """Unified diff of two texts, one line at a time"""
+    lines = difflib.unified_diff(
+        from_content.splitlines(keepends=True),
+        to_content.splitlines(keepends=True),
+        fromfile=f'v{from_version}',
+        tofile=f'v{to_version}',
+    )
+    for line in lines:
+        yield line if line.endswith('\n') else line + '\n\\ No newline at end of file\n'
+
+
+def diff_stats(diff):
+    added = removed = 0
+    in_hunks = False
+    for line in diff.splitlines():
+        # Only the ---/+++ file headers come before the first hunk; inside hunks
+        # a content line may itself start with "--" or "++"
+        if line.startswith('@@'):
+            in_hunks = True
+        elif not in_hunks:
+            continue
+        elif line.startswith('+'):
+            added += 1
+        elif line.startswith('-'):
+            removed += 1
+    return {'added': added, 'removed': removed}
+
+
+def cached_diff(notebook_id, from_version, to_version):
+    return cache.get(diff_cache_key(notebook_id, from_version, to_version))
+
+
+def store_diff(notebook_id, from_version, to_version, diff):
+    if len(diff) <= settings.NOTEBOOK_DIFF_CACHE_MAX_BYTES:
+        cache.set(
+            diff_cache_key(notebook_id, from_version, to_version),
+            diff,
+            settings.NOTEBOOK_DIFF_CACHE_TIMEOUT
+        )
+
+
+def get_version_diff(notebook_id, from_version, to_version):
+    """The whole unified diff as a string, computed at most once per cache lifetime"""
+    diff = cached_diff(notebook_id, from_version, to_version)
+    if diff is None:
+        from_content, to_content = load_versions(notebook_id, from_version, to_version)
+        diff = ''.join(iter_unified_diff(from_content, to_content, from_version, to_version))
+        store_diff(notebook_id, from_version, to_version, diff)
+    return diff
+
+
+def stream_version_diff(notebook_id, from_version, to_version, chunk_size=64 * 1024):
+    """
+    Unified diff as an iterator of text chunks. Both versions are loaded before
+    the first chunk so a missing version still raises VersionNotFound up front;
+    the diff text is cached once fully sent if it is small enough.
+    """
+    diff = cached_diff(notebook_id, from_version, to_version)
+    if diff is not None:
+        return (diff[i:i + chunk_size] for i in range(0, len(diff), chunk_size))
+
+    from_content, to_content = load_versions(notebook_id, from_version, to_version)
+
+    def chunks():
+        # Keep what was sent so the diff can be cached, until it outgrows the cache
+        sent, size = [], 0
+        buffer, buffered = [], 0
+        lines = iter_unified_diff(from_content, to_content, from_version, to_version)
+        for line in lines:
+            buffer.append(line)
+            buffered += len(line)
+            if buffered < chunk_size:
+                continue
+            chunk = ''.join(buffer)
+            buffer, buffered = [], 0
+            if sent is not None:
+                size += len(chunk)
+                sent.append(chunk)
+                if size > settings.NOTEBOOK_DIFF_CACHE_MAX_BYTES:
+                    sent = None
+            yield chunk
+        if buffer:
+            chunk = ''.join(buffer)
+            if sent is not None:
+                sent.append(chunk)
+            yield chunk
+        if sent is not None:
+            store_diff(notebook_id, from_version, to_version, ''.join(sent))
+
+    return chunks()
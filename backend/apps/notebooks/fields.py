@@ -0,0 +1,61 @@
+from django.db import migrations, models
+from .compression import get_codec
+
+
+class CompressedTextField(models.TextField):
+    """
+    TextField stored compressed in a binary column.
+
+    Python code, forms and serializers see a plain str. The column holds the
+    payload produced by apps.notebooks.compression, so it can't be searched
+    with LIKE lookups; use it for history and conflict text, not Notebook.content.
+    """
+    description = "Compressed text"
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return get_codec().decode(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(get_codec().encode(value))
+
+
+class CompressTextColumn(migrations.AlterField):
+    """
+    AlterField from a TextField to a CompressedTextField.
+
+    PostgreSQL can't cast text to bytea safely (backslashes are parsed as
+    escapes), so the column is converted with convert_to(). Existing rows keep
+    their raw UTF-8 bytes and are read back as legacy payloads until
+    `manage.py compress_text_columns` rewrites them.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        self._convert(schema_editor, to_state.apps.get_model(app_label, self.model_name), 'bytea', 'convert_to')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        # Run `compress_text_columns --decompress` first, compressed rows are not valid UTF-8
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        self._convert(schema_editor, from_state.apps.get_model(app_label, self.model_name), 'text', 'convert_from')
+
+    def _convert(self, schema_editor, model, column_type, function):
+        qn = schema_editor.quote_name
+        column = qn(model._meta.get_field(self.name).column)
+        schema_editor.execute(
+            f"ALTER TABLE {qn(model._meta.db_table)} ALTER COLUMN {column} "
+            f"TYPE {column_type} USING {function}({column}, 'UTF8')"
+        )
+
+    def describe(self):
+        return f"Compress text column {self.name} on {self.model_name}"
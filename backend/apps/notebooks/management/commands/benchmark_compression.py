@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notebooks.compression import TextCodec, train_dictionary, zstandard
+from apps.notebooks.models import Notebook
+
+SYNTHETIC_HEADINGS = ['Overview', 'Notes', 'Action items', 'Decisions', 'Open questions', 'References']
+SYNTHETIC_WORDS = (
+    'the team agreed to review workspace notebook sync conflict version release '
+    'deploy meeting follow up owner deadline draft design api backend frontend'
+).split()
+
+
+def synthetic_corpus(count, seed=0):
+    """Markdown-ish documents for benchmarking an empty database"""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        lines = [f"# Notebook {i}", ""]
+        for heading in rng.sample(SYNTHETIC_HEADINGS, 4):
+            lines += [f"## {heading}", ""]
+            for _ in range(rng.randint(3, 12)):
+                words = ' '.join(rng.choice(SYNTHETIC_WORDS) for _ in range(rng.randint(6, 18)))
+                lines.append(f"- [ ] {words}" if heading == 'Action items' else f"- {words}")
+            lines.append("")
+        docs.append('\n'.join(lines))
+    return docs
+
+
+class Command(BaseCommand):
+    help = "Compare storage size and encode/decode latency of the compressed text codecs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=500)
+        parser.add_argument('--synthetic', action='store_true', help="Use generated markdown instead of the database")
+        parser.add_argument('--rounds', type=int, default=3)
+
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            docs = synthetic_corpus(options['samples'])
+        else:
+            docs = list(
+                Notebook.objects.exclude(content='')
+                .order_by('?')
+                .values_list('content', flat=True)[:options['samples']]
+            )
+        if len(docs) < 2:
+            self.stderr.write("Not enough notebooks to benchmark, use --synthetic")
+            return
+
+        # Train on one half, measure on the other so the dictionary doesn't see the test set
+        training, docs = docs[::2], docs[1::2]
+        raw_size = sum(len(d.encode('utf-8')) for d in docs)
+
+        codecs = [
+            ('raw', TextCodec('raw')),
+            ('zlib-1', TextCodec('zlib', level=1)),
+            ('zlib-6', TextCodec('zlib', level=6)),
+            ('zlib-9', TextCodec('zlib', level=9)),
+            ('zlib-6+dict', TextCodec('zlib', level=6, dictionary=train_dictionary(training))),
+        ]
+        if zstandard is not None:
+            codecs += [
+                ('zstd-3', TextCodec('zstd', level=3)),
+                ('zstd-3+dict', TextCodec('zstd', level=3, dictionary=train_dictionary(training, codec='zstd', size=64 * 1024))),
+            ]
+
+        self.stdout.write(f"{len(docs)} documents, {raw_size / 1024:.1f} KiB uncompressed")
+        self.stdout.write(f"{'codec':<14}{'size KiB':>10}{'ratio':>8}{'enc us/doc':>12}{'dec us/doc':>12}")
+        for name, codec in codecs:
+            encode_time = decode_time = float('inf')
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                payloads = [codec.encode(d) for d in docs]
+                encode_time = min(encode_time, time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for payload in payloads:
+                    codec.decode(payload)
+                decode_time = min(decode_time, time.perf_counter() - start)
+
+            size = sum(len(p) for p in payloads)
+            self.stdout.write(
+                f"{name:<14}{size / 1024:>10.1f}{raw_size / size:>8.2f}"
+                f"{encode_time / len(docs) * 1e6:>12.1f}{decode_time / len(docs) * 1e6:>12.1f}"
+            )
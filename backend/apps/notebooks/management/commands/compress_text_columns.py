@@ -0,0 +1,71 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models import Value
+
+from apps.notebooks.fields import CompressedTextField
+
+
+def compressed_fields():
+    """Yield (model, [field names]) for every model with CompressedTextField columns"""
+    for model in apps.get_models():
+        names = [f.name for f in model._meta.concrete_fields if isinstance(f, CompressedTextField)]
+        if names:
+            yield model, names
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite CompressedTextField columns with the configured codec. Run after "
+        "migrating, and again after changing COMPRESSED_TEXT_CODEC or the dictionary "
+        "(keep the old one in COMPRESSED_TEXT_DICTIONARIES until this has finished)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--model', help="Only process this model, e.g. sync.NotebookConflict")
+        parser.add_argument(
+            '--decompress', action='store_true',
+            help="Write plain UTF-8 instead, so the column migrations can be reversed",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, names in compressed_fields():
+            label = model._meta.label
+            if options['model'] and options['model'].lower() != label.lower():
+                continue
+
+            total = 0
+            last_pk = None
+            while True:
+                queryset = model.objects.order_by('pk').only('pk', *names)
+                if last_pk is not None:
+                    queryset = queryset.filter(pk__gt=last_pk)
+                batch = list(queryset[:batch_size])
+                if not batch:
+                    break
+
+                with transaction.atomic():
+                    if options['decompress']:
+                        self._write_plain(model, names, batch)
+                    else:
+                        model.objects.bulk_update(batch, names)
+
+                last_pk = batch[-1].pk
+                total += len(batch)
+
+            self.stdout.write(f"{label}: rewrote {total} rows ({', '.join(names)})")
+
+    def _write_plain(self, model, names, batch):
+        # PostgreSQL needs bytes in a bytea column; SQLite keeps the value as TEXT
+        # so the table copy made when reversing the migration yields str
+        if connection.vendor == 'postgresql':
+            def plain(text):
+                return Value(text.encode('utf-8'), output_field=models.BinaryField())
+        else:
+            def plain(text):
+                return Value(text, output_field=models.TextField())
+
+        for obj in batch:
+            model.objects.filter(pk=obj.pk).update(**{name: plain(getattr(obj, name)) for name in names})
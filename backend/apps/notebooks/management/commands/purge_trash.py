@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.notebooks.services import TrashService
+
+
+class Command(BaseCommand):
+    help = "Hard-delete notebooks that have been in the trash longer than TRASH_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows deleted per statement")
+        parser.add_argument('--notebooks-per-batch', type=int, default=50)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        expired = TrashService.expired(options['retention_days']).order_by('deleted_at')
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} notebooks would be purged")
+            return
+
+        totals = {}
+        while True:
+            notebook_ids = list(expired.values_list('id', flat=True)[:options['notebooks_per_batch']])
+            if not notebook_ids:
+                break
+            counts = TrashService.purge(notebook_ids, batch_size=options['batch_size'])
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+
+        summary = ', '.join(f"{count} {name}" for name, count in totals.items()) or 'nothing'
+        self.stdout.write(f"Purged {summary}")
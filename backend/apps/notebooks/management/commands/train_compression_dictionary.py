@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from apps.notebooks.compression import ZLIB_MAX_DICTIONARY_SIZE, dictionary_id, train_dictionary
+from apps.notebooks.models import Notebook
+
+
+class Command(BaseCommand):
+    help = "Train a compression dictionary from live notebook content for COMPRESSED_TEXT_DICTIONARY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path to write the dictionary to")
+        parser.add_argument('--codec', choices=['zlib', 'zstd'], default='zlib')
+        parser.add_argument('--size', type=int, default=ZLIB_MAX_DICTIONARY_SIZE)
+        parser.add_argument('--samples', type=int, default=2000, help="Number of notebooks to sample")
+
+    def handle(self, *args, **options):
+        samples = (
+            Notebook.objects.filter(is_deleted=False)
+            .order_by('-updated_at')
+            .values_list('content', flat=True)[:options['samples']]
+        )
+        dictionary = train_dictionary(list(samples), codec=options['codec'], size=options['size'])
+        Path(options['output']).write_bytes(dictionary)
+
+        self.stdout.write(
+            f"Wrote {len(dictionary)} byte {options['codec']} dictionary "
+            f"(id {dictionary_id(dictionary):#010x}) to {options['output']}"
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:12
+
+import apps.notebooks.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notebooks", "0001_initial"),
+    ]
+
+    operations = [
+        apps.notebooks.fields.CompressTextColumn(
+            model_name="editingsession",
+            name="base_content",
+            field=apps.notebooks.fields.CompressedTextField(),
+        ),
+        apps.notebooks.fields.CompressTextColumn(
+            model_name="notebookversion",
+            name="content",
+            field=apps.notebooks.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebooks', '0002_compressed_text_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='sync_mode',
+            field=models.CharField(choices=[('PATCH', 'Patch against base version'), ('REALTIME', 'Real-time operational transform')], default='PATCH', max_length=10),
+        ),
+    ]
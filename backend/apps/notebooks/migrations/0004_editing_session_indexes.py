@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebooks', '0003_notebook_sync_mode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='editingsession',
+            index=models.Index(fields=['notebook', 'user', 'is_active'], name='notebooks_e_noteboo_45a8dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='editingsession',
+            index=models.Index(fields=['is_active', 'last_activity'], name='notebooks_e_is_acti_e7ce62_idx'),
+        ),
+    ]
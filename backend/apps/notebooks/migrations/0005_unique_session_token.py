@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:29
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebooks', '0004_editing_session_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='editingsession',
+            name='session_token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
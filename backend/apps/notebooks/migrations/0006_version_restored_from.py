@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebooks', '0005_unique_session_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebookversion',
+            name='restored_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='restorations', to='notebooks.notebookversion'),
+        ),
+    ]
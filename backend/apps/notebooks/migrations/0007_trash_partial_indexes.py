@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebooks', '0006_version_restored_from'),
+        ('workspaces', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notebook',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['workspace', '-deleted_at'], name='notebooks_trash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notebook',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='notebooks_trash_purge_idx'),
+        ),
+    ]
@@ -1,15 +1,24 @@
 import hashlib
 import uuid
+from datetime import timedelta
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from apps.workspaces.models import Workspace
+from .fields import CompressedTextField
 
 class Notebook(models.Model):
+    SYNC_MODE_CHOICES = [
+        ('PATCH', 'Patch against base version'),
+        ('REALTIME', 'Real-time operational transform'),
+    ]
+
     workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name='notebooks')
     title = models.CharField(max_length=255)
     content = models.TextField(blank=True)
     version = models.IntegerField(default=1)
     content_hash = models.CharField(max_length=64, blank=True)
+    sync_mode = models.CharField(max_length=10, choices=SYNC_MODE_CHOICES, default='PATCH')
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_notebooks')
     last_modified_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='modified_notebooks')
     is_deleted = models.BooleanField(default=False)
@@ -21,13 +30,25 @@ class Notebook(models.Model):
         indexes = [
             models.Index(fields=['workspace', 'updated_at']),
             models.Index(fields=['workspace', 'is_deleted']),
+            # Only trashed rows, for the trash list and the retention purge
+            models.Index(
+                fields=['workspace', '-deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='notebooks_trash_idx',
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='notebooks_trash_purge_idx',
+            ),
         ]
 
+    @staticmethod
+    def compute_content_hash(content):
+        return hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+
     def save(self, *args, **kwargs):
-        if self.content:
-            self.content_hash = hashlib.sha256(self.content.encode('utf-8')).hexdigest()
-        else:
-            self.content_hash = hashlib.sha256(b"").hexdigest()
+        self.content_hash = self.compute_content_hash(self.content)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -36,9 +57,10 @@ class Notebook(models.Model):
 class NotebookVersion(models.Model):
     notebook = models.ForeignKey(Notebook, on_delete=models.CASCADE, related_name='versions')
     version_number = models.IntegerField()
-    content = models.TextField()
+    content = CompressedTextField()
     content_diff = models.TextField(blank=True)
     change_summary = models.CharField(max_length=255, blank=True)
+    restored_from = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='restorations')
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -51,13 +73,32 @@ class NotebookVersion(models.Model):
 
 class EditingSession(models.Model):
     notebook = models.ForeignKey(Notebook, on_delete=models.CASCADE, related_name='active_sessions')
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Guests editing through an EDIT share link have no user, only the link
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    share_link = models.ForeignKey(
+        'sharing.ShareLink', on_delete=models.CASCADE, null=True, blank=True, related_name='editing_sessions'
+    )
     base_version = models.IntegerField()
-    base_content = models.TextField()
-    session_token = models.UUIDField(default=uuid.uuid4, editable=False)
+    base_content = CompressedTextField()
+    session_token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     started_at = models.DateTimeField(auto_now_add=True)
     last_activity = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['notebook', 'user', 'is_active']),
+            models.Index(fields=['is_active', 'last_activity']),
+        ]
+
+    @staticmethod
+    def expiry_cutoff():
+        """Sessions with no activity since this moment are expired"""
+        return timezone.now() - timedelta(seconds=settings.EDITING_SESSION_TTL)
+
+    def is_expired(self):
+        return self.last_activity < self.expiry_cutoff()
+
     def __str__(self):
-        return f"Session {self.session_token} - {self.user.email}"
+        editor = self.user.email if self.user_id else f"share link {self.share_link_id}"
+        return f"Session {self.session_token} - {editor}"
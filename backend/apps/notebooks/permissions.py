@@ -5,7 +5,7 @@ class CanAccessNotebook(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Check if user is a member of the workspace
         return WorkspaceMember.objects.filter(
-            workspace=obj.workspace, 
+            workspace_id=obj.workspace_id,
             user=request.user
         ).exists()
 
@@ -13,7 +13,7 @@ class CanEditNotebook(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Check if user has edit rights (OWNER, ADMIN, EDITOR)
         return WorkspaceMember.objects.filter(
-            workspace=obj.workspace, 
+            workspace_id=obj.workspace_id,
             user=request.user, 
             role__in=['OWNER', 'ADMIN', 'EDITOR']
         ).exists()
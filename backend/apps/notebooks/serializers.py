@@ -31,8 +31,8 @@ class NotebookDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notebook
-        fields = ['id', 'workspace', 'title', 'content', 'version', 'content_hash', 'created_by', 'last_modified_by', 'created_at', 'updated_at', 'is_deleted', 'labels']
-        read_only_fields = ['workspace', 'version', 'content_hash', 'created_by', 'last_modified_by', 'created_at', 'updated_at']
+        fields = ['id', 'workspace', 'title', 'content', 'version', 'content_hash', 'sync_mode', 'created_by', 'last_modified_by', 'created_at', 'updated_at', 'is_deleted', 'labels']
+        read_only_fields = ['workspace', 'version', 'content_hash', 'sync_mode', 'created_by', 'last_modified_by', 'created_at', 'updated_at']
 
     def get_labels(self, obj):
         return [{"id": nl.label.id, "name": nl.label.name, "color": nl.label.color} for nl in obj.notebook_labels.all()]
@@ -79,10 +79,23 @@ class NotebookUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notebook
-        fields = ['title', 'content', 'change_summary']
+        fields = ['title', 'content', 'sync_mode', 'change_summary']
+
+    def validate(self, data):
+        # REALTIME notebooks are written by the in-memory document, see apps.sync.realtime
+        content = data.get('content')
+        if self.instance.sync_mode == 'REALTIME' and content is not None and content != self.instance.content:
+            raise serializers.ValidationError("This notebook is edited in real time; send operations to the realtime endpoints instead.")
+        return data
 
     def update(self, instance, validated_data):
         user = self.context['request'].user
+        if instance.sync_mode == 'REALTIME' and validated_data.get('sync_mode', 'REALTIME') != 'REALTIME':
+            # Write back and drop the in-memory document before patch clients take over
+            from apps.sync.realtime import registry
+            registry.close(instance.id)
+            instance.refresh_from_db()
+
         new_content = validated_data.get('content', instance.content)
         change_summary = validated_data.pop('change_summary', 'Updated notebook')
         
@@ -102,6 +115,22 @@ class NotebookUpdateSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
+class NotebookBulkActionSerializer(serializers.Serializer):
+    ACTIONS = ['move', 'trash', 'restore', 'add_label', 'remove_label']
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    notebook_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=500)
+    workspace_id = serializers.IntegerField(required=False)
+    label_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if data['action'] == 'move' and 'workspace_id' not in data:
+            raise serializers.ValidationError({'workspace_id': "Required to move notebooks."})
+        if data['action'] in ('add_label', 'remove_label') and 'label_id' not in data:
+            raise serializers.ValidationError({'label_id': "Required for label actions."})
+        data['notebook_ids'] = list(dict.fromkeys(data['notebook_ids']))
+        return data
+
 class NotebookVersionSerializer(serializers.ModelSerializer):
     created_by = serializers.StringRelatedField()
 
@@ -0,0 +1,208 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+
+from apps.activity.models import ActivityLog
+from apps.activity.services import ActivityService
+from apps.labels.models import Label, NotebookLabel
+from apps.workspaces.models import WorkspaceMember
+from .models import Notebook
+
+EDIT_ROLES = ['OWNER', 'ADMIN', 'EDITOR']
+
+
+class BulkNotebookService:
+    """
+    Apply one action to many notebooks with a fixed number of queries:
+    one to load the notebooks, one membership check covering every workspace
+    involved, the write itself and one batch of activity entries.
+    """
+
+    @staticmethod
+    def load_notebooks(user, notebook_ids, extra_workspace_ids=()):
+        # Notebooks in workspaces the user is not a member of are treated as missing,
+        # and the error does not say which ids exist
+        notebooks = list(
+            Notebook.objects.filter(
+                id__in=notebook_ids,
+                workspace_id__in=WorkspaceMember.objects.filter(user=user).values('workspace_id'),
+            )
+            .select_related('workspace')
+            .only('id', 'title', 'workspace_id', 'workspace__name', 'is_deleted')
+        )
+        if set(notebook_ids) - {n.id for n in notebooks}:
+            raise NotFound("One or more notebooks were not found.")
+
+        workspace_ids = {n.workspace_id for n in notebooks} | set(extra_workspace_ids)
+        editable = set(
+            WorkspaceMember.objects.filter(
+                user=user, workspace_id__in=workspace_ids, role__in=EDIT_ROLES
+            ).values_list('workspace_id', flat=True)
+        )
+        if editable != workspace_ids:
+            raise PermissionDenied("You do not have edit access to every workspace involved.")
+        return notebooks
+
+    @staticmethod
+    def _log(notebooks, user, action_type, metadata=None, workspace=None):
+        ActivityService.log_many([
+            ActivityService.build_activity(
+                workspace=workspace or notebook.workspace,
+                actor=user,
+                action_type=action_type,
+                target_type='Notebook',
+                target_id=notebook.id,
+                target_title=notebook.title,
+                metadata=metadata
+            )
+            for notebook in notebooks
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def trash(user, notebook_ids):
+        notebooks = [n for n in BulkNotebookService.load_notebooks(user, notebook_ids) if not n.is_deleted]
+        now = timezone.now()
+        Notebook.objects.filter(id__in=[n.id for n in notebooks]).update(
+            is_deleted=True, deleted_at=now, updated_at=now
+        )
+        BulkNotebookService._log(notebooks, user, ActivityLog.NOTEBOOK_DELETED)
+        return notebooks
+
+    @staticmethod
+    @transaction.atomic
+    def restore(user, notebook_ids):
+        notebooks = [n for n in BulkNotebookService.load_notebooks(user, notebook_ids) if n.is_deleted]
+        Notebook.objects.filter(id__in=[n.id for n in notebooks]).update(
+            is_deleted=False, deleted_at=None, updated_at=timezone.now()
+        )
+        BulkNotebookService._log(notebooks, user, ActivityLog.NOTEBOOK_RESTORED)
+        return notebooks
+
+    @staticmethod
+    @transaction.atomic
+    def move(user, notebook_ids, workspace):
+        notebooks = BulkNotebookService.load_notebooks(user, notebook_ids, extra_workspace_ids=[workspace.id])
+        moved = [n for n in notebooks if n.workspace_id != workspace.id]
+        if not moved:
+            return moved
+
+        sources = {n.id: n.workspace_id for n in moved}
+        for notebook in moved:
+            notebook.workspace = workspace
+            notebook.updated_at = timezone.now()
+        Notebook.objects.bulk_update(moved, ['workspace', 'updated_at'])
+
+        # Labels belong to a workspace, so they don't travel with the notebook
+        NotebookLabel.objects.filter(notebook_id__in=list(sources)).exclude(label__workspace=workspace).delete()
+
+        ActivityService.log_many([
+            ActivityService.build_activity(
+                workspace=workspace,
+                actor=user,
+                action_type=ActivityLog.NOTEBOOK_UPDATED,
+                target_type='Notebook',
+                target_id=notebook.id,
+                target_title=notebook.title,
+                metadata={'moved_from_workspace': sources[notebook.id], 'moved_to_workspace': workspace.id}
+            )
+            for notebook in moved
+        ])
+        return moved
+
+    @staticmethod
+    def _label_notebooks(user, notebook_ids, label):
+        notebooks = BulkNotebookService.load_notebooks(user, notebook_ids)
+        foreign = [n.id for n in notebooks if n.workspace_id != label.workspace_id]
+        if foreign:
+            raise ValidationError({'notebook_ids': f"Notebooks {foreign} are not in the label's workspace."})
+        return notebooks
+
+    @staticmethod
+    @transaction.atomic
+    def add_label(user, notebook_ids, label):
+        notebooks = BulkNotebookService._label_notebooks(user, notebook_ids, label)
+        labelled = set(
+            NotebookLabel.objects.filter(label=label, notebook_id__in=notebook_ids)
+            .values_list('notebook_id', flat=True)
+        )
+        notebooks = [n for n in notebooks if n.id not in labelled]
+        NotebookLabel.objects.bulk_create(
+            [NotebookLabel(notebook=n, label=label, added_by=user) for n in notebooks],
+            ignore_conflicts=True
+        )
+        BulkNotebookService._log(notebooks, user, ActivityLog.LABEL_ADDED, metadata={'label': label.name})
+        return notebooks
+
+    @staticmethod
+    @transaction.atomic
+    def remove_label(user, notebook_ids, label):
+        notebooks = BulkNotebookService._label_notebooks(user, notebook_ids, label)
+        labelled = set(
+            NotebookLabel.objects.filter(label=label, notebook_id__in=notebook_ids)
+            .values_list('notebook_id', flat=True)
+        )
+        NotebookLabel.objects.filter(label=label, notebook_id__in=labelled).delete()
+        notebooks = [n for n in notebooks if n.id in labelled]
+        BulkNotebookService._log(notebooks, user, ActivityLog.LABEL_REMOVED, metadata={'label': label.name})
+        return notebooks
+
+
+class TrashService:
+    """
+    Hard-deletes notebooks that have been in the trash longer than
+    TRASH_RETENTION_DAYS. Dependents are removed a chunk at a time, each in its
+    own short transaction, before the notebook rows themselves, so no single
+    statement has to cascade through a notebook's whole history.
+    """
+
+    @staticmethod
+    def expired(retention_days=None):
+        if retention_days is None:
+            retention_days = settings.TRASH_RETENTION_DAYS
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        return Notebook.objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+
+    @staticmethod
+    def _delete_in_chunks(queryset, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            # only('pk') keeps the collector from loading compressed text columns
+            deleted += queryset.model.objects.filter(pk__in=ids).only('pk').delete()[0]
+
+    @staticmethod
+    def purge(notebook_ids, batch_size=500):
+        """Delete the given notebooks and everything hanging off them; returns rows deleted per model"""
+        from apps.sharing.models import ShareLink, ShareLinkAccess, ShareLinkAccessRollup
+        from apps.sync.cache import hot_documents
+        from apps.sync.models import NotebookConflict
+        from .models import EditingSession, NotebookVersion
+
+        # Skip anything restored since the caller picked the ids
+        notebook_ids = list(
+            Notebook.objects.filter(id__in=notebook_ids, is_deleted=True).values_list('id', flat=True)
+        )
+        chunk = TrashService._delete_in_chunks
+        counts = {
+            'versions': chunk(NotebookVersion.objects.filter(notebook_id__in=notebook_ids), batch_size),
+            'sessions': chunk(EditingSession.objects.filter(notebook_id__in=notebook_ids), batch_size),
+            'conflicts': chunk(NotebookConflict.objects.filter(notebook_id__in=notebook_ids), batch_size),
+            'share_link_accesses': chunk(
+                ShareLinkAccess.objects.filter(share_link__notebook_id__in=notebook_ids), batch_size
+            ),
+            'share_link_access_rollups': chunk(
+                ShareLinkAccessRollup.objects.filter(share_link__notebook_id__in=notebook_ids), batch_size
+            ),
+            'share_links': chunk(ShareLink.objects.filter(notebook_id__in=notebook_ids), batch_size),
+            'labels': chunk(NotebookLabel.objects.filter(notebook_id__in=notebook_ids), batch_size),
+        }
+        counts['notebooks'] = Notebook.objects.filter(id__in=notebook_ids, is_deleted=True).only('pk').delete()[0]
+        for notebook_id in notebook_ids:
+            hot_documents.invalidate(notebook_id)
+        return counts
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.activity.models import ActivityLog
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.labels.models import Label, NotebookLabel
+from apps.notebooks.models import Notebook
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class BulkNotebookActionTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.user = User.objects.create_user(username='bulk', email='bulk@example.com', password='password')
+        self.first = Workspace.objects.create(name='First', owner=self.user)
+        self.second = Workspace.objects.create(name='Second', owner=self.user)
+        self.notebooks = [
+            Notebook.objects.create(title=f'Note {i}', workspace=ws, created_by=self.user)
+            for i, ws in enumerate([self.first, self.first, self.second])
+        ]
+        self.ids = [n.id for n in self.notebooks]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, **data):
+        return self.client.post('/api/notebooks/bulk/', data, format='json')
+
+    def test_trash_and_restore_across_workspaces(self):
+        # notebooks, membership check, update, activity batch (+ savepoint bookkeeping)
+        with self.assertNumQueries(6):
+            response = self.post(action='trash', notebook_ids=self.ids)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(Notebook.objects.filter(id__in=self.ids, is_deleted=True).count(), 3)
+        self.assertEqual(ActivityLog.objects.filter(action_type=ActivityLog.NOTEBOOK_DELETED).count(), 3)
+
+        # Already trashed notebooks are skipped rather than logged twice
+        self.assertEqual(self.post(action='trash', notebook_ids=self.ids).data['updated'], 0)
+        self.assertEqual(self.post(action='restore', notebook_ids=self.ids[:2]).data['updated'], 2)
+        self.assertEqual(Notebook.objects.filter(is_deleted=False).count(), 2)
+
+    def test_label_and_move(self):
+        label = Label.objects.create(workspace=self.first, name='urgent')
+        response = self.post(action='add_label', notebook_ids=self.ids[:2], label_id=label.id)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(NotebookLabel.objects.filter(label=label).count(), 2)
+
+        response = self.post(action='add_label', notebook_ids=self.ids, label_id=label.id)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post(action='move', notebook_ids=self.ids[:1], workspace_id=self.second.id)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(Notebook.objects.get(id=self.ids[0]).workspace, self.second)
+        self.assertFalse(NotebookLabel.objects.filter(notebook_id=self.ids[0]).exists())
+
+    def test_requires_edit_access_to_every_workspace(self):
+        viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='password')
+        WorkspaceMember.objects.create(workspace=self.first, user=viewer, role='EDITOR')
+        WorkspaceMember.objects.create(workspace=self.second, user=viewer, role='VIEWER')
+        self.client.force_authenticate(viewer)
+
+        self.assertEqual(self.post(action='trash', notebook_ids=self.ids).status_code, 403)
+        self.assertEqual(self.post(action='trash', notebook_ids=self.ids[:2]).status_code, 200)
+
+    def test_inaccessible_notebooks_look_missing(self):
+        outsider = User.objects.create_user(username='outsider', email='outsider@example.com', password='password')
+        self.client.force_authenticate(outsider)
+        existing = self.post(action='trash', notebook_ids=self.ids[:1])
+        missing = self.post(action='trash', notebook_ids=[max(self.ids) + 1000])
+        self.assertEqual(existing.status_code, 404)
+        self.assertEqual(existing.data, missing.data)
+
+
+class TrashPurgeTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        self.user = User.objects.create_user(username='purge', email='purge@example.com', password='password')
+        self.workspace = Workspace.objects.create(name='Purge WS', owner=self.user)
+
+    def test_purge_removes_expired_trash_and_history(self):
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from apps.notebooks.models import NotebookVersion
+
+        old, recent, live = [
+            Notebook.objects.create(title=t, workspace=self.workspace, created_by=self.user)
+            for t in ('old', 'recent', 'live')
+        ]
+        for notebook in (old, recent, live):
+            for number in range(1, 4):
+                NotebookVersion.objects.create(notebook=notebook, version_number=number, content=f'v{number}')
+        Notebook.objects.filter(id=old.id).update(is_deleted=True, deleted_at=timezone.now() - timedelta(days=45))
+        Notebook.objects.filter(id=recent.id).update(is_deleted=True, deleted_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('purge_trash', '--batch-size', '2', stdout=out)
+        self.assertIn('3 versions', out.getvalue())
+        self.assertEqual(set(Notebook.objects.values_list('title', flat=True)), {'recent', 'live'})
+        self.assertFalse(NotebookVersion.objects.filter(notebook_id=old.id).exists())
+        self.assertEqual(NotebookVersion.objects.count(), 6)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        trash = client.get('/api/notebooks/trash/').data['results']
+        self.assertEqual([n['title'] for n in trash], ['recent'])
@@ -0,0 +1,96 @@
+import io
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from apps.notebooks.compression import HEADER, MAGIC, TextCodec, dictionary_id, train_dictionary
+from apps.notebooks.models import Notebook, NotebookVersion
+from apps.workspaces.models import Workspace
+
+User = get_user_model()
+
+DOC = "# Weekly sync\n\n## Notes\n\n- reviewed the release plan\n- reviewed the release plan again\n" * 20
+
+
+class TextCodecTests(TestCase):
+    def test_zlib_round_trip(self):
+        codec = TextCodec('zlib')
+        payload = codec.encode(DOC)
+        self.assertTrue(payload.startswith(MAGIC))
+        self.assertLess(len(payload), len(DOC))
+        self.assertEqual(codec.decode(payload), DOC)
+
+    def test_dictionary_round_trip(self):
+        dictionary = train_dictionary([DOC, DOC.upper(), DOC])
+        codec = TextCodec('zlib', dictionary=dictionary)
+        self.assertEqual(codec.decode(codec.encode(DOC)), DOC)
+
+        with self.assertRaises(ValueError):
+            TextCodec('zlib').decode(codec.encode(DOC))
+
+    def test_previous_dictionaries_stay_readable(self):
+        old = train_dictionary([DOC, DOC])
+        new = train_dictionary([DOC.upper(), DOC.upper()])
+        payload = TextCodec('zlib', dictionary=old).encode(DOC)
+
+        rotated = TextCodec('zlib', dictionary=new, previous_dictionaries=[old])
+        self.assertEqual(rotated.decode(payload), DOC)
+        # Only the newest dictionary is used for writing
+        self.assertEqual(HEADER.unpack_from(rotated.encode(DOC))[2], dictionary_id(new))
+
+    def test_short_and_legacy_values(self):
+        codec = TextCodec('zlib')
+        self.assertEqual(codec.decode(codec.encode('')), '')
+        self.assertEqual(codec.decode(codec.encode('héllo')), 'héllo')
+        # Rows written before the column was compressed are plain UTF-8
+        self.assertEqual(codec.decode('plain text'.encode('utf-8')), 'plain text')
+        self.assertEqual(codec.decode(memoryview(b'plain')), 'plain')
+
+
+class CompressedTextFieldTests(TestCase):
+    def test_version_content_is_stored_compressed(self):
+        user = User.objects.create_user(username='cuser', email='c@example.com', password='password')
+        workspace = Workspace.objects.create(name='Compressed WS', owner=user)
+        notebook = Notebook.objects.create(title='NB', content=DOC, workspace=workspace, created_by=user)
+        version = NotebookVersion.objects.create(notebook=notebook, version_number=1, content=DOC, created_by=user)
+
+        self.assertEqual(NotebookVersion.objects.get(pk=version.pk).content, DOC)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT content FROM notebooks_notebookversion WHERE id = %s", [version.pk])
+            stored = bytes(cursor.fetchone()[0])
+        self.assertTrue(stored.startswith(MAGIC))
+        self.assertLess(len(stored), len(DOC))
+
+
+class DictionaryRotationTests(TestCase):
+    def stored_dictionary_id(self, version):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT content FROM notebooks_notebookversion WHERE id = %s", [version.pk])
+            return HEADER.unpack_from(bytes(cursor.fetchone()[0]))[2]
+
+    def test_rewrite_after_changing_dictionary(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        directory = Path(tmp.name)
+        old, new = directory / 'old.dict', directory / 'new.dict'
+        old.write_bytes(train_dictionary([DOC, DOC]))
+        new.write_bytes(train_dictionary([DOC.upper(), DOC.upper()]))
+
+        user = User.objects.create_user(username='ruser', email='r@example.com', password='password')
+        workspace = Workspace.objects.create(name='Rotation WS', owner=user)
+        notebook = Notebook.objects.create(title='NB', content=DOC, workspace=workspace, created_by=user)
+        with override_settings(COMPRESSED_TEXT_DICTIONARY=str(old)):
+            version = NotebookVersion.objects.create(notebook=notebook, version_number=1, content=DOC, created_by=user)
+        self.assertEqual(self.stored_dictionary_id(version), dictionary_id(old.read_bytes()))
+
+        with override_settings(COMPRESSED_TEXT_DICTIONARY=str(new), COMPRESSED_TEXT_DICTIONARIES=[str(old)]):
+            self.assertEqual(NotebookVersion.objects.get(pk=version.pk).content, DOC)
+            call_command('compress_text_columns', model='notebooks.NotebookVersion', stdout=io.StringIO())
+        self.assertEqual(self.stored_dictionary_id(version), dictionary_id(new.read_bytes()))
+
+        # The old dictionary is no longer needed once the rows have been rewritten
+        with override_settings(COMPRESSED_TEXT_DICTIONARY=str(new), COMPRESSED_TEXT_DICTIONARIES=[]):
+            self.assertEqual(NotebookVersion.objects.get(pk=version.pk).content, DOC)
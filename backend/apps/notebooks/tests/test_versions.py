@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.notebooks.diffs import diff_cache_key, diff_stats, iter_unified_diff
+from apps.notebooks.models import Notebook, NotebookVersion
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class DiffStatsTests(SimpleTestCase):
+    def test_content_lines_that_look_like_headers_are_counted(self):
+        diff = ''.join(iter_unified_diff('a\n--old\n', 'a\n++new\n', 1, 2))
+        self.assertEqual(diff_stats(diff), {'added': 1, 'removed': 1})
+
+
+class VersionDiffTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        cache.clear()
+
+        self.user = User.objects.create_user(username='diff', email='diff@example.com', password='password')
+        self.workspace = Workspace.objects.create(name='Diff WS', owner=self.user)
+        self.notebook = Notebook.objects.create(
+            title='Diffs', content='one\ntwo\nthree\n', version=2,
+            workspace=self.workspace, created_by=self.user
+        )
+        NotebookVersion.objects.create(notebook=self.notebook, version_number=1, content='one\ntwo\n')
+        NotebookVersion.objects.create(notebook=self.notebook, version_number=2, content='one\n2\nthree\n')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/notebooks/{self.notebook.id}/versions/diff/'
+
+    def test_diff_defaults_to_latest_pair_and_is_cached(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['from_version'], response.data['to_version']), (1, 2))
+        self.assertIn('-two\n', response.data['diff'])
+        self.assertIn('+three\n', response.data['diff'])
+        self.assertEqual((response.data['added'], response.data['removed']), (2, 1))
+
+        self.assertEqual(cache.get(diff_cache_key(self.notebook.id, 1, 2)), response.data['diff'])
+        with self.assertNumQueries(2):  # notebook + membership check, no version rows
+            self.client.get(self.url)
+
+    def test_streamed_diff_matches_json(self):
+        expected = self.client.get(self.url, {'from': 2, 'to': 1}).data['diff']
+        cache.clear()
+        response = self.client.get(self.url, {'from': 2, 'to': 1, 'stream': 1})
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content).decode(), expected)
+        self.assertEqual(cache.get(diff_cache_key(self.notebook.id, 2, 1)), expected)
+
+    def test_missing_version(self):
+        response = self.client.get(self.url, {'from': 1, 'to': 7})
+        self.assertEqual(response.status_code, 404)
+
+
+class VersionRestoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='restore', email='restore@example.com', password='password')
+        self.workspace = Workspace.objects.create(name='Restore WS', owner=self.user)
+        self.notebook = Notebook.objects.create(
+            title='Restorable', content='draft two', version=2,
+            workspace=self.workspace, created_by=self.user
+        )
+        NotebookVersion.objects.create(notebook=self.notebook, version_number=1, content='draft one')
+        NotebookVersion.objects.create(notebook=self.notebook, version_number=2, content='draft two')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_restore_creates_new_head_and_patches_open_sessions(self):
+        from apps.activity.models import ActivityLog
+        from apps.sync.services import EditingSessionService, PatchService, SyncService
+        session = EditingSessionService.start_editing_session(self.notebook, self.user)
+        ActivityLog.objects.all().delete()
+
+        response = self.client.post(f'/api/notebooks/{self.notebook.id}/versions/1/restore/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 3)
+
+        head = NotebookVersion.objects.get(notebook=self.notebook, version_number=3)
+        self.assertEqual(head.content, 'draft one')
+        self.assertEqual(head.restored_from.version_number, 1)
+        self.assertEqual(
+            list(ActivityLog.objects.values_list('action_type', flat=True)),
+            [ActivityLog.NOTEBOOK_VERSION_RESTORED]
+        )
+
+        pull = SyncService().apply_patch_to_notebook(self.notebook.id, self.user, session.session_token, '')
+        self.assertEqual(pull['status'], 'auto_merged')
+        patched, ok = PatchService().apply_patch('draft two', pull['patch'])
+        self.assertTrue(ok)
+        self.assertEqual(patched, 'draft one')
+
+    def test_restore_unknown_version(self):
+        response = self.client.post(f'/api/notebooks/{self.notebook.id}/versions/9/restore/')
+        self.assertEqual(response.status_code, 404)
@@ -1,13 +1,16 @@
 from django.urls import path
 from .views import (
-    NotebookListCreateView, NotebookDetailView, NotebookVersionHistoryView,
-    NotebookRestoreView, TrashListView
+    NotebookListCreateView, NotebookDetailView, NotebookBulkActionView, NotebookVersionHistoryView, NotebookVersionDiffView,
+    NotebookVersionRestoreView, NotebookRestoreView, TrashListView
 )
 
 urlpatterns = [
     path('', NotebookListCreateView.as_view(), name='notebook-list-create'),
+    path('bulk/', NotebookBulkActionView.as_view(), name='notebook-bulk'),
     path('trash/', TrashListView.as_view(), name='notebook-trash'),
     path('<int:pk>/', NotebookDetailView.as_view(), name='notebook-detail'),
     path('<int:pk>/versions/', NotebookVersionHistoryView.as_view(), name='notebook-versions'),
+    path('<int:pk>/versions/diff/', NotebookVersionDiffView.as_view(), name='notebook-version-diff'),
+    path('<int:pk>/versions/<int:version_number>/restore/', NotebookVersionRestoreView.as_view(), name='notebook-version-restore'),
     path('<int:pk>/restore/', NotebookRestoreView.as_view(), name='notebook-restore'),
 ]
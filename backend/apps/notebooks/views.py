@@ -1,14 +1,19 @@
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from .models import Notebook, NotebookVersion
 from .serializers import (
     NotebookListSerializer, NotebookDetailSerializer, NotebookCreateSerializer,
-    NotebookUpdateSerializer, NotebookVersionSerializer
+    NotebookUpdateSerializer, NotebookVersionSerializer, NotebookBulkActionSerializer
 )
 from .permissions import CanAccessNotebook, CanEditNotebook
-from apps.workspaces.models import WorkspaceMember
+from .diffs import VersionNotFound, diff_stats, get_version_diff, stream_version_diff
+from .services import BulkNotebookService
+from apps.workspaces.models import Workspace, WorkspaceMember
+from apps.labels.models import Label
+from apps.sync.services import SyncService
 
 class NotebookListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -48,6 +53,31 @@ class NotebookDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.deleted_at = timezone.now()
         instance.save()
 
+class NotebookBulkActionView(views.APIView):
+    """Move, trash, restore or (un)label many notebooks in one request"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = NotebookBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        action, notebook_ids = data['action'], data['notebook_ids']
+
+        if action == 'move':
+            workspace = get_object_or_404(Workspace, pk=data['workspace_id'])
+            notebooks = BulkNotebookService.move(request.user, notebook_ids, workspace)
+        elif action in ('add_label', 'remove_label'):
+            label = get_object_or_404(Label, pk=data['label_id'])
+            notebooks = getattr(BulkNotebookService, action)(request.user, notebook_ids, label)
+        else:
+            notebooks = getattr(BulkNotebookService, action)(request.user, notebook_ids)
+
+        return Response({
+            'action': action,
+            'updated': len(notebooks),
+            'notebook_ids': [n.id for n in notebooks],
+        })
+
 class NotebookVersionHistoryView(generics.ListAPIView):
     serializer_class = NotebookVersionSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessNotebook]
@@ -55,7 +85,64 @@ class NotebookVersionHistoryView(generics.ListAPIView):
     def get_queryset(self):
         notebook = get_object_or_404(Notebook, pk=self.kwargs['pk'])
         self.check_object_permissions(self.request, notebook)
-        return NotebookVersion.objects.filter(notebook=notebook)
+        return (
+            NotebookVersion.objects.filter(notebook=notebook)
+            .select_related('created_by')
+            .defer('content', 'content_diff')
+        )
+
+class NotebookVersionDiffView(views.APIView):
+    """
+    Unified diff between two versions: ?from=<n>&to=<n>, defaulting to the
+    latest version and the one before it. ?stream=1 streams the diff as
+    text/x-diff instead of returning JSON, for diffs too large to inline.
+    """
+    permission_classes = [permissions.IsAuthenticated, CanAccessNotebook]
+
+    def get(self, request, pk):
+        notebook = get_object_or_404(Notebook.objects.only('id', 'workspace_id', 'version'), pk=pk)
+        self.check_object_permissions(request, notebook)
+
+        try:
+            to_version = int(request.query_params.get('to', notebook.version))
+            from_version = int(request.query_params.get('from', to_version - 1))
+        except ValueError:
+            return Response({"detail": "from and to must be version numbers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if request.query_params.get('stream') in ('1', 'true'):
+                response = StreamingHttpResponse(
+                    stream_version_diff(notebook.id, from_version, to_version),
+                    content_type='text/x-diff; charset=utf-8'
+                )
+                response['Content-Disposition'] = (
+                    f'inline; filename="notebook-{notebook.id}-v{from_version}-v{to_version}.diff"'
+                )
+                return response
+            diff = get_version_diff(notebook.id, from_version, to_version)
+        except VersionNotFound as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'notebook_id': notebook.id,
+            'from_version': from_version,
+            'to_version': to_version,
+            'diff': diff,
+            **diff_stats(diff),
+        })
+
+class NotebookVersionRestoreView(views.APIView):
+    """Roll the notebook back to an earlier version, as a new version"""
+    permission_classes = [permissions.IsAuthenticated, CanEditNotebook]
+
+    def post(self, request, pk, version_number):
+        notebook = get_object_or_404(Notebook.objects.only('id', 'workspace_id'), pk=pk, is_deleted=False)
+        self.check_object_permissions(request, notebook)
+
+        result = SyncService().restore_version(notebook.id, version_number, request.user)
+        if result['status'] == 'error':
+            return Response({"detail": result['message']}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
 
 class NotebookRestoreView(views.APIView):
     permission_classes = [permissions.IsAuthenticated, CanEditNotebook]
@@ -77,7 +164,12 @@ class TrashListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notebook.objects.filter(
-            workspace__members__user=self.request.user,
-            is_deleted=True
-        ).distinct()
+        # A membership subquery instead of a join keeps DISTINCT off the trash index
+        workspace_ids = WorkspaceMember.objects.filter(user=self.request.user).values('workspace_id')
+        return (
+            Notebook.objects.filter(workspace_id__in=workspace_ids, is_deleted=True)
+            .select_related('workspace', 'created_by', 'last_modified_by')
+            .prefetch_related('notebook_labels__label')
+            .defer('content')
+            .order_by('-deleted_at')
+        )
@@ -0,0 +1,107 @@
+"""
+Password checks for protected share links.
+
+Hashing the link password (PBKDF2) is deliberately slow, so it happens once:
+a correct password is exchanged for a signed access token, valid for
+SHARE_ACCESS_TOKEN_TTL seconds, that later requests send in the
+X-Share-Access-Token header instead. The token is bound to the link and to its
+current password hash, so changing the password revokes it.
+
+Failed password attempts are counted in the cache per link and per client IP
+(see get_client_ip for which proxies are trusted); past the limits further
+attempts are refused without hashing.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.throttling import SimpleRateThrottle
+
+from .utils import get_client_ip
+
+ACCESS_TOKEN_SALT = 'apps.sharing.access'
+ACCESS_TOKEN_HEADER = 'X-Share-Access-Token'
+
+
+def _password_fingerprint(share_link):
+    return hashlib.sha256(share_link.password_hash.encode('utf-8')).hexdigest()[:16]
+
+
+def issue_access_token(share_link):
+    return signing.dumps(
+        {'link': str(share_link.token), 'pw': _password_fingerprint(share_link)},
+        salt=ACCESS_TOKEN_SALT
+    )
+
+
+def access_token_is_valid(share_link, access_token):
+    try:
+        data = signing.loads(access_token, salt=ACCESS_TOKEN_SALT, max_age=settings.SHARE_ACCESS_TOKEN_TTL)
+    except signing.BadSignature:
+        return False
+    return data.get('link') == str(share_link.token) and data.get('pw') == _password_fingerprint(share_link)
+
+
+class PasswordAttemptThrottle:
+    def __init__(self, share_link, request):
+        window = settings.SHARE_PASSWORD_FAILURE_WINDOW
+        self.window = window
+        self.limits = [
+            (f'share-password-failures:link:{share_link.token}', settings.SHARE_PASSWORD_MAX_FAILURES_PER_LINK),
+            (f'share-password-failures:ip:{get_client_ip(request)}', settings.SHARE_PASSWORD_MAX_FAILURES_PER_IP),
+        ]
+
+    def check(self):
+        counts = cache.get_many([key for key, _ in self.limits])
+        if any(counts.get(key, 0) >= limit for key, limit in self.limits):
+            raise exceptions.Throttled(
+                wait=self.window, detail="Too many incorrect passwords. Try again later."
+            )
+
+    def record_failure(self):
+        for key, _ in self.limits:
+            # add() starts the window; incr() keeps its original expiry
+            if not cache.add(key, 1, self.window):
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, 1, self.window)
+
+
+class GuestSessionThrottle(SimpleRateThrottle):
+    """Limits how often one client opens guest editing sessions on one link"""
+    scope = 'share_edit_session'
+
+    def get_rate(self):
+        return settings.SHARE_EDIT_SESSION_RATE
+
+    def get_cache_key(self, request, view):
+        ident = f"{view.kwargs.get('token')}:{self.get_ident(request)}"
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+def verify_share_access(share_link, request):
+    """
+    Check the password of a protected link, accepting a still-valid access token
+    in its place. Returns a new access token when a password was checked.
+    """
+    if not share_link.password_hash:
+        return None
+
+    # Header only: a token in the query string would end up in access and proxy logs
+    access_token = request.headers.get(ACCESS_TOKEN_HEADER)
+    if access_token and access_token_is_valid(share_link, access_token):
+        return None
+
+    password = request.data.get('password')
+    if not password:
+        raise exceptions.NotAuthenticated("Password required.")
+
+    throttle = PasswordAttemptThrottle(share_link, request)
+    throttle.check()
+    if not share_link.check_password(password):
+        throttle.record_failure()
+        raise exceptions.AuthenticationFailed("Incorrect password.")
+    return issue_access_token(share_link)
@@ -0,0 +1,105 @@
+"""
+Buffered ShareLinkAccess writes.
+
+Every view of a share link records an access row. Inserting it inline makes
+busy public links queue up on the table, so rows are collected in process
+memory and written with bulk_create on a background thread, once
+SHARE_ACCESS_LOG_BATCH_SIZE rows are waiting or SHARE_ACCESS_LOG_FLUSH_INTERVAL
+seconds after the first one arrived, and at exit. A crash can lose at most
+one unflushed batch. Set SHARE_ACCESS_LOG_BUFFERED=False to write inline.
+
+A batch that fails to write (say, during a brief database outage) goes back
+into the buffer and is retried with the next flush; rows that fail a second
+time are dropped, and so are the oldest rows once more than
+SHARE_ACCESS_LOG_MAX_PENDING are waiting.
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import ShareLinkAccess
+
+logger = logging.getLogger(__name__)
+
+
+class AccessLogBuffer:
+    def __init__(self):
+        self._rows = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='share-access-log')
+
+    def add(self, access):
+        if not getattr(settings, 'SHARE_ACCESS_LOG_BUFFERED', True):
+            access.save()
+            return
+
+        with self._lock:
+            self._rows.append(access)
+            pending = len(self._rows)
+            self._start_timer()
+        if pending >= settings.SHARE_ACCESS_LOG_BATCH_SIZE:
+            self._schedule_flush()
+
+    def _start_timer(self):
+        # Called with self._lock held
+        if self._timer is None:
+            self._timer = threading.Timer(settings.SHARE_ACCESS_LOG_FLUSH_INTERVAL, self._schedule_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _schedule_flush(self):
+        self._executor.submit(self._flush_in_worker)
+
+    def _flush_in_worker(self):
+        close_old_connections()
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not rows:
+            return 0
+        try:
+            ShareLinkAccess.objects.bulk_create(rows, batch_size=500)
+        except Exception:
+            retry = [row for row in rows if not getattr(row, '_log_retried', False)]
+            for row in retry:
+                row._log_retried = True
+            dropped = len(rows) - len(retry) + self._requeue(retry)
+            logger.exception(
+                "Writing %d share link access rows failed; %d queued for retry, %d dropped",
+                len(rows), len(rows) - dropped, dropped
+            )
+            return 0
+        return len(rows)
+
+    def _requeue(self, rows):
+        """Put rows back ahead of newer ones; returns how many were dropped to stay in bounds"""
+        limit = getattr(settings, 'SHARE_ACCESS_LOG_MAX_PENDING', 10000)
+        with self._lock:
+            self._rows = rows + self._rows
+            dropped = max(len(self._rows) - limit, 0)
+            del self._rows[:dropped]
+            if self._rows:
+                self._start_timer()
+        return dropped
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+
+
+access_log = AccessLogBuffer()
+atexit.register(access_log.flush)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ShareLink, ShareLinkAccess
+from .models import ShareLink, ShareLinkAccess, ShareLinkAccessRollup
 
 @admin.register(ShareLink)
 class ShareLinkAdmin(admin.ModelAdmin):
@@ -13,3 +13,9 @@ class ShareLinkAccessAdmin(admin.ModelAdmin):
     list_display = ('share_link', 'accessed_by_email', 'ip_address', 'accessed_at')
     list_filter = ('accessed_at',)
     readonly_fields = ('share_link', 'accessed_by_email', 'ip_address', 'user_agent', 'accessed_at')
+
+@admin.register(ShareLinkAccessRollup)
+class ShareLinkAccessRollupAdmin(admin.ModelAdmin):
+    list_display = ('share_link', 'period', 'period_start', 'access_count', 'unique_ips')
+    list_filter = ('period',)
+    readonly_fields = ('share_link', 'period', 'period_start', 'access_count', 'unique_ips', 'top_user_agents')
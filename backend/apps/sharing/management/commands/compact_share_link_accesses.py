@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.sharing.rollups import compact, purge_raw_accesses
+
+
+class Command(BaseCommand):
+    help = "Roll share link accesses up into hourly/daily stats and delete raw rows past SHARE_ACCESS_RAW_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000, help="Raw rows deleted per statement")
+        parser.add_argument('--no-purge', action='store_true', help="Only build rollups")
+
+    def handle(self, *args, **options):
+        hours, rollups = compact()
+        self.stdout.write(f"Compacted {hours} hours into {rollups} hourly rollups")
+        if options['no_purge']:
+            return
+        deleted = purge_raw_accesses(options['retention_days'], batch_size=options['batch_size'])
+        self.stdout.write(f"Deleted {deleted} raw access rows")
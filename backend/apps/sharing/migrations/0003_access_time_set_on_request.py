@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sharing', '0002_alter_sharelink_access_level'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sharelinkaccess',
+            name='accessed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sharing', '0003_access_time_set_on_request'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShareLinkAccessRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('HOUR', 'Hour'), ('DAY', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('access_count', models.PositiveIntegerField(default=0)),
+                ('unique_ips', models.PositiveIntegerField(default=0)),
+                ('top_user_agents', models.JSONField(default=list)),
+            ],
+            options={
+                'db_table': 'share_link_access_rollups',
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sharelinkaccess',
+            index=models.Index(fields=['share_link', '-accessed_at'], name='share_link__share_l_333326_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sharelinkaccess',
+            index=models.Index(fields=['accessed_at'], name='share_link__accesse_771f40_idx'),
+        ),
+        migrations.AddField(
+            model_name='sharelinkaccessrollup',
+            name='share_link',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_rollups', to='sharing.sharelink'),
+        ),
+        migrations.AddIndex(
+            model_name='sharelinkaccessrollup',
+            index=models.Index(fields=['period', 'period_start'], name='share_link__period_e1d1f1_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='sharelinkaccessrollup',
+            unique_together={('share_link', 'period', 'period_start')},
+        ),
+    ]
@@ -43,15 +43,33 @@ class ShareLink(models.Model):
             return False
         return True
 
+    def is_publicly_cacheable(self):
+        """Every viewer gets the same response, so proxies may cache it"""
+        return self.access_level == 'READ' and not self.password_hash and self.max_uses is None
+
     def check_password(self, password):
         if not self.password_hash:
             return True
         return check_password(password, self.password_hash)
 
     def increment_use_count(self):
-        self.use_count += 1
-        self.last_accessed_at = timezone.now()
-        self.save(update_fields=['use_count', 'last_accessed_at'])
+        """
+        Count one use in a single UPDATE that also re-checks that the link is
+        active, unexpired and under max_uses, so concurrent views can neither
+        lose increments nor overshoot the limit. Returns False if the link can
+        no longer be used.
+        """
+        now = timezone.now()
+        claimed = ShareLink.objects.filter(
+            models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now),
+            models.Q(max_uses__isnull=True) | models.Q(use_count__lt=models.F('max_uses')),
+            pk=self.pk,
+            is_active=True,
+        ).update(use_count=models.F('use_count') + 1, last_accessed_at=now)
+        if claimed:
+            self.use_count += 1
+            self.last_accessed_at = now
+        return bool(claimed)
 
 
 class ShareLinkAccess(models.Model):
@@ -59,11 +77,44 @@ class ShareLinkAccess(models.Model):
     accessed_by_email = models.EmailField(blank=True)
     ip_address = models.GenericIPAddressField(null=True)
     user_agent = models.TextField(blank=True)
-    accessed_at = models.DateTimeField(auto_now_add=True)
+    # Set when the request is served; rows are inserted later in batches
+    accessed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'share_link_accesses'
         ordering = ['-accessed_at']
+        indexes = [
+            models.Index(fields=['share_link', '-accessed_at']),
+            # Compaction and retention scan by time across all links
+            models.Index(fields=['accessed_at']),
+        ]
 
     def __str__(self):
         return f"Access to {self.share_link.notebook.title} at {self.accessed_at}"
+
+
+class ShareLinkAccessRollup(models.Model):
+    """Access counts for one link over one hour or day, built from ShareLinkAccess rows"""
+    PERIOD_CHOICES = [
+        ('HOUR', 'Hour'),
+        ('DAY', 'Day'),
+    ]
+
+    share_link = models.ForeignKey(ShareLink, on_delete=models.CASCADE, related_name='access_rollups')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    access_count = models.PositiveIntegerField(default=0)
+    unique_ips = models.PositiveIntegerField(default=0)
+    # [{"user_agent": ..., "count": ...}], most frequent first
+    top_user_agents = models.JSONField(default=list)
+
+    class Meta:
+        db_table = 'share_link_access_rollups'
+        ordering = ['-period_start']
+        unique_together = ['share_link', 'period', 'period_start']
+        indexes = [
+            models.Index(fields=['period', 'period_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.share_link_id} {self.period} {self.period_start}: {self.access_count}"
@@ -0,0 +1,164 @@
+"""
+Hourly and daily rollups of ShareLinkAccess rows.
+
+Raw access rows grow without bound on popular links, so `manage.py
+compact_share_link_accesses` (run it from cron) folds them into one
+ShareLinkAccessRollup per link per hour and per day, then deletes raw rows
+older than SHARE_ACCESS_RAW_RETENTION_DAYS. Link statistics read the rollups;
+the raw table only serves the "recent accesses" list.
+
+Compaction resumes after the newest hourly rollup and stops
+SHARE_ACCESS_COMPACTION_DELAY seconds before now, so buffered access rows have
+been written before their hour is closed. Rollups for a window are replaced,
+not incremented, which makes re-running a window harmless. Daily rollups are
+recomputed from the raw rows of the whole day, so raw rows are only deleted
+once their day has been fully compacted.
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import ShareLinkAccess, ShareLinkAccessRollup
+
+TOP_USER_AGENTS = 5
+USER_AGENT_MAX_LENGTH = 255
+
+
+def floor_hour(value):
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value):
+    return datetime.combine(value.astimezone(dt_timezone.utc).date(), time.min, tzinfo=dt_timezone.utc)
+
+
+def compacted_until():
+    """End of the last compacted hour, or None before the first run"""
+    latest = ShareLinkAccessRollup.objects.filter(period='HOUR').aggregate(latest=Max('period_start'))['latest']
+    return latest + timedelta(hours=1) if latest else None
+
+
+def _summarize(accesses, bucket=None):
+    """
+    Rollup fields keyed by (share_link_id, bucket start) for the given raw rows,
+    grouped by hour when `bucket` is a Trunc expression, else as a single bucket.
+    """
+    group = ['share_link_id', 'bucket'] if bucket is not None else ['share_link_id']
+    if bucket is not None:
+        accesses = accesses.annotate(bucket=bucket)
+
+    summaries = {}
+    totals = accesses.values(*group).annotate(
+        total=Count('id'), ips=Count('ip_address', distinct=True)
+    ).order_by()
+    for row in totals:
+        summaries[(row['share_link_id'], row.get('bucket'))] = {
+            'access_count': row['total'],
+            'unique_ips': row['ips'],
+            'top_user_agents': [],
+        }
+
+    agents = defaultdict(list)
+    for row in accesses.values(*group, 'user_agent').annotate(total=Count('id')).order_by():
+        agents[(row['share_link_id'], row.get('bucket'))].append((row['total'], row['user_agent']))
+    for key, counts in agents.items():
+        summaries[key]['top_user_agents'] = [
+            {'user_agent': agent[:USER_AGENT_MAX_LENGTH], 'count': total}
+            for total, agent in heapq.nlargest(TOP_USER_AGENTS, counts)
+        ]
+    return summaries
+
+
+def _replace(period, start, end, rollups):
+    with transaction.atomic():
+        ShareLinkAccessRollup.objects.filter(
+            period=period, period_start__gte=start, period_start__lt=end
+        ).delete()
+        ShareLinkAccessRollup.objects.bulk_create(rollups, batch_size=500)
+
+
+def compact_window(start, end):
+    """Rebuild the hourly rollups in [start, end) and the daily rollups of the days it touches"""
+    hourly = _summarize(
+        ShareLinkAccess.objects.filter(accessed_at__gte=start, accessed_at__lt=end),
+        bucket=TruncHour('accessed_at', tzinfo=dt_timezone.utc),
+    )
+    _replace('HOUR', start, end, [
+        ShareLinkAccessRollup(share_link_id=link_id, period='HOUR', period_start=hour, **fields)
+        for (link_id, hour), fields in hourly.items()
+    ])
+
+    day = floor_day(start)
+    while day < end:
+        daily = _summarize(ShareLinkAccess.objects.filter(
+            accessed_at__gte=day, accessed_at__lt=min(day + timedelta(days=1), end)
+        ))
+        _replace('DAY', day, day + timedelta(seconds=1), [
+            ShareLinkAccessRollup(share_link_id=link_id, period='DAY', period_start=day, **fields)
+            for (link_id, _), fields in daily.items()
+        ])
+        day += timedelta(days=1)
+    return len(hourly)
+
+
+def compact(now=None):
+    """Roll up every closed hour since the last run, a day at a time; returns (hours, rollups)"""
+    now = now or timezone.now()
+    until = floor_hour(now - timedelta(seconds=settings.SHARE_ACCESS_COMPACTION_DELAY))
+    start = compacted_until()
+    if start is None:
+        first = ShareLinkAccess.objects.aggregate(first=Min('accessed_at'))['first']
+        if first is None:
+            return 0, 0
+        start = floor_hour(first)
+
+    hours = rollups = 0
+    while start < until:
+        end = min(floor_day(start) + timedelta(days=1), until)
+        rollups += compact_window(start, end)
+        hours += int((end - start).total_seconds() // 3600)
+        start = end
+    return hours, rollups
+
+
+def purge_raw_accesses(retention_days=None, batch_size=1000, now=None):
+    """Delete raw rows past retention whose day has been fully rolled up; returns rows deleted"""
+    if retention_days is None:
+        retention_days = settings.SHARE_ACCESS_RAW_RETENTION_DAYS
+    now = now or timezone.now()
+    compacted = compacted_until()
+    if compacted is None:
+        return 0
+    before = min(now - timedelta(days=retention_days), floor_day(compacted))
+
+    expired = ShareLinkAccess.objects.filter(accessed_at__lt=before).order_by()
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ShareLinkAccess.objects.filter(pk__in=ids).delete()[0]
+
+
+def link_statistics(share_link, hours=48, days=30, now=None):
+    """Hourly and daily series for one link, read from its rollups"""
+    now = now or timezone.now()
+    rollups = share_link.access_rollups.filter(
+        period_start__gte=floor_day(now - timedelta(days=days))
+    ).order_by('period_start').values('period', 'period_start', 'access_count', 'unique_ips', 'top_user_agents')
+
+    hour_cutoff = floor_hour(now - timedelta(hours=hours))
+    series = {'hourly': [], 'daily': []}
+    for rollup in rollups:
+        period = rollup.pop('period')
+        if period == 'DAY':
+            series['daily'].append(rollup)
+        elif rollup['period_start'] >= hour_cutoff:
+            series['hourly'].append(rollup)
+    return series
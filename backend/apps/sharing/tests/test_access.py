@@ -0,0 +1,204 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models.signals import post_save
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.labels.models import Label, NotebookLabel
+from apps.notebooks.models import Notebook
+from apps.sharing.access_log import AccessLogBuffer, access_log
+from apps.sharing.models import ShareLink, ShareLinkAccess
+from apps.sharing.utils import get_client_ip
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+@override_settings(SHARE_ACCESS_LOG_BUFFERED=False)
+class ProtectedShareLinkTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        cache.clear()
+
+        self.user = User.objects.create_user(username='sharer', email='sharer@example.com', password='password')
+        workspace = Workspace.objects.create(name='Share WS', owner=self.user)
+        self.notebook = Notebook.objects.create(
+            title='Shared', content='secret', workspace=workspace, created_by=self.user
+        )
+        self.link = ShareLink.objects.create(
+            notebook=self.notebook, created_by=self.user, access_level='EDIT',
+            password_hash=make_password('hunter2')
+        )
+        self.client = APIClient()
+        self.url = f'/api/share/access/{self.link.token}/'
+
+    def test_password_is_exchanged_for_an_access_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        response = self.client.post(self.url, {'password': 'hunter2'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        access_token = response.data['access_token']
+
+        with mock.patch.object(ShareLink, 'check_password') as check_password:
+            response = self.client.get(self.url, HTTP_X_SHARE_ACCESS_TOKEN=access_token)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('access_token', response.data)
+            response = self.client.patch(
+                f'/api/share/edit/{self.link.token}/', {'title': 'Renamed'},
+                format='json', HTTP_X_SHARE_ACCESS_TOKEN=access_token
+            )
+            self.assertEqual(response.status_code, 200)
+            check_password.assert_not_called()
+
+        # Changing the password revokes tokens issued for the old one
+        ShareLink.objects.filter(pk=self.link.pk).update(password_hash=make_password('changed'))
+        self.assertEqual(self.client.get(self.url, HTTP_X_SHARE_ACCESS_TOKEN=access_token).status_code, 401)
+
+    @override_settings(SHARE_PASSWORD_MAX_FAILURES_PER_IP=3)
+    def test_failed_attempts_are_throttled_per_ip(self):
+        for _ in range(3):
+            response = self.client.post(self.url, {'password': 'wrong'}, format='json')
+            self.assertEqual(response.status_code, 401)
+
+        with mock.patch.object(ShareLink, 'check_password') as check_password:
+            response = self.client.post(self.url, {'password': 'hunter2'}, format='json')
+            check_password.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(SHARE_PASSWORD_MAX_FAILURES_PER_IP=3, SHARE_PASSWORD_MAX_FAILURES_PER_LINK=100)
+    def test_forwarded_for_header_does_not_reset_the_ip_limit(self):
+        for n in range(4):
+            response = self.client.post(
+                self.url, {'password': 'wrong'}, format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{n}'
+            )
+        self.assertEqual(response.status_code, 429)
+
+    def test_access_token_is_not_read_from_the_query_string(self):
+        access_token = self.client.post(self.url, {'password': 'hunter2'}, format='json').data['access_token']
+        self.assertEqual(self.client.get(self.url, {'access_token': access_token}).status_code, 401)
+
+
+class ClientIpTests(SimpleTestCase):
+    def request(self, forwarded_for):
+        return RequestFactory().get('/', HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR='10.0.0.1')
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(get_client_ip(self.request('1.2.3.4')), '10.0.0.1')
+
+    @override_settings(REST_FRAMEWORK={'NUM_PROXIES': 1})
+    def test_address_added_by_the_trusted_proxy_is_used(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 1.2.3.4')), '1.2.3.4')
+
+
+class ShareLinkUsageTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.user = User.objects.create_user(username='usage', email='usage@example.com', password='password')
+        workspace = Workspace.objects.create(name='Usage WS', owner=self.user)
+        notebook = Notebook.objects.create(title='Public', workspace=workspace, created_by=self.user)
+        self.link = ShareLink.objects.create(
+            notebook=notebook, created_by=self.user, access_level='READ', max_uses=2
+        )
+        self.url = f'/api/share/access/{self.link.token}/'
+
+    @override_settings(SHARE_ACCESS_LOG_BUFFERED=True, SHARE_ACCESS_LOG_BATCH_SIZE=1000,
+                       SHARE_ACCESS_LOG_FLUSH_INTERVAL=3600)
+    def test_max_uses_enforced_and_accesses_written_in_batches(self):
+        self.addCleanup(access_log.flush)
+        client = APIClient()
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.assertEqual(client.get(self.url).status_code, 200)
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+        self.link.refresh_from_db()
+        self.assertEqual(self.link.use_count, 2)
+
+        # Rejected views are not logged, and nothing is written until a flush
+        self.assertEqual(ShareLinkAccess.objects.count(), 0)
+        self.assertEqual(access_log.flush(), 2)
+        self.assertEqual(ShareLinkAccess.objects.filter(share_link=self.link).count(), 2)
+
+    @override_settings(SHARE_ACCESS_LOG_BUFFERED=True, SHARE_ACCESS_LOG_BATCH_SIZE=1000,
+                       SHARE_ACCESS_LOG_FLUSH_INTERVAL=3600)
+    def test_failed_flush_is_retried_once(self):
+        buffer = AccessLogBuffer()
+        self.addCleanup(buffer.flush)
+        for _ in range(2):
+            buffer.add(ShareLinkAccess(share_link=self.link, accessed_at=timezone.now()))
+
+        failing = mock.patch.object(ShareLinkAccess.objects, 'bulk_create', side_effect=DatabaseError)
+        with failing, self.assertLogs('apps.sharing.access_log', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending(), 2)
+        self.assertEqual(buffer.flush(), 2)
+
+        # A batch that fails again is dropped rather than retried forever
+        buffer.add(ShareLinkAccess(share_link=self.link, accessed_at=timezone.now()))
+        with failing, self.assertLogs('apps.sharing.access_log', 'ERROR'):
+            buffer.flush()
+            buffer.flush()
+        self.assertEqual(buffer.pending(), 0)
+        self.assertEqual(ShareLinkAccess.objects.filter(share_link=self.link).count(), 2)
+
+
+@override_settings(SHARE_ACCESS_LOG_BUFFERED=False)
+class PublicShareLinkCachingTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        cache.clear()
+
+        self.user = User.objects.create_user(username='public', email='public@example.com', password='password')
+        workspace = Workspace.objects.create(name='Public WS', owner=self.user)
+        self.notebook = Notebook.objects.create(
+            title='Readme', content='hello', workspace=workspace, created_by=self.user
+        )
+        self.link = ShareLink.objects.create(notebook=self.notebook, created_by=self.user, access_level='READ')
+        self.url = f'/api/share/access/{self.link.token}/'
+        self.client = APIClient()
+
+    def test_repeat_views_use_etag_and_cached_payload(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'public, max-age=60')
+        etag = first['ETag']
+
+        # Link lookup, labels, use count and access row only; no content or serializer queries
+        with self.assertNumQueries(4):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.notebook.content = 'changed'
+        self.notebook.version += 1
+        self.notebook.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['notebook']['content'], 'changed')
+        self.assertNotEqual(changed['ETag'], etag)
+
+        # Labels are rendered too, so adding one must not be answered from the cache
+        label = Label.objects.create(workspace=self.notebook.workspace, name='Urgent')
+        NotebookLabel.objects.create(notebook=self.notebook, label=label)
+        labelled = self.client.get(self.url, HTTP_IF_NONE_MATCH=changed['ETag'])
+        self.assertEqual(labelled.status_code, 200)
+        self.assertNotEqual(labelled['ETag'], changed['ETag'])
+
+    def test_limited_links_are_not_cacheable(self):
+        ShareLink.objects.filter(pk=self.link.pk).update(max_uses=10)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
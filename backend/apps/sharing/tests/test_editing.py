@@ -0,0 +1,133 @@
+import diff_match_patch as dmp_module
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.activity.models import ActivityLog
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.notebooks.models import EditingSession, Notebook, NotebookVersion
+from apps.sharing.models import ShareLink
+from apps.sync.services import SyncService, EditingSessionService
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+def make_patch(old, new):
+    dmp = dmp_module.diff_match_patch()
+    return dmp.patch_toText(dmp.patch_make(old, new))
+
+
+class SharedEditingTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        cache.clear()
+
+        self.owner = User.objects.create_user(username='host', email='host@example.com', password='password')
+        workspace = Workspace.objects.create(name='Guest WS', owner=self.owner)
+        self.notebook = Notebook.objects.create(
+            title='Shared', content='Line 1\nLine 2\n', workspace=workspace, created_by=self.owner
+        )
+        self.link = ShareLink.objects.create(notebook=self.notebook, created_by=self.owner, access_level='EDIT')
+        self.client = APIClient()
+        self.base_url = f'/api/share/edit/{self.link.token}/'
+
+    def start_session(self):
+        response = self.client.post(self.base_url + 'session/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_guest_edits_are_applied_as_patches(self):
+        first = self.start_session()
+        second = self.start_session()
+        # Guests share no user, so a new session must not end the other guest's
+        self.assertEqual(EditingSession.objects.filter(share_link=self.link, is_active=True).count(), 2)
+
+        response = self.client.post(self.base_url + 'apply-patch/', {
+            'session_token': first['session_token'],
+            'patch': make_patch(first['base_content'], 'Line 1 (guest)\nLine 2\n'),
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'success')
+
+        version = NotebookVersion.objects.get(notebook=self.notebook, version_number=response.data['version'])
+        self.assertIsNone(version.created_by)
+        self.assertEqual(version.change_summary, 'Edited through a share link')
+
+        # A session token only works through the link it was opened on
+        other = ShareLink.objects.create(notebook=self.notebook, created_by=self.owner, access_level='EDIT')
+        response = self.client.post(f'/api/share/edit/{other.token}/apply-patch/', {
+            'session_token': second['session_token'], 'patch': '',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_guest_conflicts_do_not_overwrite_member_edits(self):
+        guest = self.start_session()
+
+        member_session = EditingSessionService.start_editing_session(self.notebook, self.owner)
+        SyncService().apply_patch_to_notebook(
+            self.notebook.id, self.owner, member_session.session_token,
+            make_patch(self.notebook.content, 'Line 1 (owner)\nLine 2\n')
+        )
+
+        response = self.client.post(self.base_url + 'apply-patch/', {
+            'session_token': guest['session_token'],
+            'patch': make_patch(guest['base_content'], 'Line 1 (guest)\nLine 2\n'),
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['content'], 'Line 1 (owner)\nLine 2\n')
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Line 1 (owner)\nLine 2\n')
+
+    def test_full_content_patch_is_rejected(self):
+        response = self.client.patch(self.base_url, {'content': 'overwritten'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(self.base_url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_read_links_cannot_open_sessions(self):
+        ShareLink.objects.filter(pk=self.link.pk).update(access_level='READ')
+        self.assertEqual(self.client.post(self.base_url + 'session/').status_code, 403)
+
+    @override_settings(SHARE_EDIT_MAX_SESSIONS_PER_LINK=3)
+    def test_guest_sessions_per_link_are_capped(self):
+        first = self.start_session()
+        for _ in range(3):
+            self.start_session()
+        sessions = EditingSession.objects.filter(share_link=self.link)
+        self.assertEqual(sessions.count(), 3)
+        # The least recently active session made room for the newest
+        self.assertFalse(sessions.filter(session_token=first['session_token']).exists())
+
+    @override_settings(SHARE_EDIT_SESSION_RATE='2/hour')
+    def test_opening_sessions_is_throttled(self):
+        self.start_session()
+        self.start_session()
+        self.assertEqual(self.client.post(self.base_url + 'session/').status_code, 429)
+
+    def test_guest_edits_are_logged_as_the_guest(self):
+        # With activity signals on, as in production
+        post_save.connect(log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.disconnect, log_notebook_activity, sender=Notebook)
+        Notebook.objects.filter(pk=self.notebook.pk).update(last_modified_by=self.owner)
+        ActivityLog.objects.all().delete()
+
+        session = self.start_session()
+        self.client.post(self.base_url + 'apply-patch/', {
+            'session_token': session['session_token'],
+            'patch': make_patch(session['base_content'], 'Line 1 (guest)\nLine 2\n'),
+        }, format='json')
+        self.client.patch(self.base_url, {'title': 'Renamed'}, format='json')
+
+        entries = list(ActivityLog.objects.order_by('id'))
+        self.assertEqual(len(entries), 2)
+        for entry in entries:
+            self.assertIsNone(entry.actor)
+            self.assertTrue(entry.action_display.startswith('Guest via share link updated notebook'))
+            self.assertEqual(entry.metadata['share_link_id'], self.link.id)
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.last_modified_by, self.owner)
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.notebooks.models import Notebook
+from apps.sharing.models import ShareLink, ShareLinkAccess, ShareLinkAccessRollup
+from apps.sharing.rollups import compact, purge_raw_accesses
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+@override_settings(SHARE_ACCESS_COMPACTION_DELAY=300)
+class ShareLinkRollupTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.user = User.objects.create_user(username='stats', email='stats@example.com', password='password')
+        workspace = Workspace.objects.create(name='Stats WS', owner=self.user)
+        notebook = Notebook.objects.create(title='Popular', workspace=workspace, created_by=self.user)
+        self.link = ShareLink.objects.create(notebook=notebook, created_by=self.user)
+        self.day = datetime(2024, 3, 1, tzinfo=dt_timezone.utc)
+
+    def record(self, at, ip, user_agent='Firefox'):
+        ShareLinkAccess.objects.create(share_link=self.link, ip_address=ip, user_agent=user_agent, accessed_at=at)
+
+    def test_closed_hours_are_rolled_up_once(self):
+        self.record(self.day + timedelta(minutes=5), '10.0.0.1')
+        self.record(self.day + timedelta(minutes=10), '10.0.0.1', 'Safari')
+        self.record(self.day + timedelta(minutes=50), '10.0.0.2')
+        self.record(self.day + timedelta(hours=2, minutes=1), '10.0.0.3')
+
+        # The 02:00 hour is still inside the compaction delay
+        compact(now=self.day + timedelta(hours=3, minutes=2))
+        hourly = ShareLinkAccessRollup.objects.filter(period='HOUR').order_by('period_start')
+        self.assertEqual(
+            [(r.period_start.hour, r.access_count, r.unique_ips) for r in hourly],
+            [(0, 3, 2)],
+        )
+        self.assertEqual(hourly[0].top_user_agents[0], {'user_agent': 'Firefox', 'count': 2})
+        daily = ShareLinkAccessRollup.objects.get(period='DAY')
+        self.assertEqual((daily.period_start, daily.access_count, daily.unique_ips), (self.day, 3, 2))
+
+        # A later run resumes after the last hour instead of counting it again
+        self.record(self.day + timedelta(hours=3, minutes=30), '10.0.0.1')
+        compact(now=self.day + timedelta(hours=5))
+        self.assertEqual(ShareLinkAccessRollup.objects.filter(period='HOUR').count(), 3)
+        self.assertEqual(ShareLinkAccessRollup.objects.get(period='DAY').access_count, 5)
+
+    def test_raw_rows_are_kept_until_their_day_is_compacted(self):
+        self.record(self.day - timedelta(days=40), '10.0.0.1')
+        self.record(self.day + timedelta(minutes=5), '10.0.0.2')
+        now = self.day + timedelta(days=40)
+        self.assertEqual(purge_raw_accesses(30, now=now), 0)
+
+        compact(now=now)
+        self.assertEqual(purge_raw_accesses(30, now=now), 1)
+        self.assertEqual(ShareLinkAccessRollup.objects.filter(period='DAY').count(), 2)
+        self.assertEqual(ShareLinkAccess.objects.get().accessed_at, self.day + timedelta(minutes=5))
+
+    def test_stats_view_reads_rollups(self):
+        now = datetime.now(dt_timezone.utc)
+        self.record(now - timedelta(hours=3), '10.0.0.1')
+        compact()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f'/api/share/{self.link.pk}/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([h['access_count'] for h in response.data['hourly']], [1])
+        self.assertEqual(sum(d['access_count'] for d in response.data['daily']), 1)
+        self.assertEqual(len(response.data['recent_accesses']), 1)
@@ -1,7 +1,8 @@
 from django.urls import path
 from .views import (
     ShareLinkListView, CreateShareLinkView, ShareLinkDetailView,
-    AccessSharedNotebookView, ShareLinkStatsView, EditSharedNotebookView
+    AccessSharedNotebookView, ShareLinkStatsView, EditSharedNotebookView,
+    SharedEditingSessionView, SharedApplyPatchView, SharedSessionHeartbeatView
 )
 
 urlpatterns = [
@@ -11,4 +12,7 @@ urlpatterns = [
     path('<int:pk>/stats/', ShareLinkStatsView.as_view(), name='share-link-stats'),
     path('access/<uuid:token>/', AccessSharedNotebookView.as_view(), name='access-shared-notebook'),
     path('edit/<uuid:token>/', EditSharedNotebookView.as_view(), name='edit-shared-notebook'),
+    path('edit/<uuid:token>/session/', SharedEditingSessionView.as_view(), name='shared-editing-session'),
+    path('edit/<uuid:token>/apply-patch/', SharedApplyPatchView.as_view(), name='shared-apply-patch'),
+    path('edit/<uuid:token>/heartbeat/', SharedSessionHeartbeatView.as_view(), name='shared-session-heartbeat'),
 ]
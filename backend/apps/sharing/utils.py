@@ -1,20 +1,31 @@
+from django.utils import timezone
+from rest_framework.settings import api_settings
 from .models import ShareLinkAccess
 
 def get_client_ip(request):
+    """
+    The client address as seen by the last of REST_FRAMEWORK['NUM_PROXIES']
+    trusted proxies. X-Forwarded-For entries left of those were supplied by the
+    client and are ignored, so they cannot be used to dodge per-IP limits.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    num_proxies = api_settings.NUM_PROXIES or 0
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    if not num_proxies or not x_forwarded_for:
+        return remote_addr
+    addrs = [addr.strip() for addr in x_forwarded_for.split(',')]
+    return addrs[-min(num_proxies, len(addrs))]
 
 def get_user_agent(request):
     return request.META.get('HTTP_USER_AGENT', '')
 
 def log_share_link_access(share_link, request, email=''):
-    ShareLinkAccess.objects.create(
+    # Written in batches off the request path, see apps.sharing.access_log
+    from .access_log import access_log
+    access_log.add(ShareLinkAccess(
         share_link=share_link,
         accessed_by_email=email,
         ip_address=get_client_ip(request),
-        user_agent=get_user_agent(request)
-    )
+        user_agent=get_user_agent(request),
+        accessed_at=timezone.now()
+    ))
@@ -1,5 +1,11 @@
+import hashlib
+
 from rest_framework import generics, permissions, status, exceptions
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from .models import ShareLink, ShareLinkAccess
@@ -8,9 +14,15 @@ from .serializers import (
     UpdateShareLinkSerializer, AccessSharedNotebookSerializer
 )
 from .utils import log_share_link_access
+from .access import GuestSessionThrottle, verify_share_access
+from .rollups import link_statistics
+from apps.activity.services import ActivityService
+from apps.labels.models import NotebookLabel
 from apps.notebooks.models import Notebook
 from apps.notebooks.serializers import NotebookDetailSerializer
 from apps.notebooks.permissions import CanEditNotebook
+from apps.sync.serializers import StartEditingSerializer, ApplyPatchSerializer, SessionHeartbeatSerializer
+from apps.sync.services import EditingSessionService, SyncService
 
 class ShareLinkListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -59,45 +71,93 @@ class ShareLinkDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.save()
 
 class AccessSharedNotebookView(generics.RetrieveAPIView):
+    """
+    Public READ links without a password or use limit render the same payload
+    for everyone until the notebook changes, so GETs for them carry an ETag and
+    a public Cache-Control and the payload is kept in the default cache keyed
+    by (token, notebook version, notebook updated_at). Repeat views can be
+    served by a proxy; those reaching Django are answered from the cache, or
+    with a 304 when the client already holds the current payload.
+    """
     permission_classes = [permissions.AllowAny]
     serializer_class = NotebookDetailSerializer
     lookup_field = 'token'
 
-    def get_object(self):
-        token = self.kwargs.get('token')
-        share_link = get_object_or_404(ShareLink, token=token)
+    def get_share_link(self):
+        return get_object_or_404(
+            ShareLink.objects.select_related('notebook').defer('notebook__content'),
+            token=self.kwargs.get('token')
+        )
+
+    def get_object(self, share_link=None):
+        if share_link is None:
+            share_link = self.get_share_link()
         
         if not share_link.is_valid():
             raise exceptions.PermissionDenied("This share link is invalid or expired.")
             
-        if share_link.password_hash:
-            password = self.request.data.get('password')
-            # For GET requests with password param if body not possible (though GET with body is discouraged)
-            # Or maybe we should use POST for password access? 
-            # The requirement says GET /api/share/access/<token>/ with body.
-            if not password:
-                raise exceptions.NotAuthenticated("Password required.")
-            if not share_link.check_password(password):
-                raise exceptions.AuthenticationFailed("Incorrect password.")
+        # A password (POST body) is checked once and exchanged for an access token
+        self.access_token = verify_share_access(share_link, self.request)
         
-        # Log access
+        # Count the use first: the UPDATE enforces max_uses under concurrency
+        if not share_link.increment_use_count():
+            raise exceptions.PermissionDenied("This share link is invalid or expired.")
+
         log_share_link_access(share_link, self.request)
         
-        # Increment use count
-        share_link.increment_use_count()
-        
-        # Serialize notebook
-        # serializer = self.get_serializer(share_link.notebook)
-        
         return share_link
 
-    def retrieve(self, request, *args, **kwargs):
-        share_link = self.get_object()
-        serializer = self.get_serializer(share_link.notebook)
-        return Response({
-            "notebook": serializer.data,
+    def render_payload(self, share_link):
+        notebook = share_link.notebook
+        prefetch_related_objects([notebook], 'notebook_labels__label', 'created_by', 'last_modified_by')
+        return {
+            "notebook": self.get_serializer(notebook).data,
             "access_level": share_link.access_level
-        })
+        }
+
+    def retrieve(self, request, *args, **kwargs):
+        share_link = self.get_share_link()
+        if request.method == 'GET' and share_link.is_publicly_cacheable():
+            return self.public_response(share_link)
+
+        share_link = self.get_object(share_link)
+        data = self.render_payload(share_link)
+        if self.access_token:
+            data["access_token"] = self.access_token
+        return Response(data)
+
+    def public_response(self, share_link):
+        self.get_object(share_link)
+        notebook = share_link.notebook
+        # Labels are part of the payload but changing them doesn't touch the notebook row
+        labels = NotebookLabel.objects.filter(notebook_id=notebook.id).order_by('label_id').values_list(
+            'label_id', 'label__name', 'label__color'
+        )
+        labels_key = hashlib.sha1(repr(list(labels)).encode('utf-8')).hexdigest()[:12]
+        version_key = f"{notebook.version}-{int(notebook.updated_at.timestamp() * 1000)}-{labels_key}"
+        etag = f'"{share_link.token.hex}-{version_key}"'
+
+        if etag in [t.strip() for t in self.request.headers.get('If-None-Match', '').split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f"share-render:{share_link.token.hex}:{version_key}"
+            data = cache.get(cache_key)
+            if data is None:
+                # The deferred content is only loaded here, on a cache miss
+                data = self.render_payload(share_link)
+                cache.set(cache_key, data, settings.SHARE_PUBLIC_CACHE_TIMEOUT)
+            response = Response(data)
+
+        max_age = settings.SHARE_PUBLIC_MAX_AGE
+        if share_link.expires_at:
+            max_age = min(max_age, max(0, int((share_link.expires_at - timezone.now()).total_seconds())))
+        response['ETag'] = etag
+        response['Cache-Control'] = f"public, max-age={max_age}"
+        return response
+
+    def post(self, request, *args, **kwargs):
+        # Same as GET, for clients sending a password (GET bodies are dropped by browsers)
+        return self.retrieve(request, *args, **kwargs)
 
 class ShareLinkStatsView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -109,7 +169,10 @@ class ShareLinkStatsView(generics.RetrieveAPIView):
         if instance.created_by != request.user:
             raise exceptions.PermissionDenied("You do not have permission to view stats for this link.")
             
-        recent_accesses = instance.accesses.all()[:10]
+        # Served by the (share_link, -accessed_at) index; older history comes from rollups
+        recent_accesses = instance.accesses.only(
+            'accessed_at', 'ip_address', 'user_agent', 'accessed_by_email'
+        )[:10]
         access_data = [
             {
                 "accessed_at": access.accessed_at,
@@ -119,34 +182,119 @@ class ShareLinkStatsView(generics.RetrieveAPIView):
             }
             for access in recent_accesses
         ]
-        
+
         return Response({
             "use_count": instance.use_count,
             "last_accessed_at": instance.last_accessed_at,
-            "recent_accesses": access_data
+            "recent_accesses": access_data,
+            **link_statistics(instance),
         })
 
+def get_editable_share_link(request, token):
+    """A valid EDIT link for `token` that the request has unlocked, or raise"""
+    share_link = get_object_or_404(ShareLink, token=token)
+
+    if not share_link.is_valid():
+        raise exceptions.PermissionDenied("This share link is invalid or expired.")
+
+    if share_link.access_level != 'EDIT':
+        raise exceptions.PermissionDenied("This link does not have edit permissions.")
+
+    verify_share_access(share_link, request)
+    return share_link
+
+
 class EditSharedNotebookView(generics.UpdateAPIView):
+    """
+    Metadata changes (title) from guests. Content goes through an editing
+    session and patches, like member edits, so concurrent changes are merged
+    instead of overwritten.
+    """
     permission_classes = [permissions.AllowAny]
     serializer_class = NotebookDetailSerializer
     lookup_field = 'token'
 
     def get_object(self):
-        token = self.kwargs.get('token')
-        share_link = get_object_or_404(ShareLink, token=token)
-        
-        if not share_link.is_valid():
-            raise exceptions.PermissionDenied("This share link is invalid or expired.")
-            
-        if share_link.access_level != 'EDIT':
-            raise exceptions.PermissionDenied("This link does not have edit permissions.")
-
-        if share_link.password_hash:
-            # For PATCH, password should be in the body
-            password = self.request.data.get('password')
-            if not password:
-                raise exceptions.NotAuthenticated("Password required.")
-            if not share_link.check_password(password):
-                raise exceptions.AuthenticationFailed("Incorrect password.")
-        
-        return share_link.notebook
+        self.share_link = get_editable_share_link(self.request, self.kwargs.get('token'))
+        return self.share_link.notebook
+
+    def perform_update(self, serializer):
+        # Logged as the guest's edit rather than the notebook's last member editor
+        serializer.instance._skip_activity_log = True
+        notebook = serializer.save()
+        ActivityService.log_guest_edit(notebook, self.share_link.id)
+
+    def update(self, request, *args, **kwargs):
+        if 'content' in request.data:
+            return Response(
+                {"content": ["Send content changes as patches through a shared editing session."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().update(request, *args, **kwargs)
+
+
+class SharedEditingSessionView(APIView):
+    """Opens an editing session for a guest on an EDIT link"""
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [GuestSessionThrottle]
+
+    def post(self, request, token):
+        share_link = get_editable_share_link(request, token)
+        notebook = share_link.notebook
+        session = EditingSessionService.start_editing_session(notebook, None, share_link=share_link)
+
+        serializer = StartEditingSerializer({
+            'notebook_id': notebook.id,
+            'session_token': session.session_token,
+            'base_version': session.base_version,
+            'base_content': session.base_content,
+            'current_version': notebook.version
+        })
+        return Response(serializer.data)
+
+
+class SharedApplyPatchView(APIView):
+    """The sync patch endpoint for guest sessions"""
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, token):
+        share_link = get_editable_share_link(request, token)
+        serializer = ApplyPatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = SyncService().apply_patch_to_notebook(
+            share_link.notebook_id,
+            None,
+            serializer.validated_data['session_token'],
+            serializer.validated_data['patch'],
+            share_link=share_link
+        )
+        if result['status'] == 'error':
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        elif result['status'] == 'conflict':
+            return Response(result, status=status.HTTP_409_CONFLICT)
+        return Response(result)
+
+
+class SharedSessionHeartbeatView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, token):
+        share_link = get_editable_share_link(request, token)
+        serializer = SessionHeartbeatSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        notebook = share_link.notebook
+        session_token = serializer.validated_data['session_token']
+        if serializer.validated_data['end']:
+            EditingSessionService.end_session(notebook, None, session_token, share_link=share_link)
+            return Response({'status': 'ended'})
+
+        if not EditingSessionService.heartbeat(notebook, None, session_token, share_link=share_link):
+            return Response(
+                {'status': 'expired', 'message': 'Invalid or expired editing session'},
+                status=status.HTTP_410_GONE
+            )
+        return Response({'status': 'active'})
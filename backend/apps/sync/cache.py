@@ -0,0 +1,79 @@
+"""
+Per-process cache of the content of notebooks that are being edited.
+
+Patch requests lock the notebook row but only read its version and
+content_hash; the (possibly multi-MB) content comes from here when both still
+match the row, and from the database otherwise. Every write made by the sync
+services is written through, so the cache only misses after another process
+or a non-sync code path (notebook PATCH, share-link edit) changed the notebook.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class HotDocument:
+    __slots__ = ('version', 'content_hash', 'content')
+
+    def __init__(self, version, content_hash, content):
+        self.version = version
+        self.content_hash = content_hash
+        self.content = content
+
+
+class HotDocumentCache:
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._documents = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, notebook_id, version, content_hash):
+        """Cached content if it is still the given version, else None"""
+        with self._lock:
+            document = self._documents.get(notebook_id)
+            if document is None:
+                return None
+            if document.version != version or document.content_hash != content_hash:
+                self._remove(notebook_id)
+                return None
+            self._documents.move_to_end(notebook_id)
+            return document.content
+
+    def put(self, notebook_id, version, content_hash, content):
+        size = len(content)
+        if size > self.max_bytes:
+            self.invalidate(notebook_id)
+            return
+        with self._lock:
+            self._remove(notebook_id)
+            self._documents[notebook_id] = HotDocument(version, content_hash, content)
+            self._size += size
+            while len(self._documents) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._documents))
+                self._remove(oldest)
+
+    def put_notebook(self, notebook):
+        self.put(notebook.id, notebook.version, notebook.content_hash, notebook.content)
+
+    def invalidate(self, notebook_id):
+        with self._lock:
+            self._remove(notebook_id)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._size = 0
+
+    def _remove(self, notebook_id):
+        document = self._documents.pop(notebook_id, None)
+        if document is not None:
+            self._size -= len(document.content)
+
+
+hot_documents = HotDocumentCache(
+    max_entries=getattr(settings, 'HOT_DOCUMENT_CACHE_ENTRIES', 256),
+    max_bytes=getattr(settings, 'HOT_DOCUMENT_CACHE_BYTES', 64 * 1024 * 1024),
+)
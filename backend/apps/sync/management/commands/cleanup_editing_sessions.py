@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.notebooks.models import EditingSession
+
+
+class Command(BaseCommand):
+    help = "Deactivate expired editing sessions and delete old inactive ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--retention-days', type=int, default=None,
+            help="Delete inactive sessions idle for longer than this (default EDITING_SESSION_RETENTION_DAYS)"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        retention_days = options['retention_days']
+        if retention_days is None:
+            retention_days = settings.EDITING_SESSION_RETENTION_DAYS
+
+        expired = EditingSession.objects.filter(
+            is_active=True,
+            last_activity__lt=EditingSession.expiry_cutoff()
+        ).update(is_active=False)
+
+        # Delete in primary-key batches so a large backlog doesn't hold one long
+        # lock; the (is_active, last_activity) index keeps each scan cheap.
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        stale = EditingSession.objects.filter(is_active=False, last_activity__lt=cutoff)
+        deleted = 0
+        while True:
+            ids = list(stale.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += EditingSession.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(f"Deactivated {expired} expired sessions, deleted {deleted} inactive sessions")
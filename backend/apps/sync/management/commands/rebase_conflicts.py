@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.sync.models import NotebookConflict
+from apps.sync.services import ConflictRebaseService
+
+
+class Command(BaseCommand):
+    help = "Rebase every PENDING conflict onto its notebook's current head"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notebook', type=int, help="Only rebase conflicts of this notebook")
+
+    def handle(self, *args, **options):
+        notebook_ids = NotebookConflict.objects.filter(resolution_strategy='PENDING')
+        if options['notebook']:
+            notebook_ids = notebook_ids.filter(notebook_id=options['notebook'])
+        notebook_ids = notebook_ids.values_list('notebook_id', flat=True).distinct()
+
+        service = ConflictRebaseService()
+        total_closed = total_updated = 0
+        for notebook_id in notebook_ids.iterator():
+            closed, updated = service.rebase_notebook(notebook_id)
+            total_closed += closed
+            total_updated += updated
+
+        self.stdout.write(f"Closed {total_closed} conflicts, updated {total_updated}")
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:12
+
+import apps.notebooks.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notebooks", "0002_compressed_text_columns"),
+        ("sync", "0001_initial"),
+    ]
+
+    operations = [
+        apps.notebooks.fields.CompressTextColumn(
+            model_name="notebookconflict",
+            name="base_content",
+            field=apps.notebooks.fields.CompressedTextField(),
+        ),
+        apps.notebooks.fields.CompressTextColumn(
+            model_name="notebookconflict",
+            name="resolved_content",
+            field=apps.notebooks.fields.CompressedTextField(blank=True),
+        ),
+        apps.notebooks.fields.CompressTextColumn(
+            model_name="notebookconflict",
+            name="their_content",
+            field=apps.notebooks.fields.CompressedTextField(),
+        ),
+        apps.notebooks.fields.CompressTextColumn(
+            model_name="notebookconflict",
+            name="your_content",
+            field=apps.notebooks.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:20
+
+import apps.notebooks.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0002_compressed_text_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebookconflict',
+            name='client_patch',
+            field=apps.notebooks.fields.CompressedTextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='notebookconflict',
+            name='their_version',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notebookconflict',
+            name='base_content',
+            field=apps.notebooks.fields.CompressedTextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='notebookconflict',
+            name='their_content',
+            field=apps.notebooks.fields.CompressedTextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='notebookconflict',
+            name='your_content',
+            field=apps.notebooks.fields.CompressedTextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0003_lean_conflict_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notebookconflict',
+            name='resolution_strategy',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('AUTO_MERGED', 'Auto-merged'), ('YOURS', 'Kept your changes'), ('THEIRS', 'Kept their changes'), ('MANUAL', 'Manually merged'), ('BLOCKS', 'Resolved block by block')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from apps.notebooks.models import Notebook
+from apps.notebooks.fields import CompressedTextField
 
 class NotebookConflict(models.Model):
     RESOLUTION_CHOICES = [
@@ -9,16 +10,21 @@ class NotebookConflict(models.Model):
         ('YOURS', 'Kept your changes'),
         ('THEIRS', 'Kept their changes'),
         ('MANUAL', 'Manually merged'),
+        ('BLOCKS', 'Resolved block by block'),
     ]
 
     notebook = models.ForeignKey(Notebook, on_delete=models.CASCADE, related_name='conflicts')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notebook_conflicts')
     server_version = models.IntegerField()
     client_version = models.IntegerField()  # base_version from client
-    base_content = models.TextField()
-    your_content = models.TextField()
-    their_content = models.TextField()
-    resolved_content = models.TextField(blank=True)
+    their_version = models.IntegerField(null=True, blank=True)  # server head the client raced against
+    # Auto-resolved rows leave these blank and point at NotebookVersion numbers
+    # via conflict_data['content_refs']; see SyncService.hydrate_conflict
+    base_content = CompressedTextField(blank=True)
+    your_content = CompressedTextField(blank=True)
+    their_content = CompressedTextField(blank=True)
+    resolved_content = CompressedTextField(blank=True)
+    client_patch = CompressedTextField(blank=True)
     conflict_blocks = models.JSONField(default=list)
     resolution_strategy = models.CharField(max_length=20, choices=RESOLUTION_CHOICES, default='PENDING')
     resolved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolved_conflicts')
@@ -34,5 +40,9 @@ class NotebookConflict(models.Model):
             models.Index(fields=['user', 'created_at']),
         ]
 
+    @property
+    def is_stored_by_reference(self):
+        return bool(self.conflict_data.get('content_refs'))
+
     def __str__(self):
         return f"Conflict in {self.notebook.title} for {self.user.email}"
@@ -0,0 +1,175 @@
+"""
+Operational transformation for plain text.
+
+An operation is a list of components walked over the document from start to
+end, in the same wire format as ot.js:
+
+    positive int  retain that many characters
+    negative int  delete that many characters
+    str           insert the string
+
+e.g. [5, 'abc', -2, 10] keeps 5 characters, inserts 'abc', deletes 2 and keeps
+the remaining 10. Every operation must cover the whole document it applies to.
+"""
+
+
+class OperationError(ValueError):
+    pass
+
+
+class TextOperation:
+    def __init__(self):
+        self.ops = []
+        self.base_length = 0
+        self.target_length = 0
+
+    @classmethod
+    def from_list(cls, components):
+        operation = cls()
+        if not isinstance(components, list):
+            raise OperationError("Operation must be a list")
+        for component in components:
+            if isinstance(component, bool):
+                raise OperationError(f"Invalid operation component {component!r}")
+            if isinstance(component, str):
+                operation.insert(component)
+            elif isinstance(component, int) and component > 0:
+                operation.retain(component)
+            elif isinstance(component, int) and component < 0:
+                operation.delete(-component)
+            else:
+                raise OperationError(f"Invalid operation component {component!r}")
+        return operation
+
+    def to_list(self):
+        return list(self.ops)
+
+    def retain(self, n):
+        if n <= 0:
+            return self
+        self.base_length += n
+        self.target_length += n
+        if self.ops and _is_retain(self.ops[-1]):
+            self.ops[-1] += n
+        else:
+            self.ops.append(n)
+        return self
+
+    def insert(self, text):
+        if not text:
+            return self
+        self.target_length += len(text)
+        ops = self.ops
+        if ops and isinstance(ops[-1], str):
+            ops[-1] += text
+        elif ops and _is_delete(ops[-1]):
+            # Keep inserts before deletes so equal operations have one representation
+            if len(ops) > 1 and isinstance(ops[-2], str):
+                ops[-2] += text
+            else:
+                ops.insert(len(ops) - 1, text)
+        else:
+            ops.append(text)
+        return self
+
+    def delete(self, n):
+        if n <= 0:
+            return self
+        self.base_length += n
+        if self.ops and _is_delete(self.ops[-1]):
+            self.ops[-1] -= n
+        else:
+            self.ops.append(-n)
+        return self
+
+    def is_noop(self):
+        return not self.ops or (len(self.ops) == 1 and _is_retain(self.ops[0]))
+
+    def apply(self, document):
+        if len(document) != self.base_length:
+            raise OperationError(
+                f"Operation expects a document of length {self.base_length}, got {len(document)}"
+            )
+        parts = []
+        index = 0
+        for op in self.ops:
+            if isinstance(op, str):
+                parts.append(op)
+            elif op > 0:
+                parts.append(document[index:index + op])
+                index += op
+            else:
+                index -= op
+        return ''.join(parts)
+
+    def __eq__(self, other):
+        return isinstance(other, TextOperation) and self.ops == other.ops
+
+    def __repr__(self):
+        return f"TextOperation({self.ops!r})"
+
+
+def _is_retain(op):
+    return isinstance(op, int) and op > 0
+
+
+def _is_delete(op):
+    return isinstance(op, int) and op < 0
+
+
+def transform(a, b):
+    """
+    Transform two concurrent operations on the same document.
+
+    Returns (a', b') such that applying a then b' gives the same document as
+    applying b then a'. When both insert at the same position, a's text comes
+    first, so callers must always pass operations in the same order: the
+    server passes (incoming, already applied) and clients pass (pending, remote).
+    """
+    if a.base_length != b.base_length:
+        raise OperationError("Both operations must apply to the same document")
+
+    a_prime, b_prime = TextOperation(), TextOperation()
+    ops1, ops2 = iter(a.ops), iter(b.ops)
+    op1, op2 = next(ops1, None), next(ops2, None)
+
+    while op1 is not None or op2 is not None:
+        if isinstance(op1, str):
+            a_prime.insert(op1)
+            b_prime.retain(len(op1))
+            op1 = next(ops1, None)
+            continue
+        if isinstance(op2, str):
+            a_prime.retain(len(op2))
+            b_prime.insert(op2)
+            op2 = next(ops2, None)
+            continue
+        if op1 is None or op2 is None:
+            raise OperationError("Operations cover documents of different lengths")
+
+        if op1 > 0 and op2 > 0:
+            length = min(op1, op2)
+            a_prime.retain(length)
+            b_prime.retain(length)
+        elif op1 < 0 and op2 < 0:
+            # Both deleted the same text
+            length = min(-op1, -op2)
+        elif op1 < 0:
+            length = min(-op1, op2)
+            a_prime.delete(length)
+        else:
+            length = min(op1, -op2)
+            b_prime.delete(length)
+
+        op1 = _consume(op1, length) or next(ops1, None)
+        op2 = _consume(op2, length) or next(ops2, None)
+
+    return a_prime, b_prime
+
+
+def _consume(op, length):
+    """What is left of a retain/delete component after `length` characters"""
+    remaining = abs(op) - length
+    if remaining == 0:
+        return None
+    return remaining if op > 0 else -remaining
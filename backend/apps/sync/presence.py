@@ -0,0 +1,66 @@
+"""
+Who is editing which notebook, kept in process memory.
+
+Fed by the editing session lifecycle (start, patch, poll, heartbeat, end) so
+the presence endpoint never has to scan EditingSession. Like the hot document
+cache this is per process; an editor counts as present for
+EDITING_PRESENCE_TIMEOUT seconds after their last request.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+class PresenceRegistry:
+    def __init__(self, timeout=None):
+        self._timeout = timeout
+        self._notebooks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, 'EDITING_PRESENCE_TIMEOUT', 90)
+
+    def seen(self, notebook_id, user):
+        with self._lock:
+            editors = self._notebooks.setdefault(notebook_id, {})
+            editors[user.id] = {
+                'user_id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'last_seen': time.time(),
+            }
+
+    def leave(self, notebook_id, user_id):
+        with self._lock:
+            editors = self._notebooks.get(notebook_id)
+            if editors is None:
+                return
+            editors.pop(user_id, None)
+            if not editors:
+                del self._notebooks[notebook_id]
+
+    def editors(self, notebook_id):
+        """Editors seen within the timeout, most recent first"""
+        cutoff = time.time() - self.timeout
+        with self._lock:
+            editors = self._notebooks.get(notebook_id)
+            if not editors:
+                return []
+            for user_id in [uid for uid, e in editors.items() if e['last_seen'] < cutoff]:
+                del editors[user_id]
+            if not editors:
+                del self._notebooks[notebook_id]
+                return []
+            present = [dict(e) for e in editors.values()]
+        return sorted(present, key=lambda e: e['last_seen'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._notebooks.clear()
+
+
+presence = PresenceRegistry()
@@ -0,0 +1,393 @@
+"""
+Real-time editing engine for notebooks in REALTIME sync mode.
+
+Instead of the patch-against-base protocol in SyncService, clients send small
+OT operations tagged with the last server revision they have seen. The server
+orders them: each incoming operation is transformed past everything applied
+since that revision, applied to an in-memory copy of the document, and
+broadcast. Concurrent edits therefore never produce NotebookConflict rows.
+
+Document state lives in this process only, so every request for a REALTIME
+notebook has to reach the same worker (sticky routing on notebook id, or a
+single worker). The document is written back to Notebook.content as a new
+version every REALTIME_SNAPSHOT_INTERVAL seconds or REALTIME_SNAPSHOT_MAX_OPS
+operations, and when it is evicted after REALTIME_IDLE_TIMEOUT seconds. A
+daemon thread in each process that holds documents checks for due snapshots
+and idle documents every REALTIME_SNAPSHOT_INTERVAL seconds, so the stored
+content never lags more than about one interval behind the last edit.
+
+A document that has been closed (evicted, or dropped before a restore or a
+switch out of REALTIME mode) rejects further operations with `rejoin`, so an
+edit is never acknowledged after its document's final snapshot. A snapshot is
+only written if Notebook.version is still the one the document was loaded
+from; otherwise the notebook was changed elsewhere (another worker, a restore),
+the unsaved text is kept as a pending NotebookConflict for its last author, and
+the document is dropped. Clients still on it get `rejoin` with the conflict id.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.notebooks.models import Notebook, NotebookVersion
+from apps.sync.models import NotebookConflict
+from .ot import OperationError, TextOperation, transform
+from .services import PatchService
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeError(Exception):
+    pass
+
+
+class DocumentClosed(RealtimeError):
+    def __init__(self, message="Document was closed, join again", conflict_id=None):
+        super().__init__(message)
+        self.conflict_id = conflict_id
+
+
+class RealtimeDocument:
+    """Server-side document state: current text, revision and recent operations"""
+
+    def __init__(self, content, history_limit=1000):
+        self.document_id = uuid.uuid4()
+        self.content = content
+        self.revision = 0
+        self.history_limit = history_limit
+        # history[i] is the operation that produced revision history_start + i + 1
+        self.history = []
+        self.history_start = 0
+        self.closed = False
+        self.closed_notice = None
+        self.lock = threading.Lock()
+
+    def _check_open(self):
+        # Called with self.lock held
+        if self.closed:
+            if self.closed_notice:
+                raise DocumentClosed(**self.closed_notice)
+            raise DocumentClosed()
+
+    def receive(self, revision, operation, author_id=None):
+        """Apply an operation made against `revision`; returns (new revision, transformed op)"""
+        with self.lock:
+            self._check_open()
+            if revision > self.revision:
+                raise RealtimeError(f"Unknown revision {revision}")
+            if revision < self.history_start:
+                raise RealtimeError("Revision is too old, rejoin the document")
+
+            for concurrent, _ in self.history[revision - self.history_start:]:
+                operation, _ = transform(operation, concurrent)
+
+            try:
+                self.content = operation.apply(self.content)
+            except OperationError as e:
+                raise RealtimeError(str(e))
+
+            self.history.append((operation, author_id))
+            self.revision += 1
+            if len(self.history) > self.history_limit:
+                dropped = len(self.history) - self.history_limit
+                del self.history[:dropped]
+                self.history_start += dropped
+            return self.revision, operation
+
+    def operations_since(self, revision):
+        """Operations after `revision` as (revision, op, author_id) tuples"""
+        with self.lock:
+            self._check_open()
+            if revision < self.history_start:
+                raise RealtimeError("Revision is too old, rejoin the document")
+            start = revision - self.history_start
+            return [
+                (self.history_start + start + i + 1, op, author_id)
+                for i, (op, author_id) in enumerate(self.history[start:])
+            ]
+
+
+class ActiveNotebook:
+    """A RealtimeDocument plus the bookkeeping needed to snapshot it"""
+
+    def __init__(self, notebook):
+        self.notebook_id = notebook.id
+        # Notebook.version the document content was loaded from or last written as
+        self.base_version = notebook.version
+        self.base_content = notebook.content
+        self.document = RealtimeDocument(
+            notebook.content,
+            history_limit=getattr(settings, 'REALTIME_HISTORY_LIMIT', 1000),
+        )
+        self.snapshot_revision = 0
+        self.snapshot_at = time.monotonic()
+        self.last_activity = time.monotonic()
+        self.last_author_id = None
+        self.snapshot_lock = threading.Lock()
+
+    @property
+    def is_dirty(self):
+        return self.document.revision != self.snapshot_revision
+
+
+class DocumentRegistry:
+    """Per-process map of notebook id -> ActiveNotebook"""
+
+    NOTICE_LIMIT = 1000
+
+    def __init__(self, autoflush=False):
+        self._documents = {}
+        self._lock = threading.Lock()
+        # document id -> DocumentClosed kwargs for documents dropped after a conflict,
+        # so clients that only learn of it on their next request still get the reason
+        self._notices = OrderedDict()
+        self.autoflush = autoflush
+        self._flusher = None
+
+    def get(self, notebook):
+        self.evict_idle()
+        with self._lock:
+            active = self._documents.get(notebook.id)
+        if active is None:
+            # Load from the database rather than trusting the caller's copy, which
+            # may predate a snapshot written by a document that was just closed
+            loaded = ActiveNotebook(Notebook.objects.get(id=notebook.id))
+            with self._lock:
+                active = self._documents.setdefault(notebook.id, loaded)
+                self._start_flusher()
+        active.last_activity = time.monotonic()
+        return active
+
+    def _start_flusher(self):
+        # Called with self._lock held
+        if self.autoflush and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='realtime-snapshots', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(getattr(settings, 'REALTIME_SNAPSHOT_INTERVAL', 10))
+            close_old_connections()
+            try:
+                self.flush_due()
+            except Exception:
+                logger.exception("Periodic real-time snapshot failed")
+            finally:
+                close_old_connections()
+
+    def flush_due(self):
+        """Close idle documents and snapshot every one whose interval has passed"""
+        self.evict_idle()
+        with self._lock:
+            documents = list(self._documents.values())
+        for active in documents:
+            try:
+                self.maybe_snapshot(active)
+            except Exception:
+                logger.exception("Snapshot of notebook %s failed", active.notebook_id)
+
+    def closed_notice(self, document_id):
+        with self._lock:
+            return self._notices.get(str(document_id))
+
+    def find(self, notebook_id):
+        with self._lock:
+            return self._documents.get(notebook_id)
+
+    def snapshot(self, active):
+        """Write the in-memory document back to the notebook as a new version"""
+        with active.snapshot_lock:
+            return self._snapshot(active)
+
+    def _snapshot(self, active):
+        with active.document.lock:
+            content = active.document.content
+            revision = active.document.revision
+        if revision == active.snapshot_revision:
+            return False
+
+        with transaction.atomic():
+            notebook = Notebook.objects.select_for_update().get(id=active.notebook_id)
+            if notebook.version != active.base_version:
+                self._discard(active, notebook, content)
+                return False
+            notebook.content = content
+            notebook.version += 1
+            if active.last_author_id:
+                notebook.last_modified_by_id = active.last_author_id
+            notebook.save()
+            NotebookVersion.objects.create(
+                notebook=notebook,
+                version_number=notebook.version,
+                content=content,
+                created_by_id=active.last_author_id,
+                change_summary=f"Real-time snapshot at revision {revision}"
+            )
+
+        active.base_version = notebook.version
+        active.base_content = content
+        active.snapshot_revision = revision
+        active.snapshot_at = time.monotonic()
+        return True
+
+    def _discard(self, active, notebook, content):
+        """
+        Drop a document whose notebook moved on elsewhere. Its unsaved text is
+        queued as a conflict for the last author to resolve like any other.
+        """
+        document = active.document
+        with document.lock:
+            authors = [author_id for _, author_id in document.history if author_id]
+        author_id = active.last_author_id or (authors[-1] if authors else None)
+
+        conflict = None
+        if author_id is not None:
+            conflict = NotebookConflict.objects.create(
+                notebook=notebook,
+                user_id=author_id,
+                server_version=notebook.version,
+                client_version=active.base_version,
+                their_version=notebook.version,
+                base_content=active.base_content,
+                your_content=content,
+                their_content=notebook.content,
+                conflict_blocks=PatchService().detect_conflicts(active.base_content, content, notebook.content),
+                conflict_data={'source': 'realtime'},
+                resolution_strategy='PENDING',
+            )
+        logger.warning(
+            "Notebook %s moved from version %s to %s outside its real-time document; "
+            "unsaved edits kept as conflict %s",
+            active.notebook_id, active.base_version, notebook.version, conflict.id if conflict else None,
+        )
+
+        notice = {
+            'message': "The notebook was changed elsewhere; your unsaved edits were kept as a conflict to resolve",
+            'conflict_id': conflict.id if conflict else None,
+        }
+        with document.lock:
+            document.closed = True
+            document.closed_notice = notice
+        with self._lock:
+            if self._documents.get(active.notebook_id) is active:
+                del self._documents[active.notebook_id]
+            self._notices[str(document.document_id)] = notice
+            while len(self._notices) > self.NOTICE_LIMIT:
+                self._notices.popitem(last=False)
+
+    def maybe_snapshot(self, active):
+        interval = getattr(settings, 'REALTIME_SNAPSHOT_INTERVAL', 10)
+        max_ops = getattr(settings, 'REALTIME_SNAPSHOT_MAX_OPS', 200)
+        if not active.is_dirty:
+            return False
+        if (time.monotonic() - active.snapshot_at >= interval
+                or active.document.revision - active.snapshot_revision >= max_ops):
+            return self.snapshot(active)
+        return False
+
+    def close(self, notebook_id):
+        """Snapshot and forget a notebook's document"""
+        with self._lock:
+            active = self._documents.pop(notebook_id, None)
+        if active is not None:
+            # Operations accepted before this point are in the final snapshot; later ones are rejected
+            with active.document.lock:
+                active.document.closed = True
+            self.snapshot(active)
+
+    def evict_idle(self):
+        timeout = getattr(settings, 'REALTIME_IDLE_TIMEOUT', 300)
+        now = time.monotonic()
+        with self._lock:
+            idle = [nid for nid, a in self._documents.items() if now - a.last_activity > timeout]
+        for notebook_id in idle:
+            self.close(notebook_id)
+
+    def flush_all(self):
+        with self._lock:
+            documents = list(self._documents.values())
+        for active in documents:
+            try:
+                self.snapshot(active)
+            except Exception:
+                logger.exception("Snapshot of notebook %s failed", active.notebook_id)
+
+
+registry = DocumentRegistry(autoflush=True)
+atexit.register(registry.flush_all)
+
+
+class RealtimeSyncService:
+    def __init__(self, registry=registry):
+        self.registry = registry
+
+    def rejoin(self, document_id, closed=None):
+        """A `rejoin` reply, saying why if the client's document was dropped after a conflict"""
+        notice = self.registry.closed_notice(document_id)
+        if notice is None and closed is not None:
+            notice = {'message': str(closed), 'conflict_id': closed.conflict_id}
+        if notice is None:
+            return {'status': 'rejoin', 'message': 'Document was reloaded, join again'}
+        result = {'status': 'rejoin', 'message': notice['message']}
+        if notice['conflict_id'] is not None:
+            result['conflict_id'] = notice['conflict_id']
+        return result
+
+    def join(self, notebook):
+        active = self.registry.get(notebook)
+        document = active.document
+        with document.lock:
+            return {
+                'document_id': str(document.document_id),
+                'revision': document.revision,
+                'content': document.content,
+            }
+
+    def submit(self, notebook, user, document_id, revision, components):
+        active = self.registry.get(notebook)
+        document = active.document
+        if str(document.document_id) != str(document_id):
+            return self.rejoin(document_id)
+
+        try:
+            operation = TextOperation.from_list(components)
+            new_revision, applied = document.receive(revision, operation, author_id=user.id)
+        except DocumentClosed as e:
+            return self.rejoin(document_id, e)
+        except (OperationError, RealtimeError) as e:
+            return {'status': 'error', 'message': str(e)}
+
+        active.last_author_id = user.id
+        self.registry.maybe_snapshot(active)
+        return {
+            'status': 'success',
+            'revision': new_revision,
+            'operation': applied.to_list(),
+        }
+
+    def operations_since(self, notebook, document_id, revision):
+        active = self.registry.get(notebook)
+        document = active.document
+        if str(document.document_id) != str(document_id):
+            return self.rejoin(document_id)
+        try:
+            operations = document.operations_since(revision)
+        except DocumentClosed as e:
+            return self.rejoin(document_id, e)
+        except RealtimeError as e:
+            return {'status': 'rejoin', 'message': str(e)}
+
+        return {
+            'status': 'success',
+            'revision': document.revision,
+            'operations': [
+                {'revision': rev, 'operation': op.to_list(), 'author': author_id}
+                for rev, op, author_id in operations
+            ],
+        }
@@ -14,6 +14,15 @@ class ApplyPatchSerializer(serializers.Serializer):
     patch = serializers.CharField(max_length=1024*1024, allow_blank=True)  # 1MB max
     client_id = serializers.CharField(required=False)
 
+class SessionHeartbeatSerializer(serializers.Serializer):
+    session_token = serializers.UUIDField()
+    end = serializers.BooleanField(default=False)
+
+class RealtimeOperationSerializer(serializers.Serializer):
+    document_id = serializers.UUIDField()
+    revision = serializers.IntegerField(min_value=0)
+    operation = serializers.ListField(child=serializers.JSONField(), max_length=10000)
+
 class NotebookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notebook
@@ -32,11 +41,41 @@ class ConflictSerializer(serializers.ModelSerializer):
             'created_at'
         ]
 
+class ConflictSummarySerializer(serializers.ModelSerializer):
+    """List view of a conflict, without the document bodies"""
+    notebook = NotebookSerializer(read_only=True)
+    user_email = serializers.EmailField(source='user.email', read_only=True)
+    block_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NotebookConflict
+        fields = [
+            'id', 'notebook', 'user', 'user_email',
+            'server_version', 'client_version',
+            'block_count', 'created_at'
+        ]
+
+    def get_block_count(self, obj):
+        return len(obj.conflict_blocks)
+
+class BlockChoiceSerializer(serializers.Serializer):
+    line_number = serializers.IntegerField(min_value=1)
+    choice = serializers.ChoiceField(choices=['YOURS', 'THEIRS', 'BASE'], required=False)
+    content = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+
+    def validate(self, data):
+        if ('choice' in data) == ('content' in data):
+            raise serializers.ValidationError("Give exactly one of choice or content for each block")
+        return data
+
 class ResolveConflictSerializer(serializers.Serializer):
     resolution_strategy = serializers.ChoiceField(choices=NotebookConflict.RESOLUTION_CHOICES)
     final_content = serializers.CharField(required=False, allow_blank=True)
+    blocks = BlockChoiceSerializer(many=True, required=False)
 
     def validate(self, data):
         if data['resolution_strategy'] == 'MANUAL' and 'final_content' not in data:
             raise serializers.ValidationError("final_content is required for MANUAL strategy")
+        if data['resolution_strategy'] == 'BLOCKS' and not data.get('blocks'):
+            raise serializers.ValidationError("blocks is required for BLOCKS strategy")
         return data
@@ -1,45 +1,117 @@
 import diff_match_patch as dmp_module
+from datetime import timedelta
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from apps.notebooks.models import Notebook, NotebookVersion, EditingSession
 from apps.sync.models import NotebookConflict
+from apps.sync.cache import hot_documents
+from apps.sync.presence import presence
+from apps.activity.services import ActivityService
 
 class EditingSessionService:
+    """
+    Sessions belong to a user, or to a share link for guests editing through an
+    EDIT link. Guests are told apart only by their session token.
+    """
     @staticmethod
-    def start_editing_session(notebook, user):
+    def start_editing_session(notebook, user, share_link=None):
         """Create or reactivate editing session"""
         # Deactivate any existing active sessions for this user+notebook
-        EditingSession.objects.filter(notebook=notebook, user=user, is_active=True).update(is_active=False)
+        if user is not None:
+            EditingSession.objects.filter(notebook=notebook, user=user, is_active=True).update(is_active=False)
+        else:
+            EditingSessionService._make_room_for_guest(share_link)
+        
+        # Notebooks with an open session are the ones worth keeping hot
+        hot_documents.put_notebook(notebook)
         
         # Create new session with current content as base
         session = EditingSession.objects.create(
             notebook=notebook,
             user=user,
+            share_link=share_link,
             base_version=notebook.version,
             base_content=notebook.content,
             is_active=True
         )
+        if user is not None:
+            presence.seen(notebook.id, user)
         return session
 
     @staticmethod
-    def get_active_session(notebook, user, session_token):
+    def _make_room_for_guest(share_link):
+        """
+        Guest sessions are anonymous, so nothing ends them except expiry. Keep at
+        most SHARE_EDIT_MAX_SESSIONS_PER_LINK rows per link, counting the one
+        about to be opened: ended and expired ones go first, then the least
+        recently active.
+        """
+        sessions = EditingSession.objects.filter(share_link=share_link, user__isnull=True)
+        sessions.filter(Q(is_active=False) | Q(last_activity__lt=EditingSession.expiry_cutoff())).delete()
+        keep = max(settings.SHARE_EDIT_MAX_SESSIONS_PER_LINK - 1, 0)
+        oldest = list(sessions.order_by('-last_activity', '-pk').values_list('pk', flat=True)[keep:])
+        if oldest:
+            EditingSession.objects.filter(pk__in=oldest).delete()
+
+    @staticmethod
+    def get_active_session(notebook, user, session_token, share_link=None):
         """Get and validate active session"""
         try:
-            session = EditingSession.objects.get(
+            # base_content is only needed when merging; load it lazily
+            session = EditingSession.objects.defer('base_content').get(
                 session_token=session_token,
                 notebook=notebook,
                 user=user,
+                share_link=share_link,
                 is_active=True
             )
-            # TODO: Implement is_expired check if needed, for now just return session
-            # if session.is_expired():
-            #     session.is_active = False
-            #     session.save()
-            #     return None
-            return session
         except EditingSession.DoesNotExist:
             return None
 
+        if session.is_expired():
+            EditingSession.objects.filter(pk=session.pk).update(is_active=False)
+            if user is not None:
+                presence.leave(notebook.id, user.id)
+            return None
+
+        EditingSessionService.touch(session)
+        if user is not None:
+            presence.seen(notebook.id, user)
+        return session
+
+    @staticmethod
+    def touch(session):
+        """
+        Record activity without rewriting the row. Writes at most once per
+        EDITING_SESSION_HEARTBEAT_INTERVAL so frequent polls stay read-only.
+        """
+        now = timezone.now()
+        if now - session.last_activity < timedelta(seconds=settings.EDITING_SESSION_HEARTBEAT_INTERVAL):
+            return False
+        EditingSession.objects.filter(pk=session.pk).update(last_activity=now)
+        session.last_activity = now
+        return True
+
+    @staticmethod
+    def heartbeat(notebook, user, session_token, share_link=None):
+        """Keep a session alive; returns False if it is unknown or expired"""
+        return EditingSessionService.get_active_session(notebook, user, session_token, share_link) is not None
+
+    @staticmethod
+    def end_session(notebook, user, session_token, share_link=None):
+        ended = EditingSession.objects.filter(
+            session_token=session_token,
+            notebook=notebook,
+            user=user,
+            share_link=share_link,
+            is_active=True
+        ).update(is_active=False) > 0
+        if ended and user is not None:
+            presence.leave(notebook.id, user.id)
+        return ended
+
 class PatchService:
     def __init__(self):
         self.dmp = dmp_module.diff_match_patch()
@@ -103,18 +175,73 @@ class PatchService:
         
         return conflicts
 
+    def assemble_blocks(self, base, yours, theirs, choices):
+        """
+        Build a resolution from per-block choices.
+
+        Lines are aligned by index exactly as in detect_conflicts: a line only one
+        side changed is taken from that side, and every conflicting line is taken
+        from choices[line_number], which is 'YOURS', 'THEIRS', 'BASE' or
+        {'content': text}. Raises ValueError if a conflicting line has no choice.
+        """
+        base_lines = base.splitlines()
+        your_lines = yours.splitlines()
+        their_lines = theirs.splitlines()
+
+        def line_at(lines, i):
+            return lines[i] if i < len(lines) else None
+
+        result = []
+        max_lines = max(len(base_lines), len(your_lines), len(their_lines))
+        for i in range(max_lines):
+            base_line = line_at(base_lines, i)
+            your_line = line_at(your_lines, i)
+            their_line = line_at(their_lines, i)
+
+            if (base_line or "") == (your_line or ""):
+                line = their_line
+            elif (base_line or "") == (their_line or "") or (your_line or "") == (their_line or ""):
+                line = your_line
+            else:
+                choice = choices.get(i + 1)
+                if choice is None:
+                    raise ValueError(f"No choice given for conflict block at line {i + 1}")
+                if isinstance(choice, dict):
+                    line = choice['content']
+                else:
+                    line = {'YOURS': your_line, 'THEIRS': their_line, 'BASE': base_line}[choice]
+
+            # A side that ends before this index dropped the line
+            if line is not None:
+                result.append(line)
+
+        content = '\n'.join(result)
+        if result and theirs.endswith('\n'):
+            content += '\n'
+        return content
+
 class SyncService:
     def __init__(self):
         self.patch_service = PatchService()
     
     @transaction.atomic
-    def apply_patch_to_notebook(self, notebook_id, user, session_token, patch_text):
-        """Main sync method - apply patch with conflict detection"""
-        # Lock notebook for update
-        notebook = Notebook.objects.select_for_update().get(id=notebook_id)
+    def apply_patch_to_notebook(self, notebook_id, user, session_token, patch_text, share_link=None):
+        """
+        Main sync method - apply patch with conflict detection. Guests editing
+        through a share link pass user=None and the link their session belongs to.
+        """
+        # Lock notebook for update; the content itself comes from the hot
+        # document cache when it still matches the locked version
+        notebook = Notebook.objects.select_for_update().defer('content').get(id=notebook_id)
+        
+        if notebook.sync_mode == 'REALTIME':
+            return {
+                'status': 'error',
+                'message': 'This notebook is edited in real time; use the realtime endpoints'
+            }
         
         # Get editing session
-        session = EditingSessionService.get_active_session(notebook, user, session_token)
+        session = EditingSessionService.get_active_session(notebook, user, session_token, share_link)
         if not session:
             return {
                 'status': 'error',
@@ -126,14 +253,17 @@ class SyncService:
             if notebook.version > session.base_version:
                 # Client is behind, send latest content
                 # Update session to match server
+                content = self._load_content(notebook)
+                patch = self.patch_service.generate_patch(session.base_content, content)
                 session.base_version = notebook.version
-                session.base_content = notebook.content
+                session.base_content = content
                 session.save()
                 
                 return {
                     'status': 'auto_merged', # Frontend treats this as "update content"
                     'version': notebook.version,
-                    'content': notebook.content,
+                    'content': content,
+                    'patch': patch,  # from the client's base, for editors that apply in place
                     'message': 'Pulled latest changes'
                 }
             else:
@@ -143,44 +273,7 @@ class SyncService:
                     'version': notebook.version
                 }
         
-        # Check if server version changed
-        if notebook.version == session.base_version:
-            # No conflicts - direct apply
-            result_content, success = self.patch_service.apply_patch(
-                notebook.content,
-                patch_text
-            )
-            
-            if success:
-                # Update notebook
-                notebook.content = result_content
-                notebook.version += 1
-                notebook.last_modified_by = user
-                notebook.save()
-                
-                # Create version history
-                NotebookVersion.objects.create(
-                    notebook=notebook,
-                    version_number=notebook.version,
-                    content=result_content,
-                    created_by=user
-                )
-                
-                # Update session
-                session.base_version = notebook.version
-                session.base_content = result_content
-                session.save()
-                
-                return {
-                    'status': 'success',
-                    'version': notebook.version,
-                    'content': result_content
-                }
-            else:
-                return {
-                    'status': 'error',
-                    'message': 'Patch application failed'
-                }
+        self._load_content(notebook)
         
         # Check if server version changed
         if notebook.version == session.base_version:
@@ -194,15 +287,16 @@ class SyncService:
                 # Update notebook
                 notebook.content = result_content
                 notebook.version += 1
-                notebook.last_modified_by = user
-                notebook.save()
+                self._save_edit(notebook, user, session)
+                hot_documents.put_notebook(notebook)
                 
                 # Create version history
                 NotebookVersion.objects.create(
                     notebook=notebook,
                     version_number=notebook.version,
                     content=result_content,
-                    created_by=user
+                    created_by=user,
+                    change_summary="Edited through a share link" if user is None else ''
                 )
                 
                 # Update session
@@ -225,6 +319,75 @@ class SyncService:
             # Version mismatch - attempt merge
             return self._handle_conflict(notebook, user, session, patch_text)
     
+    def _save_edit(self, notebook, user, session):
+        """
+        Save a patched notebook. A guest edit leaves last_modified_by on the last
+        member who edited and is logged as the guest's, with the share link.
+        """
+        if user is None:
+            notebook._skip_activity_log = True
+            notebook.save()
+            ActivityService.log_guest_edit(
+                notebook, session.share_link_id, old_version=notebook.version - 1, new_version=notebook.version
+            )
+        else:
+            notebook.last_modified_by = user
+            notebook.save()
+
+    def restore_version(self, notebook_id, version_number, user):
+        """
+        Make an earlier version the new head. The text is copied from the stored
+        version on the server, and open editing sessions pick it up as a patch on
+        their next poll like any other remote change.
+        """
+        from apps.sync.realtime import registry
+        registry.close(notebook_id)
+
+        with transaction.atomic():
+            notebook = Notebook.objects.select_for_update().defer('content').get(id=notebook_id)
+            try:
+                source = NotebookVersion.objects.get(notebook=notebook, version_number=version_number)
+            except NotebookVersion.DoesNotExist:
+                return {'status': 'error', 'message': f'Version {version_number} does not exist'}
+
+            if source.content == self._load_content(notebook):
+                return {'status': 'no_changes', 'version': notebook.version}
+
+            old_version = notebook.version
+            notebook.content = source.content
+            notebook.version += 1
+            notebook.last_modified_by = user
+            notebook._skip_activity_log = True
+            notebook.save()
+            hot_documents.put_notebook(notebook)
+
+            NotebookVersion.objects.create(
+                notebook=notebook,
+                version_number=notebook.version,
+                content=source.content,
+                restored_from=source,
+                change_summary=f"Restored version {version_number}",
+                created_by=user
+            )
+            ActivityService.log_version_restored(notebook, user, version_number, notebook.version)
+
+        return {
+            'status': 'success',
+            'previous_version': old_version,
+            'restored_version': version_number,
+            'version': notebook.version,
+            'content': notebook.content,
+        }
+
+    def _load_content(self, notebook):
+        """Fill in notebook.content on a row locked with defer('content')"""
+        content = hot_documents.get(notebook.id, notebook.version, notebook.content_hash)
+        if content is None:
+            content = Notebook.objects.values_list('content', flat=True).get(id=notebook.id)
+            hot_documents.put(notebook.id, notebook.version, notebook.content_hash, content)
+        notebook.content = content
+        return content
+
     def _handle_conflict(self, notebook, user, session, patch_text):
         """Handle version conflict with three-way merge"""
         base_content = session.base_content
@@ -242,7 +405,7 @@ class SyncService:
             member = WorkspaceMember.objects.get(workspace=notebook.workspace, user=user)
             role = member.role
         except WorkspaceMember.DoesNotExist:
-            role = 'VIEWER' # Should not happen for editor
+            role = 'VIEWER' # Should not happen for editor; share link guests have no member row
 
         is_admin_or_owner = role in ['OWNER', 'ADMIN']
 
@@ -257,24 +420,24 @@ class SyncService:
             # Auto-merge successful
             notebook.content = merged_content
             notebook.version += 1
-            notebook.last_modified_by = user
-            notebook.save()
+            self._save_edit(notebook, user, session)
+            hot_documents.put_notebook(notebook)
             
-            # Log conflict (auto-resolved)
-            NotebookConflict.objects.create(
+            NotebookVersion.objects.create(
                 notebook=notebook,
-                user=user,
-                server_version=notebook.version,
-                client_version=session.base_version,
-                base_content=base_content,
-                your_content=your_content,
-                their_content=server_content,
-                resolved_content=merged_content,
-                resolution_strategy='AUTO_MERGED',
-                resolved_by=user,
-                resolved_at=timezone.now()
+                version_number=notebook.version,
+                content=merged_content,
+                created_by=user,
+                change_summary="Auto-merged concurrent edits"
             )
             
+            # Log conflict (auto-resolved); guest merges only show up in version history
+            if user is not None:
+                self._log_resolved_conflict(
+                    notebook, user, session, patch_text, 'AUTO_MERGED',
+                    base_content, server_content
+                )
+            
             return {
                 'status': 'auto_merged',
                 'version': notebook.version,
@@ -292,19 +455,20 @@ class SyncService:
                 notebook.version += 1
                 notebook.last_modified_by = user
                 notebook.save()
+                hot_documents.put_notebook(notebook)
                 
-                NotebookConflict.objects.create(
+                NotebookVersion.objects.create(
                     notebook=notebook,
-                    user=user,
-                    server_version=notebook.version,
-                    client_version=session.base_version,
-                    base_content=base_content,
-                    your_content=your_content,
-                    their_content=server_content,
-                    resolved_content=your_content,
-                    resolution_strategy='YOURS', # Auto-resolved as YOURS
-                    resolved_by=user,
-                    resolved_at=timezone.now()
+                    version_number=notebook.version,
+                    content=your_content,
+                    created_by=user,
+                    change_summary="Conflict resolved: YOURS (Owner Override)"
+                )
+                
+                # Auto-resolved as YOURS
+                self._log_resolved_conflict(
+                    notebook, user, session, patch_text, 'YOURS',
+                    base_content, server_content
                 )
                 
                 # Update session to match new state
@@ -319,6 +483,21 @@ class SyncService:
                     'message': 'Conflict resolved automatically (Owner Override)'
                 }
 
+            elif user is None:
+                # Share link guest -> nobody can review a queued conflict for them,
+                # so reject the patch and move the session to the server version
+                session.base_version = notebook.version
+                session.base_content = server_content
+                session.save()
+
+                return {
+                    'status': 'conflict',
+                    'version': notebook.version,
+                    'content': server_content,
+                    'your_content': your_content,
+                    'message': 'The notebook was changed by someone else; reapply your edits'
+                }
+
             else:
                 # Editor -> Queue Conflict
                 conflict = NotebookConflict.objects.create(
@@ -326,9 +505,11 @@ class SyncService:
                     user=user,
                     server_version=notebook.version,
                     client_version=session.base_version,
+                    their_version=notebook.version,
                     base_content=base_content,
                     your_content=your_content,
                     their_content=server_content,
+                    client_patch=patch_text,
                     conflict_blocks=conflicts,
                     resolution_strategy='PENDING'
                 )
@@ -339,9 +520,69 @@ class SyncService:
                     'message': 'Changes queued for review'
                 }
     
+    def _log_resolved_conflict(self, notebook, user, session, patch_text, strategy, base_content, their_content):
+        """
+        Record a conflict that was resolved without review.
+
+        Nobody reads these rows back in full, so instead of copying the notebook
+        four times they point at version history: resolved content is the head
+        version just written, your content is base + client_patch, and base/their
+        content are only copied when that version is missing from history.
+        """
+        their_version = notebook.version - 1
+        in_history = set(NotebookVersion.objects.filter(
+            notebook=notebook,
+            version_number__in=[session.base_version, their_version]
+        ).values_list('version_number', flat=True))
+
+        content_refs = {'resolved_content': notebook.version}
+        if session.base_version in in_history:
+            content_refs['base_content'] = session.base_version
+            base_content = ''
+        if their_version in in_history:
+            content_refs['their_content'] = their_version
+            their_content = ''
+
+        return NotebookConflict.objects.create(
+            notebook=notebook,
+            user=user,
+            server_version=notebook.version,
+            client_version=session.base_version,
+            their_version=their_version,
+            base_content=base_content,
+            their_content=their_content,
+            client_patch=patch_text,
+            conflict_data={'content_refs': content_refs},
+            resolution_strategy=strategy,
+            resolved_by=user,
+            resolved_at=timezone.now()
+        )
+
+    def hydrate_conflict(self, conflict):
+        """Fill in the text of a conflict stored by reference (see _log_resolved_conflict)"""
+        content_refs = conflict.conflict_data.get('content_refs')
+        if not content_refs:
+            return conflict
+
+        versions = dict(NotebookVersion.objects.filter(
+            notebook_id=conflict.notebook_id,
+            version_number__in=set(content_refs.values())
+        ).values_list('version_number', 'content'))
+        for field, version_number in content_refs.items():
+            setattr(conflict, field, versions.get(version_number, ''))
+
+        conflict.your_content, _ = self.patch_service.apply_patch(conflict.base_content, conflict.client_patch)
+        return conflict
+
     @transaction.atomic
-    def resolve_conflict(self, conflict_id, user, strategy, final_content=None):
-        """Resolve conflict with user's choice"""
+    def resolve_conflict(self, conflict_id, user, strategy, final_content=None, blocks=None):
+        """
+        Resolve conflict with user's choice.
+
+        With the BLOCKS strategy the client only sends a choice per entry of
+        conflict_blocks (see ResolveConflictSerializer) and the server assembles
+        the document.
+        """
         conflict = NotebookConflict.objects.select_for_update().get(id=conflict_id)
         
         if conflict.resolution_strategy != 'PENDING':
@@ -356,6 +597,17 @@ class SyncService:
             content = conflict.their_content
         elif strategy == 'MANUAL':
             content = final_content
+        elif strategy == 'BLOCKS':
+            choices = {
+                block['line_number']: {'content': block['content']} if 'content' in block else block['choice']
+                for block in blocks or []
+            }
+            try:
+                content = self.patch_service.assemble_blocks(
+                    conflict.base_content, conflict.your_content, conflict.their_content, choices
+                )
+            except ValueError as e:
+                return {'status': 'error', 'message': str(e)}
         else:
             return {'status': 'error', 'message': 'Invalid strategy'}
         
@@ -364,6 +616,7 @@ class SyncService:
         notebook.version += 1
         notebook.last_modified_by = user
         notebook.save()
+        hot_documents.put_notebook(notebook)
         
         # Update conflict
         conflict.resolved_content = content
@@ -386,3 +639,80 @@ class SyncService:
             'version': notebook.version,
             'content': content
         }
+
+class ConflictRebaseService:
+    """
+    Keep PENDING conflicts in step with the notebook head.
+
+    When new versions land, each pending conflict is merged again as
+    base -> yours on top of the current head. Conflicts that now merge cleanly
+    are applied and closed as AUTO_MERGED; the rest get fresh their_content and
+    conflict_blocks so reviewers never work against a stale document.
+    """
+
+    def __init__(self):
+        self.patch_service = PatchService()
+
+    def rebase_notebook(self, notebook_id):
+        """Rebase every pending conflict of a notebook; returns (closed, updated) counts"""
+        closed = updated = 0
+        conflict_ids = list(NotebookConflict.objects.filter(
+            notebook_id=notebook_id,
+            resolution_strategy='PENDING'
+        ).order_by('created_at').values_list('id', flat=True))
+
+        for conflict_id in conflict_ids:
+            outcome = self.rebase_conflict(conflict_id)
+            if outcome == 'closed':
+                closed += 1
+            elif outcome == 'updated':
+                updated += 1
+        return closed, updated
+
+    @transaction.atomic
+    def rebase_conflict(self, conflict_id):
+        conflict = NotebookConflict.objects.select_for_update().get(id=conflict_id)
+        if conflict.resolution_strategy != 'PENDING':
+            return 'skipped'
+
+        notebook = Notebook.objects.select_for_update().get(id=conflict.notebook_id)
+        if conflict.their_version == notebook.version:
+            return 'skipped'
+
+        head_content = notebook.content
+        head_version = notebook.version
+        merged_content, success, blocks = self.patch_service.three_way_merge(
+            conflict.base_content,
+            conflict.your_content,
+            head_content
+        )
+
+        conflict.their_content = head_content
+        conflict.their_version = head_version
+        if success:
+            notebook.content = merged_content
+            notebook.version += 1
+            notebook.last_modified_by = conflict.user
+            notebook.save()
+            hot_documents.put_notebook(notebook)
+
+            NotebookVersion.objects.create(
+                notebook=notebook,
+                version_number=notebook.version,
+                content=merged_content,
+                created_by=conflict.user,
+                change_summary="Auto-merged pending conflict"
+            )
+
+            conflict.server_version = notebook.version
+            conflict.resolved_content = merged_content
+            conflict.conflict_blocks = []
+            conflict.resolution_strategy = 'AUTO_MERGED'
+            conflict.resolved_at = timezone.now()
+            conflict.save()
+            return 'closed'
+
+        conflict.server_version = head_version
+        conflict.conflict_blocks = blocks
+        conflict.save(update_fields=['their_content', 'their_version', 'server_version', 'conflict_blocks'])
+        return 'updated'
@@ -0,0 +1,52 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.notebooks.models import NotebookVersion
+from apps.sync.models import NotebookConflict
+from .services import ConflictRebaseService
+
+logger = logging.getLogger(__name__)
+
+# One worker keeps rebases of the same notebook from racing each other;
+# notebooks already queued are not queued twice.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='conflict-rebase')
+_queued = set()
+_queued_lock = threading.Lock()
+
+
+def _run_rebase(notebook_id):
+    with _queued_lock:
+        _queued.discard(notebook_id)
+    close_old_connections()
+    try:
+        ConflictRebaseService().rebase_notebook(notebook_id)
+    except Exception:
+        logger.exception("Rebasing pending conflicts of notebook %s failed", notebook_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_rebase(notebook_id):
+    if not getattr(settings, 'SYNC_REBASE_IN_BACKGROUND', True):
+        ConflictRebaseService().rebase_notebook(notebook_id)
+        return
+
+    with _queued_lock:
+        if notebook_id in _queued:
+            return
+        _queued.add(notebook_id)
+    _executor.submit(_run_rebase, notebook_id)
+
+
+@receiver(post_save, sender=NotebookVersion)
+def rebase_pending_conflicts(sender, instance, created, **kwargs):
+    if not created:
+        return
+    notebook_id = instance.notebook_id
+    # Checked here so notebooks without pending conflicts never reach the worker
+    if NotebookConflict.objects.filter(notebook_id=notebook_id, resolution_strategy='PENDING').exists():
+        transaction.on_commit(lambda: schedule_rebase(notebook_id))
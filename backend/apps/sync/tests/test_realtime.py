@@ -0,0 +1,243 @@
+import random
+from collections import deque
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from apps.notebooks.models import Notebook, NotebookVersion
+from apps.sync.models import NotebookConflict
+from apps.workspaces.models import Workspace, WorkspaceMember
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.sync.ot import TextOperation, transform
+from apps.sync.realtime import DocumentRegistry, RealtimeDocument, RealtimeSyncService
+
+User = get_user_model()
+
+
+def random_edit(rng, document):
+    """A random insert or delete covering the whole document"""
+    operation = TextOperation()
+    position = rng.randint(0, len(document))
+    operation.retain(position)
+    if document and rng.random() < 0.4:
+        length = rng.randint(1, min(5, len(document) - position) or 1)
+        length = min(length, len(document) - position)
+        operation.delete(length)
+        operation.retain(len(document) - position - length)
+    else:
+        operation.insert(''.join(rng.choice('abcxyz \n') for _ in range(rng.randint(1, 4))))
+        operation.retain(len(document) - position)
+    return operation
+
+
+class SimulatedEditor:
+    """
+    Client side of the protocol: at most one operation in flight, later local
+    edits queued behind it, and remote operations transformed past both.
+    """
+
+    def __init__(self, name, content):
+        self.name = name
+        self.document = content
+        self.revision = 0
+        self.pending = []
+        self.in_flight = False
+
+    def edit(self, rng):
+        operation = random_edit(rng, self.document)
+        self.document = operation.apply(self.document)
+        self.pending.append(operation)
+
+    def next_submission(self):
+        if self.pending and not self.in_flight:
+            self.in_flight = True
+            return self.revision, self.pending[0]
+        return None
+
+    def receive_ack(self):
+        self.pending.pop(0)
+        self.in_flight = False
+        self.revision += 1
+
+    def receive_remote(self, operation):
+        transformed = []
+        for pending in self.pending:
+            pending, operation = transform(pending, operation)
+            transformed.append(pending)
+        self.pending = transformed
+        self.document = operation.apply(self.document)
+        self.revision += 1
+
+
+def simulate(seed, editors=8, steps=400, initial='Line 1\nLine 2\nLine 3'):
+    rng = random.Random(seed)
+    server = RealtimeDocument(initial)
+    clients = [SimulatedEditor(i, initial) for i in range(editors)]
+    uplink = {c.name: deque() for c in clients}
+    downlink = {c.name: deque() for c in clients}
+
+    def server_step(name):
+        revision, operation = uplink[name].popleft()
+        _, applied = server.receive(revision, operation, author_id=name)
+        for client in clients:
+            downlink[client.name].append(('ack', None) if client.name == name else ('op', applied))
+
+    def client_step(client):
+        kind, operation = downlink[client.name].popleft()
+        if kind == 'ack':
+            client.receive_ack()
+        else:
+            client.receive_remote(operation)
+
+    for _ in range(steps):
+        client = rng.choice(clients)
+        action = rng.random()
+        if action < 0.4:
+            client.edit(rng)
+        elif action < 0.7 and uplink[client.name]:
+            server_step(client.name)
+        elif downlink[client.name]:
+            client_step(client)
+
+        submission = client.next_submission()
+        if submission:
+            uplink[client.name].append(submission)
+
+    # Drain the network until every edit has been acknowledged everywhere
+    while any(uplink.values()) or any(downlink.values()) or any(c.pending for c in clients):
+        for client in clients:
+            while uplink[client.name]:
+                server_step(client.name)
+        for client in clients:
+            while downlink[client.name]:
+                client_step(client)
+            submission = client.next_submission()
+            if submission:
+                uplink[client.name].append(submission)
+
+    return server, clients
+
+
+class TransformTests(SimpleTestCase):
+    def test_concurrent_inserts_converge(self):
+        document = 'abc'
+        a = TextOperation().retain(1).insert('X').retain(2)
+        b = TextOperation().retain(1).insert('Y').retain(2)
+        a_prime, b_prime = transform(a, b)
+        self.assertEqual(b_prime.apply(a.apply(document)), a_prime.apply(b.apply(document)))
+        self.assertEqual(b_prime.apply(a.apply(document)), 'aXYbc')
+
+    def test_overlapping_deletes(self):
+        document = 'abcdef'
+        a = TextOperation().retain(1).delete(3).retain(2)
+        b = TextOperation().retain(2).delete(3).retain(1)
+        a_prime, b_prime = transform(a, b)
+        self.assertEqual(b_prime.apply(a.apply(document)), 'af')
+        self.assertEqual(a_prime.apply(b.apply(document)), 'af')
+
+    def test_wire_format_round_trip(self):
+        operation = TextOperation.from_list([2, 'hi', -1, 3])
+        self.assertEqual(operation.to_list(), [2, 'hi', -1, 3])
+        self.assertEqual(operation.apply('abcdef'), 'abhidef')
+
+
+class ConvergenceHarnessTests(SimpleTestCase):
+    def test_many_simulated_editors_converge(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                server, clients = simulate(seed)
+                for client in clients:
+                    self.assertEqual(client.document, server.content)
+                    self.assertEqual(client.revision, server.revision)
+
+    def test_history_limit_forces_rejoin(self):
+        server = RealtimeDocument('abc', history_limit=2)
+        for _ in range(3):
+            server.receive(server.revision, TextOperation().insert('x').retain(len(server.content)))
+        with self.assertRaises(Exception):
+            server.receive(0, TextOperation().retain(3))
+
+
+class RealtimeSyncServiceTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.user = User.objects.create_user(username='rt', email='rt@example.com', password='password')
+        self.workspace = Workspace.objects.create(name='Realtime WS', owner=self.user)
+        self.notebook = Notebook.objects.create(
+            title='Live', content='Hello', workspace=self.workspace,
+            created_by=self.user, sync_mode='REALTIME'
+        )
+        self.registry = DocumentRegistry()
+        self.service = RealtimeSyncService(registry=self.registry)
+
+    @override_settings(REALTIME_SNAPSHOT_MAX_OPS=2, REALTIME_SNAPSHOT_INTERVAL=3600)
+    def test_operations_are_ordered_and_snapshotted(self):
+        joined = self.service.join(self.notebook)
+        document_id = joined['document_id']
+
+        first = self.service.submit(self.notebook, self.user, document_id, 0, [5, ' world'])
+        # Made against revision 0, so it is transformed past the first edit
+        second = self.service.submit(self.notebook, self.user, document_id, 0, ['Oh, ', 5])
+        self.assertEqual(first['revision'], 1)
+        self.assertEqual(second['operation'], ['Oh, ', 11])
+
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Oh, Hello world')
+        self.assertEqual(self.notebook.version, 2)
+        self.assertTrue(NotebookVersion.objects.filter(notebook=self.notebook, version_number=2).exists())
+
+        pulled = self.service.operations_since(self.notebook, document_id, 1)
+        self.assertEqual([op['revision'] for op in pulled['operations']], [2])
+
+    def test_stale_document_must_rejoin(self):
+        self.service.join(self.notebook)
+        result = self.service.submit(self.notebook, self.user, 'not-this-document', 0, [5, '!'])
+        self.assertEqual(result['status'], 'rejoin')
+
+    def test_closed_document_rejects_operations(self):
+        document_id = self.service.join(self.notebook)['document_id']
+        # A submit that fetched the document just before it was evicted
+        active = self.registry.get(self.notebook)
+        self.registry.close(self.notebook.id)
+        with mock.patch.object(self.registry, 'get', return_value=active):
+            result = self.service.submit(self.notebook, self.user, document_id, 0, [5, '!'])
+        self.assertEqual(result['status'], 'rejoin')
+        self.assertEqual(active.document.content, 'Hello')
+
+    def test_snapshot_does_not_overwrite_newer_versions(self):
+        document_id = self.service.join(self.notebook)['document_id']
+        self.service.submit(self.notebook, self.user, document_id, 0, [5, '!'])
+        # Written by another worker while this one held the document
+        Notebook.objects.filter(pk=self.notebook.pk).update(content='Restored', version=5)
+
+        active = self.registry.find(self.notebook.id)
+        self.assertFalse(self.registry.snapshot(active))
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Restored')
+        self.assertIsNone(self.registry.find(self.notebook.id))
+
+        # The acknowledged edit is kept for its author to resolve, and clients are told where
+        conflict = NotebookConflict.objects.get(notebook=self.notebook)
+        self.assertEqual((conflict.user, conflict.your_content, conflict.their_content), (self.user, 'Hello!', 'Restored'))
+        self.assertEqual(conflict.resolution_strategy, 'PENDING')
+        result = self.service.submit(self.notebook, self.user, document_id, 1, [6, '?'])
+        self.assertEqual(result['status'], 'rejoin')
+        self.assertEqual(result['conflict_id'], conflict.id)
+        self.assertEqual(self.service.join(self.notebook)['content'], 'Restored')
+
+    def test_periodic_flush_writes_quiet_documents(self):
+        document_id = self.service.join(self.notebook)['document_id']
+        with override_settings(REALTIME_SNAPSHOT_INTERVAL=3600):
+            self.service.submit(self.notebook, self.user, document_id, 0, [5, '!'])
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Hello')
+
+        # What the background thread runs once the interval has passed, with no new ops
+        with override_settings(REALTIME_SNAPSHOT_INTERVAL=0):
+            self.registry.flush_due()
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Hello!')
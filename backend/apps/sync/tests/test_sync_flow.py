@@ -1,3 +1,4 @@
+import io
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from apps.notebooks.models import Notebook, EditingSession
@@ -134,3 +135,220 @@ class SyncFlowTests(TestCase):
         
         conflict = NotebookConflict.objects.get(id=conflict_id)
         self.assertEqual(conflict.resolution_strategy, 'YOURS')
+
+    def test_auto_merged_conflict_is_stored_by_reference(self):
+        self._setup_data()
+        from apps.notebooks.models import NotebookVersion
+        sync_service = SyncService()
+        patch_service = PatchService()
+        NotebookVersion.objects.create(notebook=self.notebook, version_number=1, content=self.notebook.content, created_by=self.user)
+        session = EditingSessionService.start_editing_session(self.notebook, self.user)
+        base_content = self.notebook.content
+
+        server_content = 'Line 1\nLine 2\nLine 3 Modified Server'
+        self.notebook.content = server_content
+        self.notebook.version += 1
+        self.notebook.save()
+        NotebookVersion.objects.create(notebook=self.notebook, version_number=2, content=server_content, created_by=self.user)
+
+        client_content = 'Line 1 Modified Client\nLine 2\nLine 3'
+        patch = patch_service.generate_patch(session.base_content, client_content)
+        result = sync_service.apply_patch_to_notebook(
+            self.notebook.id, self.user, session.session_token, patch
+        )
+        self.assertEqual(result['status'], 'auto_merged')
+
+        conflict = NotebookConflict.objects.get(notebook=self.notebook)
+        self.assertEqual(conflict.resolution_strategy, 'AUTO_MERGED')
+        self.assertTrue(conflict.is_stored_by_reference)
+        self.assertEqual(conflict.base_content, '')
+        self.assertEqual(conflict.their_content, '')
+        self.assertEqual(conflict.your_content, '')
+        self.assertEqual(conflict.resolved_content, '')
+
+        sync_service.hydrate_conflict(conflict)
+        self.assertEqual(conflict.base_content, base_content)
+        self.assertEqual(conflict.their_content, server_content)
+        self.assertEqual(conflict.your_content, client_content)
+        self.assertEqual(conflict.resolved_content, result['content'])
+
+    def test_conflict_list_is_summarised_and_scoped(self):
+        self._setup_data()
+        from rest_framework.test import APIClient
+        NotebookConflict.objects.create(
+            notebook=self.notebook, user=self.user,
+            server_version=2, client_version=1,
+            base_content='base', your_content='yours', their_content='theirs',
+            conflict_blocks=[{'line_number': 1}], resolution_strategy='PENDING'
+        )
+        outsider = User.objects.create_user(username='outsider', email='out@example.com', password='password')
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/sync/conflicts/', {'notebook_id': self.notebook.id})
+        self.assertEqual(response.status_code, 200)
+        [row] = response.data['results']
+        self.assertEqual(row['block_count'], 1)
+        self.assertEqual(row['user_email'], self.user.email)
+        self.assertNotIn('your_content', row)
+
+        detail = client.get(f"/api/sync/conflicts/{row['id']}/")
+        self.assertEqual(detail.data['your_content'], 'yours')
+
+        client.force_authenticate(outsider)
+        self.assertEqual(client.get('/api/sync/conflicts/').data['results'], [])
+        self.assertEqual(client.get(f"/api/sync/conflicts/{row['id']}/").status_code, 404)
+
+    def test_resolve_conflict_by_blocks(self):
+        self._setup_data()
+        sync_service = SyncService()
+        patch_service = PatchService()
+        editor = User.objects.create_user(username='editor', email='editor@example.com', password='password')
+        WorkspaceMember.objects.create(workspace=self.workspace, user=editor, role='EDITOR')
+        self.notebook.content = 'Line 1\nLine 2\nLine 3\nLine 4'
+        self.notebook.save()
+
+        session = EditingSessionService.start_editing_session(self.notebook, editor)
+        self.notebook.content = 'Line 1 Server\nLine 2\nLine 3 Server\nLine 4'
+        self.notebook.version += 1
+        self.notebook.save()
+
+        client_content = 'Line 1 Client\nLine 2\nLine 3 Client\nLine 4 Client'
+        patch = patch_service.generate_patch(session.base_content, client_content)
+        result = sync_service.apply_patch_to_notebook(
+            self.notebook.id, editor, session.session_token, patch
+        )
+        conflict = NotebookConflict.objects.get(id=result['conflict_id'])
+        self.assertEqual([b['line_number'] for b in conflict.conflict_blocks], [1, 3])
+
+        missing = sync_service.resolve_conflict(conflict.id, self.user, 'BLOCKS', blocks=[
+            {'line_number': 1, 'choice': 'YOURS'},
+        ])
+        self.assertEqual(missing['status'], 'error')
+
+        resolved = sync_service.resolve_conflict(conflict.id, self.user, 'BLOCKS', blocks=[
+            {'line_number': 1, 'choice': 'YOURS'},
+            {'line_number': 3, 'content': 'Line 3 Both'},
+        ])
+        self.assertEqual(resolved['status'], 'resolved')
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Line 1 Client\nLine 2\nLine 3 Both\nLine 4 Client')
+
+    def test_pending_conflict_is_rebased_when_notebook_moves_on(self):
+        self._setup_data()
+        from django.test import override_settings
+        from apps.notebooks.models import NotebookVersion
+        sync_service = SyncService()
+        patch_service = PatchService()
+        editor = User.objects.create_user(username='rebaser', email='rebaser@example.com', password='password')
+        WorkspaceMember.objects.create(workspace=self.workspace, user=editor, role='EDITOR')
+
+        session = EditingSessionService.start_editing_session(self.notebook, editor)
+        self.notebook.content = 'Line 1 Server\nLine 2\nLine 3'
+        self.notebook.version += 1
+        self.notebook.save()
+
+        patch = patch_service.generate_patch(session.base_content, 'Line 1 Client\nLine 2\nLine 3')
+        result = sync_service.apply_patch_to_notebook(
+            self.notebook.id, editor, session.session_token, patch
+        )
+        conflict_id = result['conflict_id']
+
+        # The server edit is reverted, so the client change now merges cleanly
+        self.notebook.content = 'Line 1\nLine 2\nLine 3 Later'
+        self.notebook.version += 1
+        self.notebook.save()
+        with override_settings(SYNC_REBASE_IN_BACKGROUND=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                NotebookVersion.objects.create(
+                    notebook=self.notebook, version_number=self.notebook.version,
+                    content=self.notebook.content, created_by=self.user
+                )
+
+        conflict = NotebookConflict.objects.get(id=conflict_id)
+        self.assertEqual(conflict.resolution_strategy, 'AUTO_MERGED')
+        self.notebook.refresh_from_db()
+        self.assertEqual(self.notebook.content, 'Line 1 Client\nLine 2\nLine 3 Later')
+
+    def test_patch_reads_content_from_hot_document_cache(self):
+        self._setup_data()
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        patch_service = PatchService()
+        session = EditingSessionService.start_editing_session(self.notebook, self.user)
+
+        patch = patch_service.generate_patch(self.notebook.content, 'Line 1\nLine 2 Cached\nLine 3')
+        with CaptureQueriesContext(connection) as queries:
+            result = SyncService().apply_patch_to_notebook(
+                self.notebook.id, self.user, session.session_token, patch
+            )
+        self.assertEqual(result['status'], 'success')
+        content_reads = [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT') and '"notebooks_notebook"."content"' in q['sql']
+        ]
+        self.assertEqual(content_reads, [])
+
+        # A write outside the sync services changes the hash, so the cache is bypassed
+        Notebook.objects.filter(pk=self.notebook.pk).update(content='Replaced', content_hash='x')
+        session.refresh_from_db()
+        pull = SyncService().apply_patch_to_notebook(self.notebook.id, self.user, session.session_token, '')
+        self.assertEqual(pull['status'], 'no_changes')
+        patch = patch_service.generate_patch('Replaced', 'Replaced!')
+        result = SyncService().apply_patch_to_notebook(
+            self.notebook.id, self.user, session.session_token, patch
+        )
+        self.assertEqual(result['content'], 'Replaced!')
+
+    def test_idle_session_expires_and_heartbeat_keeps_it_alive(self):
+        self._setup_data()
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        session = EditingSessionService.start_editing_session(self.notebook, self.user)
+        editor = User.objects.create_user(username='editor', email='editor@example.com', password='password')
+        other = EditingSessionService.start_editing_session(self.notebook, editor)
+
+        # Heartbeats only bump last_activity; base_content is never rewritten
+        long_ago = timezone.now() - timedelta(minutes=10)
+        EditingSession.objects.filter(pk=session.pk).update(last_activity=long_ago, base_content='frozen')
+        self.assertTrue(EditingSessionService.heartbeat(self.notebook, self.user, session.session_token))
+        session.refresh_from_db()
+        self.assertGreater(session.last_activity, long_ago)
+        self.assertEqual(session.base_content, 'frozen')
+
+        with self.settings(EDITING_SESSION_TTL=60):
+            EditingSession.objects.filter(pk=session.pk).update(last_activity=long_ago)
+            result = SyncService().apply_patch_to_notebook(self.notebook.id, self.user, session.session_token, '')
+            self.assertEqual(result['status'], 'error')
+            session.refresh_from_db()
+            self.assertFalse(session.is_active)
+
+            EditingSession.objects.filter(pk=other.pk).update(last_activity=long_ago)
+            EditingSession.objects.filter(pk=session.pk).update(last_activity=timezone.now() - timedelta(days=30))
+            call_command('cleanup_editing_sessions', stdout=io.StringIO())
+        self.assertFalse(EditingSession.objects.filter(pk=session.pk).exists())
+        self.assertFalse(EditingSession.objects.get(pk=other.pk).is_active)
+
+    def test_presence_lists_current_editors(self):
+        self._setup_data()
+        from rest_framework.test import APIClient
+        from apps.sync.presence import presence
+        presence.clear()
+        self.addCleanup(presence.clear)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/sync/notebooks/{self.notebook.id}/presence/'
+
+        session = EditingSessionService.start_editing_session(self.notebook, self.user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['email'] for e in response.data['editors']], ['test@example.com'])
+
+        client.post(f'/api/sync/notebooks/{self.notebook.id}/heartbeat/',
+                    {'session_token': str(session.session_token), 'end': True}, format='json')
+        self.assertEqual(client.get(url).data['editors'], [])
+
+        outsider = User.objects.create_user(username='outsider', email='out@example.com', password='password')
+        client.force_authenticate(outsider)
+        self.assertEqual(client.get(url).status_code, 403)
@@ -1,14 +1,19 @@
 from django.urls import path
 from apps.sync.views import (
-    StartEditingView, ApplyPatchView,
-    ConflictListView, ConflictDetailView, ResolveConflictView, CheckVersionView
+    StartEditingView, ApplyPatchView, SessionHeartbeatView, NotebookPresenceView,
+    ConflictListView, ConflictDetailView, ResolveConflictView, CheckVersionView,
+    RealtimeJoinView, RealtimeOperationsView
 )
 
 urlpatterns = [
     path('notebooks/<int:notebook_id>/edit/', StartEditingView.as_view(), name='start-editing'),
     path('notebooks/<int:notebook_id>/apply-patch/', ApplyPatchView.as_view(), name='apply-patch'),
+    path('notebooks/<int:notebook_id>/heartbeat/', SessionHeartbeatView.as_view(), name='session-heartbeat'),
+    path('notebooks/<int:notebook_id>/presence/', NotebookPresenceView.as_view(), name='notebook-presence'),
     path('conflicts/', ConflictListView.as_view(), name='conflict-list'),
     path('conflicts/<int:conflict_id>/', ConflictDetailView.as_view(), name='conflict-detail'),
     path('conflicts/<int:conflict_id>/resolve/', ResolveConflictView.as_view(), name='resolve-conflict'),
     path('notebooks/<int:notebook_id>/check-version/', CheckVersionView.as_view(), name='check-version'),
+    path('notebooks/<int:notebook_id>/realtime/join/', RealtimeJoinView.as_view(), name='realtime-join'),
+    path('notebooks/<int:notebook_id>/realtime/operations/', RealtimeOperationsView.as_view(), name='realtime-operations'),
 ]
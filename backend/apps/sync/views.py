@@ -1,15 +1,20 @@
+from datetime import datetime, timezone as dt_timezone
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from apps.notebooks.models import Notebook
 from apps.sync.models import NotebookConflict
+from apps.notebooks.permissions import CanAccessNotebook
 from apps.sync.services import EditingSessionService, SyncService
+from apps.sync.realtime import RealtimeSyncService
+from apps.sync.presence import presence
 from apps.sync.serializers import (
-    StartEditingSerializer, ApplyPatchSerializer, 
-    ConflictSerializer, ResolveConflictSerializer
+    StartEditingSerializer, ApplyPatchSerializer, SessionHeartbeatSerializer, RealtimeOperationSerializer,
+    ConflictSerializer, ConflictSummarySerializer, ResolveConflictSerializer
 )
 # Assuming CanEditNotebook permission exists or needs to be imported/created
 # If it doesn't exist, we might need to use a standard permission or create one.
@@ -69,19 +74,73 @@ class ApplyPatchView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class SessionHeartbeatView(APIView):
+    """Keeps an editing session alive between patches, or ends it with end=true"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, notebook_id):
+        serializer = SessionHeartbeatSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        notebook = get_object_or_404(Notebook.objects.only('id'), id=notebook_id)
+        session_token = serializer.validated_data['session_token']
+        if serializer.validated_data['end']:
+            EditingSessionService.end_session(notebook, request.user, session_token)
+            return Response({'status': 'ended'})
+
+        if not EditingSessionService.heartbeat(notebook, request.user, session_token):
+            return Response(
+                {'status': 'expired', 'message': 'Invalid or expired editing session'},
+                status=status.HTTP_410_GONE
+            )
+        return Response({'status': 'active'})
+
+class NotebookPresenceView(APIView):
+    """Users with a live editing session on the notebook, from the in-memory registry"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, notebook_id):
+        notebook = get_object_or_404(Notebook.objects.only('id', 'workspace_id'), id=notebook_id)
+        if not CanAccessNotebook().has_object_permission(request, self, notebook):
+            self.permission_denied(request)
+
+        editors = presence.editors(notebook.id)
+        for editor in editors:
+            editor['last_seen'] = datetime.fromtimestamp(editor['last_seen'], tz=dt_timezone.utc).isoformat()
+        return Response({'notebook_id': notebook.id, 'editors': editors})
+
+def member_notebooks(user):
+    """Notebooks in workspaces the user belongs to"""
+    return Notebook.objects.filter(workspace__members__user=user)
+
+class ConflictPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
 class ConflictListView(ListAPIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = ConflictSerializer
-    pagination_class = None
+    serializer_class = ConflictSummarySerializer
+    pagination_class = ConflictPagination
 
     def get_queryset(self):
-        queryset = NotebookConflict.objects.filter(
-            resolution_strategy='PENDING'
-        )
+        notebooks = member_notebooks(self.request.user)
         notebook_id = self.request.query_params.get('notebook_id')
         if notebook_id:
-            queryset = queryset.filter(notebook_id=notebook_id)
-        return queryset
+            notebooks = notebooks.filter(id=notebook_id)
+
+        # notebook IN (...) AND resolution_strategy = 'PENDING' hits the
+        # (notebook, resolution_strategy) index; bodies are only sent by the detail view
+        return NotebookConflict.objects.filter(
+            notebook__in=notebooks.values('id'),
+            resolution_strategy='PENDING'
+        ).select_related('notebook', 'user').defer(
+            'base_content', 'your_content', 'their_content',
+            'resolved_content', 'client_patch',
+            'notebook__content'
+        )
 
 class ConflictDetailView(RetrieveAPIView):
     permission_classes = [IsAuthenticated]
@@ -90,7 +149,13 @@ class ConflictDetailView(RetrieveAPIView):
     lookup_url_kwarg = 'conflict_id'
 
     def get_queryset(self):
-        return NotebookConflict.objects.all()
+        return NotebookConflict.objects.filter(
+            notebook__in=member_notebooks(self.request.user).values('id')
+        ).select_related('notebook')
+
+    def get_object(self):
+        # Auto-resolved conflicts only keep version references; rebuild their text
+        return SyncService().hydrate_conflict(super().get_object())
 
 class ResolveConflictView(APIView):
     permission_classes = [IsAuthenticated]
@@ -103,7 +168,8 @@ class ResolveConflictView(APIView):
                 conflict_id,
                 request.user,
                 serializer.validated_data['resolution_strategy'],
-                serializer.validated_data.get('final_content')
+                serializer.validated_data.get('final_content'),
+                serializer.validated_data.get('blocks')
             )
             
             if result['status'] == 'error':
@@ -130,3 +196,68 @@ class CheckVersionView(APIView):
             'last_modified_by': notebook.last_modified_by.id if notebook.last_modified_by else None,
             'pending_conflicts': pending_conflicts
         })
+
+class RealtimeNotebookMixin:
+    permission_classes = [IsAuthenticated]
+
+    def get_realtime_notebook(self, request, notebook_id, permission):
+        notebook = get_object_or_404(Notebook, id=notebook_id, is_deleted=False)
+        if not permission().has_object_permission(request, self, notebook):
+            self.permission_denied(request)
+        if notebook.sync_mode != 'REALTIME':
+            return None
+        return notebook
+
+    def not_realtime(self):
+        return Response(
+            {'status': 'error', 'message': 'Notebook is not in real-time mode'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+class RealtimeJoinView(RealtimeNotebookMixin, APIView):
+    def post(self, request, notebook_id):
+        notebook = self.get_realtime_notebook(request, notebook_id, CanAccessNotebook)
+        if notebook is None:
+            return self.not_realtime()
+        return Response(RealtimeSyncService().join(notebook))
+
+class RealtimeOperationsView(RealtimeNotebookMixin, APIView):
+    """GET pulls operations after ?since=<revision>, POST submits one operation"""
+
+    def get(self, request, notebook_id):
+        notebook = self.get_realtime_notebook(request, notebook_id, CanAccessNotebook)
+        if notebook is None:
+            return self.not_realtime()
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response({'status': 'error', 'message': 'since must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = RealtimeSyncService().operations_since(
+            notebook, request.query_params.get('document_id'), since
+        )
+        if result['status'] == 'rejoin':
+            return Response(result, status=status.HTTP_409_CONFLICT)
+        return Response(result)
+
+    def post(self, request, notebook_id):
+        notebook = self.get_realtime_notebook(request, notebook_id, CanEditNotebook)
+        if notebook is None:
+            return self.not_realtime()
+
+        serializer = RealtimeOperationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = RealtimeSyncService().submit(
+            notebook,
+            request.user,
+            serializer.validated_data['document_id'],
+            serializer.validated_data['revision'],
+            serializer.validated_data['operation']
+        )
+        if result['status'] == 'rejoin':
+            return Response(result, status=status.HTTP_409_CONFLICT)
+        if result['status'] == 'error':
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
@@ -0,0 +1,308 @@
+"""
+Workspace archives: a zip of JSON Lines files, one record per line.
+
+    manifest.json           format version and the workspace itself
+    members.jsonl           {"email", "role"}
+    labels.jsonl            {"id", "name", "color", "description", ...}
+    notebooks.jsonl         {"id", "title", "content", "version", ...}
+    notebook_labels.jsonl   {"notebook_id", "label_id"}
+    versions.jsonl          {"notebook_id", "version_number", "content", ...}
+    activity.jsonl          {"action_type", "target_type", "target_id", ...}
+
+Users are referenced by email so an archive can move between instances. The
+export reads every table with iterator() and hands out compressed chunks as
+they fill, so memory stays flat however large the workspace is; the import
+reads the files back line by line and inserts in batches.
+"""
+import json
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.activity.models import ActivityLog
+from apps.labels.models import Label, NotebookLabel
+from apps.notebooks.models import Notebook, NotebookVersion
+from .models import Workspace, WorkspaceMember
+
+ARCHIVE_FORMAT = 1
+CHUNK_SIZE = 256 * 1024
+ITERATOR_CHUNK_SIZE = 2000
+
+User = get_user_model()
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class _ChunkWriter:
+    """Write-only file object for ZipFile that hands back what was written so far"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def _tables(workspace):
+    """(file name, iterable of dicts) for every table in the archive"""
+    yield 'members.jsonl', (
+        WorkspaceMember.objects.filter(workspace=workspace)
+        .values('role', email=F('user__email'))
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    yield 'labels.jsonl', (
+        Label.objects.filter(workspace=workspace)
+        .values('id', 'name', 'color', 'description', 'created_at', created_by_email=F('created_by__email'))
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    yield 'notebooks.jsonl', (
+        Notebook.objects.filter(workspace=workspace)
+        .order_by('id')
+        .values(
+            'id', 'title', 'content', 'version', 'sync_mode', 'is_deleted', 'deleted_at',
+            'created_at', 'updated_at',
+            created_by_email=F('created_by__email'),
+            last_modified_by_email=F('last_modified_by__email'),
+        )
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    yield 'notebook_labels.jsonl', (
+        NotebookLabel.objects.filter(notebook__workspace=workspace)
+        .values('notebook_id', 'label_id')
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    yield 'versions.jsonl', (
+        NotebookVersion.objects.filter(notebook__workspace=workspace)
+        .order_by('notebook_id', 'version_number')
+        .values(
+            'notebook_id', 'version_number', 'content', 'content_diff', 'change_summary', 'created_at',
+            restored_from_version=F('restored_from__version_number'),
+            created_by_email=F('created_by__email'),
+        )
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    yield 'activity.jsonl', (
+        ActivityLog.objects.filter(workspace=workspace)
+        .order_by('created_at', 'id')
+        .values(
+            'action_type', 'target_type', 'target_id', 'target_title', 'metadata', 'action_display',
+            'created_at', actor_email=F('actor__email'),
+        )
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+
+
+def export_workspace_archive(workspace):
+    """Generator of zip archive bytes for a workspace, for StreamingHttpResponse"""
+    buffer = _ChunkWriter()
+    manifest = {
+        'format': ARCHIVE_FORMAT,
+        'exported_at': timezone.now(),
+        'workspace': {
+            'name': workspace.name,
+            'slug': workspace.slug,
+            'description': workspace.description,
+            'owner_email': workspace.owner.email,
+            'created_at': workspace.created_at,
+        },
+    }
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('manifest.json', json.dumps(manifest, cls=DjangoJSONEncoder, indent=2))
+        for name, rows in _tables(workspace):
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for row in rows:
+                    member.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+                    if buffer.size >= CHUNK_SIZE:
+                        yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _read_jsonl(archive, name):
+    if name not in archive.namelist():
+        return
+    with archive.open(name) as member:
+        for line in member:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _Users:
+    """Email -> user id, looked up once per distinct email"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def get(self, email):
+        if not email:
+            return None
+        if email not in self._ids:
+            self._ids[email] = User.objects.filter(email=email).values_list('id', flat=True).first()
+        return self._ids[email]
+
+
+def _restore_timestamps(model, objects, rows, fields):
+    """bulk_create applies auto_now/auto_now_add, so put the archived values back"""
+    for obj, row in zip(objects, rows):
+        for field in fields:
+            if row.get(field):
+                setattr(obj, field, parse_datetime(row[field]))
+    model.objects.bulk_update(objects, fields)
+
+
+@transaction.atomic
+def import_workspace_archive(file, owner, name=None, batch_size=1000):
+    """Create a new workspace owned by `owner` from an archive; returns (workspace, counts)"""
+    with zipfile.ZipFile(file) as archive:
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+        except KeyError:
+            raise ArchiveError("Not a workspace archive: manifest.json is missing")
+        if manifest.get('format') != ARCHIVE_FORMAT:
+            raise ArchiveError(f"Unsupported archive format {manifest.get('format')!r}")
+
+        users = _Users()
+        counts = {}
+        workspace = Workspace.objects.create(
+            name=name or manifest['workspace']['name'],
+            description=manifest['workspace'].get('description', ''),
+            owner=owner,
+        )
+
+        members = [
+            WorkspaceMember(workspace=workspace, user_id=users.get(row['email']), role=row['role'])
+            for row in _read_jsonl(archive, 'members.jsonl')
+            if users.get(row['email']) not in (None, owner.id)
+        ]
+        WorkspaceMember.objects.bulk_create(members, ignore_conflicts=True)
+        counts['members'] = len(members)
+
+        label_ids = {}
+        for rows in _batches(_read_jsonl(archive, 'labels.jsonl'), batch_size):
+            labels = Label.objects.bulk_create([
+                Label(
+                    workspace=workspace, name=row['name'], color=row['color'],
+                    description=row['description'], created_by_id=users.get(row['created_by_email'])
+                )
+                for row in rows
+            ])
+            label_ids.update((row['id'], label.id) for row, label in zip(rows, labels))
+        counts['labels'] = len(label_ids)
+
+        notebook_ids = {}
+        for rows in _batches(_read_jsonl(archive, 'notebooks.jsonl'), batch_size):
+            notebooks = []
+            for row in rows:
+                notebook = Notebook(
+                    workspace=workspace,
+                    title=row['title'],
+                    content=row['content'],
+                    version=row['version'],
+                    sync_mode=row['sync_mode'],
+                    is_deleted=row['is_deleted'],
+                    deleted_at=parse_datetime(row['deleted_at']) if row['deleted_at'] else None,
+                    created_by_id=users.get(row['created_by_email']) or owner.id,
+                    last_modified_by_id=users.get(row['last_modified_by_email']),
+                )
+                notebook.content_hash = Notebook.compute_content_hash(notebook.content)
+                notebooks.append(notebook)
+            notebooks = Notebook.objects.bulk_create(notebooks)
+            _restore_timestamps(Notebook, notebooks, rows, ['created_at', 'updated_at'])
+            notebook_ids.update((row['id'], notebook.id) for row, notebook in zip(rows, notebooks))
+        counts['notebooks'] = len(notebook_ids)
+
+        counts['notebook_labels'] = 0
+        for rows in _batches(_read_jsonl(archive, 'notebook_labels.jsonl'), batch_size):
+            created = NotebookLabel.objects.bulk_create([
+                NotebookLabel(notebook_id=notebook_ids[row['notebook_id']], label_id=label_ids[row['label_id']])
+                for row in rows
+                if row['notebook_id'] in notebook_ids and row['label_id'] in label_ids
+            ])
+            counts['notebook_labels'] += len(created)
+
+        counts['versions'] = 0
+        restorations = []
+        for rows in _batches(_read_jsonl(archive, 'versions.jsonl'), batch_size):
+            rows = [row for row in rows if row['notebook_id'] in notebook_ids]
+            versions = NotebookVersion.objects.bulk_create([
+                NotebookVersion(
+                    notebook_id=notebook_ids[row['notebook_id']],
+                    version_number=row['version_number'],
+                    content=row['content'],
+                    content_diff=row['content_diff'],
+                    change_summary=row['change_summary'],
+                    created_by_id=users.get(row['created_by_email']),
+                )
+                for row in rows
+            ])
+            _restore_timestamps(NotebookVersion, versions, rows, ['created_at'])
+            restorations.extend(
+                (version, row['restored_from_version'])
+                for version, row in zip(versions, rows) if row['restored_from_version']
+            )
+            counts['versions'] += len(versions)
+        # Restores are rare, so link them up one by one once every version exists
+        for version, restored_from in restorations:
+            NotebookVersion.objects.filter(pk=version.pk).update(
+                restored_from=NotebookVersion.objects.filter(
+                    notebook_id=version.notebook_id, version_number=restored_from
+                ).values('pk')[:1]
+            )
+
+        target_ids = {'Notebook': notebook_ids, 'Label': label_ids}
+        counts['activity'] = 0
+        for rows in _batches(_read_jsonl(archive, 'activity.jsonl'), batch_size):
+            activities = []
+            for row in rows:
+                target_id = row['target_id']
+                if row['target_type'] == 'Workspace':
+                    target_id = workspace.id
+                elif row['target_type'] in target_ids:
+                    target_id = target_ids[row['target_type']].get(target_id)
+                activities.append(ActivityLog(
+                    workspace=workspace,
+                    actor_id=users.get(row['actor_email']),
+                    action_type=row['action_type'],
+                    target_type=row['target_type'],
+                    target_id=target_id,
+                    target_title=row['target_title'],
+                    metadata=row['metadata'],
+                    action_display=row.get('action_display') or ActivityLog.describe(
+                        row['actor_email'] or 'Unknown User', row['action_type'], row['target_title']
+                    ),
+                ))
+            activities = ActivityLog.objects.bulk_create(activities)
+            _restore_timestamps(ActivityLog, activities, rows, ['created_at'])
+            counts['activity'] += len(activities)
+
+    return workspace, counts
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.workspaces.archive import ArchiveError, import_workspace_archive
+
+
+class Command(BaseCommand):
+    help = "Create a workspace from an archive downloaded from /api/workspaces/<id>/export/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help="Path to the exported .zip")
+        parser.add_argument('--owner', required=True, help="Email of the user who will own the workspace")
+        parser.add_argument('--name', help="Workspace name (defaults to the exported name)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(email=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}")
+
+        try:
+            with open(options['archive'], 'rb') as file:
+                workspace, counts = import_workspace_archive(
+                    file, owner, name=options['name'], batch_size=options['batch_size']
+                )
+        except ArchiveError as e:
+            raise CommandError(str(e))
+
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(f"Imported workspace {workspace.id} ({workspace.slug}): {summary}")
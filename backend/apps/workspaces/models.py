@@ -1,8 +1,20 @@
-from django.db import models
+import random
+import re
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
 from django.conf import settings
 from django.utils.text import slugify
 
 class Workspace(models.Model):
+    # Leave room for a "-<n>" suffix within the column's 50 characters
+    SLUG_BASE_LENGTH = 40
+    SLUG_ATTEMPTS = 5
+    # At most 9 digits: fits the remaining 10 characters and a 32-bit integer cast
+    SLUG_SUFFIX_DIGITS = 9
+    SLUG_MAX_SUFFIX = 10 ** SLUG_SUFFIX_DIGITS - 1
+
     name = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField(blank=True)
@@ -10,25 +22,67 @@ class Workspace(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def slug_base(cls, name):
+        return slugify(name)[:cls.SLUG_BASE_LENGTH].strip('-') or 'workspace'
+
+    @classmethod
+    def next_slug_suffix(cls, base_slug):
+        """
+        0 if base_slug is free, else one more than the highest "<base>-<n>" in
+        use, found with a single query rather than probing n = 1, 2, ...
+
+        Longer numeric suffixes are ignored, and once SLUG_MAX_SUFFIX itself is
+        taken a random suffix is used instead; save() retries if it collides.
+        """
+        suffix_pattern = rf'^{re.escape(base_slug)}-[0-9]{{1,{cls.SLUG_SUFFIX_DIGITS}}}$'
+        result = cls.objects.filter(
+            Q(slug=base_slug) | Q(slug__startswith=f'{base_slug}-', slug__regex=suffix_pattern)
+        ).aggregate(
+            base_taken=Count('pk', filter=Q(slug=base_slug)),
+            max_suffix=Max(
+                Cast(Substr('slug', len(base_slug) + 2), IntegerField()),
+                filter=~Q(slug=base_slug)
+            ),
+        )
+        if not result['base_taken'] and result['max_suffix'] is None:
+            return 0
+        suffix = (result['max_suffix'] or 0) + 1
+        if suffix > cls.SLUG_MAX_SUFFIX:
+            # Leaves room for a bulk create to count up from it
+            suffix = random.randint(1, cls.SLUG_MAX_SUFFIX // 2)
+        return suffix
+
+    @classmethod
+    def generate_slug(cls, name):
+        base_slug = cls.slug_base(name)
+        suffix = cls.next_slug_suffix(base_slug)
+        return f"{base_slug}-{suffix}" if suffix else base_slug
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            counter = 1
-            while Workspace.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        if is_new:
-            WorkspaceMember.objects.create(
-                workspace=self,
-                user=self.owner,
-                role='OWNER'
-            )
+        generate_slug = not self.slug
+
+        for attempt in range(self.SLUG_ATTEMPTS):
+            if generate_slug:
+                self.slug = self.generate_slug(self.name)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                    if is_new:
+                        WorkspaceMember.objects.create(
+                            workspace=self,
+                            user=self.owner,
+                            role='OWNER'
+                        )
+                return
+            except IntegrityError:
+                # Another workspace took the slug between our query and insert
+                if is_new:
+                    self.pk = None
+                retry = generate_slug and attempt < self.SLUG_ATTEMPTS - 1
+                if not retry or not Workspace.objects.filter(slug=self.slug).exists():
+                    raise
 
     def __str__(self):
         return self.name
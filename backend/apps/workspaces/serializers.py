@@ -73,3 +73,99 @@ class AddMemberSerializer(serializers.Serializer):
         if not User.objects.filter(email=value).exists():
             raise serializers.ValidationError("User with this email does not exist.")
         return value
+
+class ProvisionMemberSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    role = serializers.ChoiceField(choices=[r for r in WorkspaceMember.ROLE_CHOICES if r[0] != 'OWNER'])
+
+class ProvisionWorkspaceSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    owner_email = serializers.EmailField(required=False)
+    members = ProvisionMemberSerializer(many=True, required=False, default=list)
+
+class BulkWorkspaceProvisionSerializer(serializers.Serializer):
+    """
+    Creates many workspaces, with their owners and members, in a handful of
+    queries: one user lookup, one slug query per distinct name and one
+    bulk_create each for workspaces, memberships and activity.
+    """
+    workspaces = ProvisionWorkspaceSerializer(many=True, allow_empty=False, max_length=200)
+
+    def validate(self, data):
+        request_user = self.context['request'].user
+        emails = {w.get('owner_email') for w in data['workspaces']} - {None}
+        emails |= {m['email'] for w in data['workspaces'] for m in w['members']}
+        users = {u.email: u for u in User.objects.filter(email__in=emails)}
+        missing = sorted(emails - set(users))
+        if missing:
+            raise serializers.ValidationError({'workspaces': f"Users do not exist: {', '.join(missing)}"})
+
+        for workspace in data['workspaces']:
+            workspace['owner'] = users[workspace['owner_email']] if workspace.get('owner_email') else request_user
+            workspace['members'] = [
+                (users[m['email']], m['role']) for m in workspace['members']
+                if users[m['email']] != workspace['owner']
+            ]
+        return data
+
+    def _allocate_slugs(self, names):
+        """Unique slugs for a batch, including names that repeat within it"""
+        next_suffix = {}
+        slugs = []
+        for name in names:
+            base_slug = Workspace.slug_base(name)
+            if base_slug not in next_suffix:
+                next_suffix[base_slug] = Workspace.next_slug_suffix(base_slug)
+            suffix = next_suffix[base_slug]
+            next_suffix[base_slug] = suffix + 1
+            slugs.append(f"{base_slug}-{suffix}" if suffix else base_slug)
+        return slugs
+
+    def create(self, validated_data):
+        from django.db import IntegrityError, transaction
+        from apps.activity.models import ActivityLog
+        from apps.activity.services import ActivityService
+
+        specs = validated_data['workspaces']
+        # Workspaces, their memberships and activity are written together: a workspace
+        # without its OWNER membership would be unreachable
+        with transaction.atomic():
+            for attempt in range(Workspace.SLUG_ATTEMPTS):
+                slugs = self._allocate_slugs([spec['name'] for spec in specs])
+                try:
+                    # A savepoint, so a slug collision rolls back only this insert
+                    with transaction.atomic():
+                        # bulk_create skips Workspace.save, so owners are added below
+                        workspaces = Workspace.objects.bulk_create([
+                            Workspace(name=spec['name'], slug=slug, description=spec['description'], owner=spec['owner'])
+                            for spec, slug in zip(specs, slugs)
+                        ])
+                        break
+                except IntegrityError:
+                    # A concurrent create took one of the slugs; allocate again
+                    if attempt == Workspace.SLUG_ATTEMPTS - 1:
+                        raise
+
+            actor = self.context['request'].user
+            memberships = []
+            for workspace, spec in zip(workspaces, specs):
+                memberships.append(WorkspaceMember(workspace=workspace, user=spec['owner'], role='OWNER'))
+                memberships.extend(
+                    WorkspaceMember(workspace=workspace, user=user, role=role, invited_by=actor)
+                    for user, role in spec['members']
+                )
+            WorkspaceMember.objects.bulk_create(memberships, ignore_conflicts=True)
+
+            ActivityService.log_many([
+                ActivityService.build_activity(
+                    workspace=workspace,
+                    actor=actor,
+                    action_type=ActivityLog.WORKSPACE_CREATED,
+                    target_type='Workspace',
+                    target_id=workspace.id,
+                    target_title=workspace.name
+                )
+                for workspace in workspaces
+            ])
+        return workspaces
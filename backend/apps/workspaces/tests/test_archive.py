@@ -0,0 +1,76 @@
+import io
+import zipfile
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.activity.models import ActivityLog
+from apps.activity.signals import log_notebook_activity, log_member_activity
+from apps.labels.models import Label, NotebookLabel
+from apps.notebooks.models import Notebook, NotebookVersion
+from apps.workspaces.archive import import_workspace_archive
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class WorkspaceArchiveTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_notebook_activity, sender=Notebook)
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_notebook_activity, sender=Notebook)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.editor = User.objects.create_user(username='editor', email='editor@example.com', password='password')
+        self.workspace = Workspace.objects.create(name='Exported', owner=self.owner)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.editor, role='EDITOR')
+        label = Label.objects.create(workspace=self.workspace, name='todo')
+        for i in range(3):
+            notebook = Notebook.objects.create(
+                title=f'Note {i}', content=f'text {i}', version=2,
+                workspace=self.workspace, created_by=self.editor
+            )
+            NotebookVersion.objects.create(notebook=notebook, version_number=1, content='draft')
+            NotebookVersion.objects.create(notebook=notebook, version_number=2, content=f'text {i}')
+            NotebookLabel.objects.create(notebook=notebook, label=label)
+            ActivityLog.objects.create(
+                workspace=self.workspace, actor=self.editor, action_type=ActivityLog.NOTEBOOK_CREATED,
+                target_type='Notebook', target_id=notebook.id, target_title=notebook.title
+            )
+
+    def export(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f'/api/workspaces/{self.workspace.id}/export/')
+
+    def test_export_streams_and_imports_into_a_new_workspace(self):
+        response = self.export(self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        data = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(len(archive.read('notebooks.jsonl').splitlines()), 3)
+
+        workspace, counts = import_workspace_archive(io.BytesIO(data), self.owner, name='Imported', batch_size=2)
+        self.assertEqual(counts['notebooks'], 3)
+        self.assertEqual(counts['versions'], 6)
+        self.assertEqual(
+            sorted(Notebook.objects.filter(workspace=workspace).values_list('title', 'content', 'created_by__email')),
+            [(f'Note {i}', f'text {i}', 'editor@example.com') for i in range(3)]
+        )
+        imported = Notebook.objects.get(workspace=workspace, title='Note 0')
+        self.assertEqual(imported.content_hash, Notebook.compute_content_hash('text 0'))
+        self.assertEqual(list(imported.notebook_labels.values_list('label__name', flat=True)), ['todo'])
+        self.assertEqual(
+            set(WorkspaceMember.objects.filter(workspace=workspace).values_list('user__email', 'role')),
+            {('owner@example.com', 'OWNER'), ('editor@example.com', 'EDITOR')}
+        )
+        activity = ActivityLog.objects.filter(workspace=workspace)
+        self.assertEqual(
+            set(activity.values_list('target_id', flat=True)),
+            set(Notebook.objects.filter(workspace=workspace).values_list('id', flat=True))
+        )
+
+    def test_export_requires_owner_or_admin(self):
+        self.assertEqual(self.export(self.editor).status_code, 403)
@@ -0,0 +1,97 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.activity.models import ActivityLog
+from apps.activity.signals import log_member_activity
+from apps.workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+
+class WorkspaceSlugTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        self.user = User.objects.create_user(username='slugs', email='slugs@example.com', password='password')
+
+    def test_suffix_follows_highest_existing(self):
+        Workspace.objects.create(name='Team', owner=self.user)
+        Workspace.objects.create(name='Team alpha', owner=self.user)
+        Workspace.objects.create(name='Team', slug='team-7', owner=self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(Workspace.generate_slug('Team'), 'team-8')
+        self.assertEqual(Workspace.generate_slug('!!!'), 'workspace')
+        self.assertEqual(len(Workspace.generate_slug('x' * 300)), 40)
+
+    def test_oversized_suffixes_do_not_break_slugs(self):
+        Workspace.objects.create(name='Team', owner=self.user)
+        # Would overflow an integer cast of the suffix on PostgreSQL
+        Workspace.objects.create(name='Team 99999999999', owner=self.user)
+        self.assertEqual(Workspace.generate_slug('Team'), 'team-1')
+
+        Workspace.objects.create(name='Team 999999999', owner=self.user)
+        workspace = Workspace.objects.create(name='Team', owner=self.user)
+        self.assertRegex(workspace.slug, r'^team-[0-9]{1,9}$')
+        self.assertNotEqual(workspace.slug, 'team-999999999')
+
+        long_name = 'x' * 40
+        Workspace.objects.create(name=long_name, owner=self.user)
+        Workspace.objects.create(name=long_name, slug=f'{long_name}-999999999', owner=self.user)
+        slug = Workspace.generate_slug(long_name)
+        self.assertLessEqual(len(slug), Workspace._meta.get_field('slug').max_length)
+
+    def test_slug_taken_concurrently_is_retried(self):
+        Workspace.objects.create(name='Team', owner=self.user)
+        real = Workspace.next_slug_suffix
+        # The first allocation misses a workspace created after our query
+        with mock.patch.object(Workspace, 'next_slug_suffix', side_effect=[0, real('team')]):
+            workspace = Workspace.objects.create(name='Team', owner=self.user)
+        self.assertEqual(workspace.slug, 'team-1')
+        self.assertTrue(WorkspaceMember.objects.filter(workspace=workspace, role='OWNER').exists())
+
+
+class WorkspaceProvisionTests(TestCase):
+    def setUp(self):
+        post_save.disconnect(log_member_activity, sender=WorkspaceMember)
+        self.addCleanup(post_save.connect, log_member_activity, sender=WorkspaceMember)
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password', is_staff=True)
+        self.lead = User.objects.create_user(username='lead', email='lead@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_provisions_many_workspaces(self):
+        Workspace.objects.create(name='Sales', owner=self.admin)
+        payload = {'workspaces': [
+            {'name': 'Sales', 'owner_email': 'lead@example.com'},
+            {'name': 'Sales', 'members': [{'email': 'lead@example.com', 'role': 'EDITOR'}]},
+            {'name': 'Support'},
+        ]}
+        response = self.client.post('/api/workspaces/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([w['slug'] for w in response.data['workspaces']], ['sales-1', 'sales-2', 'support'])
+
+        first, second, _ = [Workspace.objects.get(id=w['id']) for w in response.data['workspaces']]
+        self.assertEqual(first.owner, self.lead)
+        self.assertEqual(
+            set(second.members.values_list('user__email', 'role')),
+            {('admin@example.com', 'OWNER'), ('lead@example.com', 'EDITOR')}
+        )
+        self.assertEqual(ActivityLog.objects.filter(action_type=ActivityLog.WORKSPACE_CREATED).count(), 3)
+
+    def test_unknown_users_and_non_staff_are_rejected(self):
+        response = self.client.post(
+            '/api/workspaces/bulk/', {'workspaces': [{'name': 'X', 'owner_email': 'nobody@example.com'}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(self.lead)
+        response = self.client.post('/api/workspaces/bulk/', {'workspaces': [{'name': 'X'}]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_failed_provisioning_leaves_no_workspaces(self):
+        with mock.patch('apps.activity.services.ActivityService.log_many', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/workspaces/bulk/', {'workspaces': [{'name': 'Orphan'}]}, format='json')
+        self.assertFalse(Workspace.objects.filter(name='Orphan').exists())
@@ -1,12 +1,14 @@
 from django.urls import path
 from .views import (
-    WorkspaceListCreateView, WorkspaceDetailView, WorkspaceMembersView,
-    AddWorkspaceMemberView, UpdateMemberRoleView, RemoveMemberView
+    WorkspaceListCreateView, WorkspaceBulkProvisionView, WorkspaceDetailView, WorkspaceMembersView,
+    AddWorkspaceMemberView, UpdateMemberRoleView, RemoveMemberView, WorkspaceExportView
 )
 
 urlpatterns = [
     path('', WorkspaceListCreateView.as_view(), name='workspace-list-create'),
+    path('bulk/', WorkspaceBulkProvisionView.as_view(), name='workspace-bulk-provision'),
     path('<int:pk>/', WorkspaceDetailView.as_view(), name='workspace-detail'),
+    path('<int:pk>/export/', WorkspaceExportView.as_view(), name='workspace-export'),
     path('<int:pk>/members/', WorkspaceMembersView.as_view(), name='workspace-members'),
     path('<int:pk>/members/add/', AddWorkspaceMemberView.as_view(), name='add-workspace-member'),
     path('<int:pk>/members/<int:user_id>/update/', UpdateMemberRoleView.as_view(), name='update-member-role'),
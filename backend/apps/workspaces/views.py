@@ -1,12 +1,14 @@
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from .models import Workspace, WorkspaceMember
 from .serializers import (
     WorkspaceListSerializer, WorkspaceDetailSerializer, WorkspaceCreateSerializer,
-    WorkspaceMemberSerializer, AddMemberSerializer
+    WorkspaceMemberSerializer, AddMemberSerializer, BulkWorkspaceProvisionSerializer
 )
+from .archive import export_workspace_archive
 from .permissions import IsWorkspaceOwner, IsWorkspaceOwnerOrAdmin, IsWorkspaceMember, CanEditWorkspace
 
 User = get_user_model()
@@ -34,6 +36,19 @@ class WorkspaceListCreateView(generics.ListCreateAPIView):
         response_serializer = WorkspaceListSerializer(serializer.instance, context=self.get_serializer_context())
         return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+class WorkspaceBulkProvisionView(views.APIView):
+    """Staff-only onboarding: create many workspaces with owners and members at once"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = BulkWorkspaceProvisionSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        workspaces = serializer.save()
+        return Response(
+            {'workspaces': [{'id': w.id, 'name': w.name, 'slug': w.slug} for w in workspaces]},
+            status=status.HTTP_201_CREATED
+        )
+
 class WorkspaceDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Workspace.objects.prefetch_related('members__user')
     
@@ -147,3 +162,15 @@ class RemoveMemberView(views.APIView):
         )
         
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+class WorkspaceExportView(views.APIView):
+    """Download the whole workspace as a zip of JSONL files, streamed as it is built"""
+    permission_classes = [permissions.IsAuthenticated, IsWorkspaceOwnerOrAdmin]
+
+    def get(self, request, pk):
+        workspace = get_object_or_404(Workspace.objects.select_related('owner'), pk=pk)
+        self.check_object_permissions(request, workspace)
+
+        response = StreamingHttpResponse(export_workspace_archive(workspace), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{workspace.slug}-export.zip"'
+        return response
@@ -4,6 +4,7 @@ Django settings for config project.
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from corsheaders.defaults import default_headers
 import dj_database_url
 import os
 from django.core.management.utils import get_random_secret_key
@@ -175,13 +176,16 @@ AUTH_USER_MODEL = 'accounts.User'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted
+    # for client IPs (throttling, share link limits); 0 uses REMOTE_ADDR only
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 
@@ -192,8 +196,109 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.authentication.ClaimsTokenRefreshSerializer',
 }
 
+# Access tokens carry the user's fields, so authenticated requests don't read the users
+# table (apps.accounts.authentication). Rows a view still needs are cached per process
+# for JWT_USER_CACHE_TTL seconds. Set JWT_STATELESS_AUTH=False to load the user on every request.
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=True, cast=bool)
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=60, cast=int)
+
+
+# Compressed storage for notebook history, editing sessions and conflicts
+# (see apps.notebooks.fields.CompressedTextField). COMPRESSED_TEXT_DICTIONARY is an
+# optional path to a dictionary built with `manage.py train_compression_dictionary`; new
+# rows use it. When replacing it, list the old paths in COMPRESSED_TEXT_DICTIONARIES
+# (comma-separated) so existing rows stay readable until `compress_text_columns` rewrites them.
+COMPRESSED_TEXT_CODEC = config('COMPRESSED_TEXT_CODEC', default='zlib')
+COMPRESSED_TEXT_LEVEL = config('COMPRESSED_TEXT_LEVEL', default=6, cast=int)
+COMPRESSED_TEXT_DICTIONARY = config('COMPRESSED_TEXT_DICTIONARY', default='')
+COMPRESSED_TEXT_DICTIONARIES = config('COMPRESSED_TEXT_DICTIONARIES', default='').split(',')
+
+
+# Trashed notebooks are hard-deleted with their history by `manage.py purge_trash`
+# (run it from cron) once they have been in the trash this many days.
+TRASH_RETENTION_DAYS = config('TRASH_RETENTION_DAYS', default=30, cast=int)
+
+# Activity log retention: `manage.py archive_activity_logs` exports months older than
+# this to ACTIVITY_ARCHIVE_DIR as .jsonl.gz and removes them. On PostgreSQL the table
+# can be partitioned by month (`manage.py partition_activity_logs`), keeping this many
+# future partitions created.
+ACTIVITY_RETENTION_DAYS = config('ACTIVITY_RETENTION_DAYS', default=365, cast=int)
+ACTIVITY_ARCHIVE_DIR = config('ACTIVITY_ARCHIVE_DIR', default=str(BASE_DIR / 'archives' / 'activity'))
+ACTIVITY_PARTITION_MONTHS_AHEAD = config('ACTIVITY_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+
+# Activity digests (apps.activity.digest) are cached per user for this many seconds;
+# the window is capped at ACTIVITY_DIGEST_MAX_HOURS.
+ACTIVITY_DIGEST_CACHE_TIMEOUT = config('ACTIVITY_DIGEST_CACHE_TIMEOUT', default=5 * 60, cast=int)
+ACTIVITY_DIGEST_MAX_HOURS = config('ACTIVITY_DIGEST_MAX_HOURS', default=7 * 24, cast=int)
+
+
+# Version diffs (apps.notebooks.diffs) are kept in the default cache; versions never
+# change, so the timeout only bounds memory. Larger diffs are recomputed per request.
+NOTEBOOK_DIFF_CACHE_TIMEOUT = config('NOTEBOOK_DIFF_CACHE_TIMEOUT', default=24 * 60 * 60, cast=int)
+NOTEBOOK_DIFF_CACHE_MAX_BYTES = config('NOTEBOOK_DIFF_CACHE_MAX_BYTES', default=1024 * 1024, cast=int)
+
+
+# Rebase PENDING conflicts onto the new head whenever a notebook version lands.
+# Runs on a background thread after commit; set False to run inline instead.
+SYNC_REBASE_IN_BACKGROUND = config('SYNC_REBASE_IN_BACKGROUND', default=True, cast=bool)
+
+
+# Editing sessions expire after EDITING_SESSION_TTL seconds without a patch, poll
+# or heartbeat. `manage.py cleanup_editing_sessions` deactivates expired sessions
+# and deletes inactive ones older than EDITING_SESSION_RETENTION_DAYS.
+EDITING_SESSION_TTL = config('EDITING_SESSION_TTL', default=30 * 60, cast=int)
+EDITING_SESSION_HEARTBEAT_INTERVAL = config('EDITING_SESSION_HEARTBEAT_INTERVAL', default=30, cast=int)
+EDITING_SESSION_RETENTION_DAYS = config('EDITING_SESSION_RETENTION_DAYS', default=7, cast=int)
+# Editors stay listed by the presence endpoint this long after their last request
+EDITING_PRESENCE_TIMEOUT = config('EDITING_PRESENCE_TIMEOUT', default=90, cast=int)
+
+
+# Per-process cache of content for notebooks with open editing sessions (apps.sync.cache)
+HOT_DOCUMENT_CACHE_ENTRIES = config('HOT_DOCUMENT_CACHE_ENTRIES', default=256, cast=int)
+HOT_DOCUMENT_CACHE_BYTES = config('HOT_DOCUMENT_CACHE_BYTES', default=64 * 1024 * 1024, cast=int)
+
+
+# Real-time (OT) editing for notebooks with sync_mode=REALTIME, see apps.sync.realtime.
+# Documents live in worker memory and are written back as a version on these limits;
+# a background thread per worker checks them every REALTIME_SNAPSHOT_INTERVAL seconds.
+REALTIME_SNAPSHOT_INTERVAL = config('REALTIME_SNAPSHOT_INTERVAL', default=10, cast=int)  # seconds
+REALTIME_SNAPSHOT_MAX_OPS = config('REALTIME_SNAPSHOT_MAX_OPS', default=200, cast=int)
+REALTIME_HISTORY_LIMIT = config('REALTIME_HISTORY_LIMIT', default=1000, cast=int)
+REALTIME_IDLE_TIMEOUT = config('REALTIME_IDLE_TIMEOUT', default=300, cast=int)  # seconds
+
+
+# Share links: a correct password is exchanged for a signed access token valid this
+# long (seconds), and failed attempts are limited per link and per IP per window.
+SHARE_ACCESS_TOKEN_TTL = config('SHARE_ACCESS_TOKEN_TTL', default=60 * 60, cast=int)
+SHARE_PASSWORD_FAILURE_WINDOW = config('SHARE_PASSWORD_FAILURE_WINDOW', default=15 * 60, cast=int)
+SHARE_PASSWORD_MAX_FAILURES_PER_LINK = config('SHARE_PASSWORD_MAX_FAILURES_PER_LINK', default=20, cast=int)
+SHARE_PASSWORD_MAX_FAILURES_PER_IP = config('SHARE_PASSWORD_MAX_FAILURES_PER_IP', default=10, cast=int)
+
+# Guests editing through an EDIT link: each link keeps at most this many guest sessions
+# (the least recently active are removed first), and each client may open this many per link.
+SHARE_EDIT_MAX_SESSIONS_PER_LINK = config('SHARE_EDIT_MAX_SESSIONS_PER_LINK', default=20, cast=int)
+SHARE_EDIT_SESSION_RATE = config('SHARE_EDIT_SESSION_RATE', default='30/hour')
+
+# Share link access rows are buffered in memory and bulk-inserted off the request path
+SHARE_ACCESS_LOG_BUFFERED = config('SHARE_ACCESS_LOG_BUFFERED', default=True, cast=bool)
+SHARE_ACCESS_LOG_BATCH_SIZE = config('SHARE_ACCESS_LOG_BATCH_SIZE', default=200, cast=int)
+SHARE_ACCESS_LOG_FLUSH_INTERVAL = config('SHARE_ACCESS_LOG_FLUSH_INTERVAL', default=5, cast=int)  # seconds
+SHARE_ACCESS_LOG_MAX_PENDING = config('SHARE_ACCESS_LOG_MAX_PENDING', default=10000, cast=int)  # kept while writes fail
+
+# `manage.py compact_share_link_accesses` rolls access rows up per hour and day once an
+# hour is this many seconds old, then deletes raw rows older than the retention period.
+SHARE_ACCESS_COMPACTION_DELAY = config('SHARE_ACCESS_COMPACTION_DELAY', default=5 * 60, cast=int)
+SHARE_ACCESS_RAW_RETENTION_DAYS = config('SHARE_ACCESS_RAW_RETENTION_DAYS', default=30, cast=int)
+
+# Public READ links (no password, no use limit) are cacheable: rendered payloads stay in
+# the default cache this long, and clients/proxies may reuse them for SHARE_PUBLIC_MAX_AGE.
+SHARE_PUBLIC_CACHE_TIMEOUT = config('SHARE_PUBLIC_CACHE_TIMEOUT', default=10 * 60, cast=int)
+SHARE_PUBLIC_MAX_AGE = config('SHARE_PUBLIC_MAX_AGE', default=60, cast=int)
+
 
 # CORS Configuration
 def normalize_origin(origin):
@@ -219,6 +324,7 @@ if 'https://multiworkspace-notes.netlify.app' not in CORS_ALLOWED_ORIGINS:
     CORS_ALLOWED_ORIGINS.append('https://multiworkspace-notes.netlify.app')
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'x-share-access-token')
 
 # CSRF Configuration for Deployment
 # Trust the same origins as CORS
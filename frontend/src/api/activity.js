@@ -11,5 +11,10 @@ export const activityApi = {
 
     getNotebookActivity: (notebookId, params = {}) => {
         return api.get(`/api/activity/notebooks/${notebookId}/`, { params });
+    },
+
+    // Changes across all of the user's workspaces, grouped by workspace/notebook/actor
+    getDigest: (params = { hours: 24 }) => {
+        return api.get('/api/activity/digest/', { params });
     }
 };
@@ -95,20 +95,17 @@ export const sharingApi = {
     create: (data) => api.post('/api/share/create/', data),
     update: (id, data) => api.patch(`/api/share/${id}/`, data),
     revoke: (id) => api.delete(`/api/share/${id}/`),
-    access: (token, password = null) => {
-        const config = {};
+    // A password is exchanged once for an access_token; send that on later requests
+    access: (token, password = null, accessToken = null) => {
         if (password) {
-            config.data = { password };
-            return api.get(`/api/share/access/${token}/`, { data: { password } });
+            return api.post(`/api/share/access/${token}/`, { password });
         }
-        return api.get(`/api/share/access/${token}/`);
+        const headers = accessToken ? { 'X-Share-Access-Token': accessToken } : {};
+        return api.get(`/api/share/access/${token}/`, { headers });
     },
-    edit: (token, data, password = null) => {
-        const payload = { ...data };
-        if (password) {
-            payload.password = password;
-        }
-        return api.patch(`/api/share/edit/${token}/`, payload);
+    edit: (token, data, accessToken = null) => {
+        const headers = accessToken ? { 'X-Share-Access-Token': accessToken } : {};
+        return api.patch(`/api/share/edit/${token}/`, data, { headers });
     }
 };
 
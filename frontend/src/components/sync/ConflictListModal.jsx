@@ -17,7 +17,7 @@ const ConflictListModal = ({ notebookId, isOpen, onClose, onSelectConflict }) =>
         setIsLoading(true);
         try {
             const response = await api.get(`/api/sync/conflicts/?notebook_id=${notebookId}`);
-            setConflicts(response.data);
+            setConflicts(response.data.results ?? response.data);
         } catch (error) {
             console.error('Failed to fetch conflicts:', error);
         } finally {
@@ -1,7 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import { Lock, FileText, AlertCircle, Save, Cloud, CloudOff } from 'lucide-react';
 import { sharingApi } from '../api/axios';
+import SyncManager from '../services/SyncManager';
 import Button from '../components/ui/Button';
 
 const SharedNotebook = () => {
@@ -12,23 +13,43 @@ const SharedNotebook = () => {
     const [error, setError] = useState('');
     const [password, setPassword] = useState('');
     const [isPasswordRequired, setIsPasswordRequired] = useState(false);
+    const [accessToken, setAccessToken] = useState(null);
 
     // Editing state
     const [title, setTitle] = useState('');
     const [content, setContent] = useState('');
     const [isSaving, setIsSaving] = useState(false);
     const [lastSaved, setLastSaved] = useState(null);
+    const syncManagerRef = useRef(null);
 
     useEffect(() => {
         fetchNotebook();
+        return () => {
+            syncManagerRef.current?.heartbeat(true);
+            syncManagerRef.current = null;
+        };
     }, [token]);
 
     const fetchNotebook = async (pwd = null) => {
         setIsLoading(true);
         setError('');
         try {
-            const response = await sharingApi.access(token, pwd);
-            const { notebook: nbData, access_level } = response.data;
+            const response = await sharingApi.access(token, pwd, accessToken);
+            const { notebook: nbData, access_level, access_token } = response.data;
+            if (access_token) {
+                setAccessToken(access_token);
+            }
+
+            if (access_level === 'EDIT') {
+                // Content edits are sent as patches through an editing session
+                const syncManager = new SyncManager(nbData.id, {
+                    shareToken: token,
+                    accessToken: access_token || accessToken,
+                });
+                const session = await syncManager.startSession();
+                nbData.content = session.base_content;
+                syncManagerRef.current = syncManager;
+            }
 
             setNotebook(nbData);
             setAccessLevel(access_level);
@@ -46,6 +67,8 @@ const SharedNotebook = () => {
                 } else {
                     setError(err.response.data?.detail || 'Access denied.');
                 }
+            } else if (err.response?.status === 429) {
+                setError(err.response.data?.detail || 'Too many attempts. Try again later.');
             } else {
                 setError('Failed to load notebook. The link may be invalid or expired.');
             }
@@ -63,9 +86,24 @@ const SharedNotebook = () => {
         if (accessLevel !== 'EDIT') return;
         setIsSaving(true);
         try {
-            const response = await sharingApi.edit(token, { title, content }, password || null);
-            setNotebook(response.data);
-            setLastSaved(new Date(response.data.updated_at));
+            let saved = notebook;
+            if (title !== notebook.title) {
+                const response = await sharingApi.edit(token, { title }, accessToken);
+                saved = { ...saved, title: response.data.title };
+            }
+            const syncManager = syncManagerRef.current;
+            if (syncManager && content !== syncManager.baseContent) {
+                const result = await syncManager.sync(content);
+                if (result?.status === 'conflict') {
+                    alert('Someone else changed this notebook. Your edit could not be merged; please reapply it.');
+                }
+                if (result?.content !== undefined) {
+                    saved = { ...saved, content: result.content };
+                    setContent(result.content);
+                }
+            }
+            setNotebook(saved);
+            setLastSaved(new Date());
         } catch (err) {
             console.error('Failed to save notebook:', err);
             alert('Failed to save changes.');
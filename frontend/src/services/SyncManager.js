@@ -2,8 +2,14 @@ import DiffMatchPatch from 'diff-match-patch';
 import api from '../api/axios';
 
 class SyncManager {
-    constructor(notebookId) {
+    /**
+     * @param {number} notebookId
+     * @param {object} options - { shareToken, accessToken } to edit as a guest through an EDIT share link
+     */
+    constructor(notebookId, { shareToken = null, accessToken = null } = {}) {
         this.notebookId = notebookId;
+        this.shareToken = shareToken;
+        this.accessToken = accessToken;
         this.dmp = new DiffMatchPatch();
         this.sessionToken = null;
         this.baseVersion = null;
@@ -11,12 +17,25 @@ class SyncManager {
         this.isSyncing = false;
     }
 
+    /**
+     * POST to a session endpoint, through the share link for guests
+     * @param {string} action - 'edit', 'apply-patch' or 'heartbeat'
+     */
+    post(action, data = {}) {
+        if (!this.shareToken) {
+            return api.post(`/api/sync/notebooks/${this.notebookId}/${action}/`, data);
+        }
+        const path = action === 'edit' ? 'session' : action;
+        const headers = this.accessToken ? { 'X-Share-Access-Token': this.accessToken } : {};
+        return api.post(`/api/share/edit/${this.shareToken}/${path}/`, data, { headers });
+    }
+
     /**
      * Start an editing session
      */
     async startSession() {
         try {
-            const response = await api.post(`/api/sync/notebooks/${this.notebookId}/edit/`);
+            const response = await this.post('edit');
             const data = response.data;
             this.sessionToken = data.session_token;
             this.baseVersion = data.base_version;
@@ -60,7 +79,7 @@ class SyncManager {
 
             // console.log('Sending patch:', patchText);
 
-            const response = await api.post(`/api/sync/notebooks/${this.notebookId}/apply-patch/`, {
+            const response = await this.post('apply-patch', {
                 session_token: this.sessionToken,
                 patch: patchText || ''
             });
@@ -89,6 +108,11 @@ class SyncManager {
         } catch (error) {
             if (error.response && error.response.status === 409) {
                 console.warn('Conflict detected (409):', error.response.data);
+                if (this.shareToken && error.response.data.content !== undefined) {
+                    // Guest patches are rejected rather than queued; the session now starts from the server copy
+                    this.baseContent = error.response.data.content;
+                    this.baseVersion = error.response.data.version;
+                }
                 return error.response.data; // Return conflict data to be handled by UI
             }
             console.error('Sync failed:', error);
@@ -112,18 +136,64 @@ class SyncManager {
         }
     }
 
+    /**
+     * Keep the editing session alive while the user is idle, or end it
+     * @param {boolean} end - Close the session instead of extending it
+     * @returns {Promise<boolean>} - false if the session has expired
+     */
+    async heartbeat(end = false) {
+        if (!this.sessionToken) {
+            return false;
+        }
+        try {
+            await this.post('heartbeat', {
+                session_token: this.sessionToken,
+                end,
+            });
+            if (end) {
+                this.sessionToken = null;
+            }
+            return true;
+        } catch (error) {
+            if (error.response?.status === 410) {
+                this.sessionToken = null;
+                return false;
+            }
+            console.error('Failed to send heartbeat:', error);
+            return true;
+        }
+    }
+
+    /**
+     * Users currently editing this notebook
+     * @returns {Promise<Array>} - [{ user_id, username, email, last_seen }]
+     */
+    async getPresence() {
+        try {
+            const response = await api.get(`/api/sync/notebooks/${this.notebookId}/presence/`);
+            return response.data.editors;
+        } catch (error) {
+            console.error('Failed to load presence:', error);
+            return [];
+        }
+    }
+
     /**
      * Resolve a conflict
-     * @param {number} conflictId 
-     * @param {string} strategy - 'YOURS', 'THEIRS', 'MANUAL'
+     * @param {number} conflictId
+     * @param {string} strategy - 'YOURS', 'THEIRS', 'MANUAL', 'BLOCKS'
      * @param {string} finalContent - Required if strategy is MANUAL
+     * @param {Array} blocks - Required if strategy is BLOCKS: [{ line_number, choice: 'YOURS'|'THEIRS'|'BASE' } or { line_number, content }]
      */
-    async resolveConflict(conflictId, strategy, finalContent = null) {
+    async resolveConflict(conflictId, strategy, finalContent = null, blocks = null) {
         try {
             const payload = { resolution_strategy: strategy };
             if (strategy === 'MANUAL') {
                 payload.final_content = finalContent;
             }
+            if (strategy === 'BLOCKS') {
+                payload.blocks = blocks;
+            }
 
             const response = await api.post(`/api/sync/conflicts/${conflictId}/resolve/`, payload);
             const result = response.data;